@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sipariş alma akışının performans ölçümü
+
+Her simüle kasa kendi masasında masa açma, ürün ekleme, ürün çıkarma ve
+ödeme adımlarını uygulamanın yaptığı çağrılarla tekrarlar. İşlem başına
+p50/p95/p99 gecikme, veritabanı gidiş-dönüş sayısı ve toplam işlem hızı
+JSON olarak yazılır.
+
+Varsayılan olarak geçici bir SQLite dosyası kullanılır; --backend mysql ile
+.env'deki sunucu kullanılır (yalnızca test veritabanında çalıştırın).
+"""
+
+from config import DB_CONFIG, APP_CONFIG
+from database import DatabaseManager, ConnectionPool
+from db_backends import create_backend
+from query_stats import transparent
+from datetime import datetime
+from decimal import Decimal
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import logging
+
+OPERATIONS = ('masa_ac', 'urun_ekle', 'urun_cikar', 'odeme')
+
+# Sunucuya giden her çağrı bir gidiş-dönüş sayılır
+ROUND_TRIP_METHODS = frozenset(('execute', 'executemany', 'execute_ddl', 'begin', 'commit',
+                                'rollback', 'open_stream', 'explain', 'ping'))
+
+class RoundTripCounter:
+    """İş parçacığı başına gidiş-dönüş sayacı"""
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def add(self):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+    
+    def take(self):
+        """Son okumadan bu yana yapılan gidiş-dönüş sayısını döndür ve sıfırla"""
+        count = getattr(self._local, 'count', 0)
+        self._local.count = 0
+        return count
+
+class CountingConnection:
+    """Bağlantı çağrılarını sayarak asıl bağlantıya ileten sarmalayıcı"""
+    
+    def __init__(self, conn, counter):
+        self.__dict__['_conn'] = conn
+        self.__dict__['_counter'] = counter
+    
+    def __getattr__(self, name):
+        attr = getattr(self._conn, name)
+        if name not in ROUND_TRIP_METHODS:
+            return attr
+        counter = self._counter
+        
+        @transparent
+        def counted(*args, **kwargs):
+            counter.add()
+            return attr(*args, **kwargs)
+        return counted
+    
+    def __setattr__(self, name, value):
+        # Havuzun tuttuğu last_used/broken gibi alanlar asıl bağlantıda kalır
+        setattr(self._conn, name, value)
+
+class CountingBackend:
+    """Açtığı bağlantıları CountingConnection ile saran arka uç"""
+    
+    def __init__(self, backend, counter):
+        self._backend = backend
+        self._counter = counter
+    
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+    
+    def connect(self):
+        return CountingConnection(self._backend.connect(), self._counter)
+
+def percentile(sorted_values, pct):
+    """Sıralı listede en yakın sıra yöntemiyle yüzdelik değer"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+class OperationStats:
+    """Bir işlem türünün gecikme ve gidiş-dönüş örnekleri"""
+    
+    def __init__(self):
+        self.latencies = []
+        self.round_trips = []
+        self.errors = 0
+    
+    def record(self, seconds, round_trips, ok=True):
+        self.latencies.append(seconds)
+        self.round_trips.append(round_trips)
+        if not ok:
+            self.errors += 1
+    
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.round_trips.extend(other.round_trips)
+        self.errors += other.errors
+    
+    def summary(self):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        ms = lambda value: round(value * 1000, 3) if value is not None else None
+        return {
+            'count': count,
+            'errors': self.errors,
+            'mean_ms': ms(sum(latencies) / count if count else None),
+            'p50_ms': ms(percentile(latencies, 50)),
+            'p95_ms': ms(percentile(latencies, 95)),
+            'p99_ms': ms(percentile(latencies, 99)),
+            'max_ms': ms(latencies[-1] if latencies else None),
+            'round_trips': round(sum(self.round_trips) / count, 2) if count else None,
+        }
+
+class Till:
+    """Tek masada servis senaryosunu tekrarlayan simüle kasa"""
+    
+    def __init__(self, db, counter, table_no, products, args, seed):
+        self.db = db
+        self.counter = counter
+        self.table_no = table_no
+        self.products = products
+        self.args = args
+        self.random = random.Random(seed)
+        self.stats = {name: OperationStats() for name in OPERATIONS}
+    
+    def timed(self, name, fn, *args):
+        """Adımı çalıştır, süresini ve gidiş-dönüş sayısını kaydet"""
+        self.counter.take()
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"{name} adımı başarısız: {e}")
+            result = None
+        elapsed = time.perf_counter() - started
+        self.stats[name].record(elapsed, self.counter.take(), bool(result))
+        return result
+    
+    def open_table(self):
+        """Masayı seç ve yeni sipariş aç (select_table + create_new_order)"""
+        table = self.db.get_table(self.table_no)
+        if table is None:
+            return None
+        order = self.db.get_active_order(table[0])
+        if order:
+            # Önceki turdan kalan sipariş varsa ekranda olduğu gibi yüklenir
+            self.db.get_order_details(order[0])
+        return self.db.create_order(table[0])
+    
+    def remove_line(self, order_id, item_id):
+        """Satırı çıkar, toplam aynı işlemde düşülür (MainWindow.remove_order_item)"""
+        return self.db.remove_order_items(order_id, [item_id]) is not None
+    
+    def pay(self, order_id):
+        """Kalan tutarı al ve ödemeyi tamamla (process_payment + PaymentDialog)"""
+        balance = self.db.get_order_balance(order_id)
+        if balance is None:
+            return False
+        total, paid = balance
+        return self.db.add_payment(order_id, 'nakit', Decimal(total) - Decimal(paid)) is not None
+    
+    def run(self, rounds, barrier):
+        barrier.wait()
+        for _ in range(rounds):
+            order_id = self.timed('masa_ac', self.open_table)
+            if not order_id:
+                continue
+            # Ekrandaki model gibi satır ID'leri eklenen satırlardan tutulur
+            lines = []
+            for _ in range(self.args.items):
+                product_id = self.random.choice(self.products)
+                quantity = self.random.randint(1, 3)
+                result = self.timed('urun_ekle', self.db.add_order_line, order_id, product_id,
+                                    quantity)
+                if result:
+                    lines.append(result[0][0])
+            for _ in range(min(self.args.remove, len(lines))):
+                item_id = lines.pop(self.random.randrange(len(lines)))
+                self.timed('urun_cikar', self.remove_line, order_id, item_id)
+            self.timed('odeme', self.pay, order_id)
+
+def prepare_database(args):
+    """Ölçüm veritabanını ve sayaçlı bağlantı havuzunu hazırla"""
+    config = dict(DB_CONFIG)
+    config['backend'] = args.backend
+    if args.backend == 'sqlite':
+        config['sqlite_path'] = args.sqlite_path or os.path.join(
+            tempfile.mkdtemp(prefix='adisyon_benchmark_'), 'benchmark.db')
+    # Her kasa ayrı bağlantı kullanabilmeli; havuz beklemesi ölçümü bozmasın
+    config['pool_size'] = max(config['pool_size'], args.tills + 1)
+    APP_CONFIG['default_table_count'] = max(APP_CONFIG['default_table_count'], args.tills)
+    
+    counter = RoundTripCounter()
+    pool = ConnectionPool(CountingBackend(create_backend(config), counter), config)
+    db = DatabaseManager(pool)
+    if not db.connect() or not db.create_tables():
+        raise RuntimeError("Ölçüm veritabanı hazırlanamadı")
+    return db, counter, config
+
+def run_benchmark(args):
+    """Senaryoyu çalıştır ve sonuçları sözlük olarak döndür"""
+    db, counter, config = prepare_database(args)
+    try:
+        products = [row[0] for row in db.get_products()]
+        if not products:
+            raise RuntimeError("Ölçüm için ürün bulunamadı")
+        
+        def make_tills(seed_offset):
+            return [Till(db, counter, index + 1, products, args, args.seed + seed_offset + index)
+                    for index in range(args.tills)]
+        
+        def run_tills(tills, rounds):
+            barrier = threading.Barrier(len(tills) + 1)
+            threads = [threading.Thread(target=till.run, args=(rounds, barrier), daemon=True)
+                       for till in tills]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            return time.perf_counter() - started
+        
+        if args.warmup:
+            run_tills(make_tills(10000), args.warmup)
+        
+        tills = make_tills(0)
+        elapsed = run_tills(tills, args.rounds)
+        
+        stats = {name: OperationStats() for name in OPERATIONS}
+        for till in tills:
+            for name, op_stats in till.stats.items():
+                stats[name].merge(op_stats)
+        operations = sum(len(op_stats.latencies) for op_stats in stats.values())
+        
+        return {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'backend': config['backend'],
+            'python': sys.version.split()[0],
+            'parameters': {
+                'tills': args.tills,
+                'rounds': args.rounds,
+                'items': args.items,
+                'remove': args.remove,
+                'warmup': args.warmup,
+                'seed': args.seed,
+                'pool_size': config['pool_size'],
+            },
+            'elapsed_s': round(elapsed, 3),
+            'throughput': {
+                'operations_per_s': round(operations / elapsed, 2) if elapsed else None,
+                'orders_per_s': round(len(stats['odeme'].latencies) / elapsed, 2) if elapsed else None,
+            },
+            'operations': {name: op_stats.summary() for name, op_stats in stats.items()},
+            'statement_cache': db.statement_cache_stats(),
+            'transaction_retries': db.transaction_retry_stats(),
+        }
+    finally:
+        db.disconnect()
+        if args.backend == 'sqlite' and not args.sqlite_path:
+            shutil.rmtree(os.path.dirname(config['sqlite_path']), ignore_errors=True)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sipariş alma akışı performans ölçümü")
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'), default='sqlite',
+                        help="sqlite: geçici gömülü veritabanı, mysql: .env'deki sunucu")
+    parser.add_argument('--sqlite-path', help="SQLite dosyası (varsayılan: geçici dizin)")
+    parser.add_argument('--tills', type=int, default=4, help="eş zamanlı kasa sayısı")
+    parser.add_argument('--rounds', type=int, default=50, help="kasa başına servis sayısı")
+    parser.add_argument('--items', type=int, default=8, help="siparişe eklenen ürün sayısı")
+    parser.add_argument('--remove', type=int, default=2, help="siparişten çıkarılan ürün sayısı")
+    parser.add_argument('--warmup', type=int, default=2, help="ölçülmeyen ısınma turu")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="JSON sonucun yazılacağı dosya (varsayılan: stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Adım başına bilgi logları ölçümü gölgelemesin
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    result = run_benchmark(args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"SUCCESS: Sonuclar {args.output} dosyasina yazildi")
+    else:
+        print(text)
+    
+    failed = sum(op['errors'] for op in result['operations'].values())
+    return failed == 0
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CatalogCache:
+    """Ürün ve kategorilerin bellekteki kopyası (katalog sürümüyle geçersiz kılınır)"""
+
+    def __init__(self, db):
+        self.db = db
+        self.version = None
+        # Ürün satırları get_products biçimindedir: (id, ad, kategori, fiyat, açıklama)
+        self.products = {}
+        self.products_by_category = {}
+        self.categories = {}
+        self._ordered_products = []
+        self._ordered_categories = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Kataloğu veritabanından yükle"""
+        version = self.db.get_catalog_version()
+        catalog = self.db.get_catalog()
+        if catalog is None:
+            return False
+
+        product_rows, category_rows = catalog
+        self._apply(version, product_rows, category_rows)
+        logger.info(f"Katalog yüklendi (sürüm {version}, {len(self.products)} ürün)")
+        return True
+
+    def _apply(self, version, product_rows, category_rows):
+        products = {}
+        products_by_category = {}
+        ordered_products = []
+        for product_id, name, category, price, description, category_id in product_rows:
+            product = (product_id, name, category, price, description)
+            products[product_id] = product
+            products_by_category.setdefault(category_id, []).append(product)
+            ordered_products.append(product)
+
+        for category_products in products_by_category.values():
+            category_products.sort(key=lambda product: product[1])
+
+        # Okuyan thread'ler yarım yüklenmiş katalog görmesin diye tek seferde değiştir
+        with self._lock:
+            self.version = version
+            self.products = products
+            self.products_by_category = products_by_category
+            self.categories = dict(category_rows)
+            self._ordered_products = ordered_products
+            self._ordered_categories = [tuple(row) for row in category_rows]
+
+    def snapshot(self):
+        """Çevrimdışı açılışta kullanılacak, JSON'a yazılabilir katalog kopyası"""
+        with self._lock:
+            category_of = {product[0]: category_id
+                           for category_id, products in self.products_by_category.items()
+                           for product in products}
+            products = [[product_id, name, category, str(price), description,
+                         category_of.get(product_id)]
+                        for product_id, name, category, price, description in self._ordered_products]
+            return {'surum': self.version, 'urunler': products,
+                    'kategoriler': self._ordered_categories}
+
+    def load_snapshot(self, snapshot):
+        """snapshot() ile saklanan katalogu yükle (sunucuya ulaşılamazken)"""
+        if not snapshot:
+            return False
+        product_rows = [(product_id, name, category, Decimal(price), description, category_id)
+                        for product_id, name, category, price, description, category_id
+                        in snapshot['urunler']]
+        # Sürüm boş bırakılır ki bağlantı gelince katalog yeniden yüklensin
+        self._apply(None, product_rows, snapshot['kategoriler'])
+        logger.info(f"Katalog yerel kopyadan yüklendi ({len(self.products)} ürün)")
+        return True
+
+    def refresh_if_changed(self):
+        """Katalog sürümü değiştiyse yeniden yükle, değiştiyse True döndür"""
+        version = self.db.get_catalog_version()
+        if version is None or version == self.version:
+            return False
+        return self.load()
+
+    def get_products(self, category_id=None):
+        """Aktif ürünleri (isteğe bağlı kategoriye göre) getir"""
+        with self._lock:
+            if category_id:
+                return list(self.products_by_category.get(category_id, []))
+            return list(self._ordered_products)
+
+    def get_product(self, product_id):
+        """ID ile tek ürün getir"""
+        with self._lock:
+            return self.products.get(product_id)
+
+    def get_categories(self):
+        """Aktif kategorileri (id, ad) olarak getir"""
+        with self._lock:
+            return list(self._ordered_categories)
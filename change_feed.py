@@ -0,0 +1,107 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from decimal import Decimal
+from database import (CHANGE_TABLE_STATUS, CHANGE_ORDER_TOTAL, CHANGE_LINE_ADDED,
+                      CHANGE_LINE_REMOVED, CHANGE_LINE_UPDATED, CHANGE_ORDER_CLOSED)
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ChangeFeed(QObject):
+    """degisiklik_log tablosunu yoklayıp diğer terminallerin değişikliklerini sinyal olarak yayar"""
+    table_status_changed = pyqtSignal(int, str)     # masa_id, durum
+    order_total_changed = pyqtSignal(int, object)   # siparis_id, toplam
+    order_lines_added = pyqtSignal(int, list)       # siparis_id, detay ID'leri
+    order_lines_removed = pyqtSignal(int, list)     # siparis_id, detay ID'leri
+    order_lines_updated = pyqtSignal(int, list)     # siparis_id, (detay ID, adet farkı)
+    order_closed = pyqtSignal(int, int)             # siparis_id, masa_id
+    
+    def __init__(self, db, executor, interval_ms=500, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.executor = executor
+        self.last_id = None
+        self._in_flight = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+    
+    def start(self, last_id=None):
+        """Verilen son kayıttan itibaren yoklamaya başla (yoksa ilk yoklamada istenir)"""
+        self.last_id = last_id
+        self.timer.start()
+    
+    def stop(self):
+        self.timer.stop()
+    
+    def poll(self):
+        """Son görülen ID'den sonraki kayıtları arka planda iste"""
+        # Önceki yoklama bitmeden yenisini başlatma; last_id yalnızca sonuç gelince ilerler
+        if self._in_flight:
+            return
+        self._in_flight = True
+        if self.last_id is None:
+            # Başlangıçta sunucuya ulaşılamadı; başlangıç noktası yeniden istenir
+            future = self.executor.submit(self.db.get_last_change_id, on_done=self._set_last_id)
+        else:
+            future = self.executor.submit(self.db.get_changes_since, self.last_id,
+                                          on_done=self.dispatch)
+        future.settled.connect(self._on_settled)
+    
+    def _set_last_id(self, last_id):
+        if self.last_id is None:
+            self.last_id = last_id
+    
+    def _on_settled(self):
+        self._in_flight = False
+    
+    def dispatch(self, rows):
+        """Gelen kayıtları birleştirip sinyalleri yay"""
+        if not rows:
+            return
+        
+        # Aynı turda aynı masa/sipariş için yalnızca son durum yayılır
+        table_status = {}
+        order_totals = {}
+        added = {}
+        removed = {}
+        updated = {}
+        closed = {}
+        for change_id, event, table_id, order_id, record_id, value in rows:
+            self.last_id = change_id
+            if event == CHANGE_TABLE_STATUS:
+                table_status[table_id] = value
+            elif event == CHANGE_ORDER_TOTAL:
+                order_totals[order_id] = Decimal(value)
+            elif event == CHANGE_LINE_ADDED:
+                added.setdefault(order_id, []).append(record_id)
+            elif event == CHANGE_LINE_REMOVED:
+                updated.get(order_id, {}).pop(record_id, None)
+                lines = added.get(order_id)
+                if lines and record_id in lines:
+                    lines.remove(record_id)
+                else:
+                    removed.setdefault(order_id, []).append(record_id)
+            elif event == CHANGE_LINE_UPDATED:
+                # Aynı turda eklenen satır zaten güncel adediyle okunacak
+                if record_id not in added.get(order_id, ()):
+                    changes = updated.setdefault(order_id, {})
+                    changes[record_id] = changes.get(record_id, 0) + int(value)
+            elif event == CHANGE_ORDER_CLOSED:
+                closed[order_id] = table_id
+            else:
+                logger.warning(f"Bilinmeyen değişiklik olayı: {event}")
+        
+        for table_id, status in table_status.items():
+            self.table_status_changed.emit(table_id, status)
+        for order_id, item_ids in removed.items():
+            self.order_lines_removed.emit(order_id, item_ids)
+        for order_id, item_ids in added.items():
+            if item_ids:
+                self.order_lines_added.emit(order_id, item_ids)
+        for order_id, changes in updated.items():
+            if changes:
+                self.order_lines_updated.emit(order_id, list(changes.items()))
+        for order_id, total in order_totals.items():
+            self.order_total_changed.emit(order_id, total)
+        for order_id, table_id in closed.items():
+            self.order_closed.emit(order_id, table_id)
@@ -3,19 +3,63 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# MySQL Veritabanı Ayarları
+# Veritabanı Ayarları
 # Eğer .env dosyası yoksa, buradaki değerleri kullanın
 DB_CONFIG = {
+    # 'mysql' veya sunucu gerektirmeyen 'sqlite'
+    'backend': os.getenv('DB_BACKEND', 'mysql'),
+    # SQLite arka ucunun veritabanı dosyası
+    'sqlite_path': os.getenv('DB_SQLITE_PATH', 'adisyon.db'),
     'host': os.getenv('DB_HOST', 'localhost'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', 'heves.55'),  # MySQL root şifrenizi buraya yazın
     'database': os.getenv('DB_NAME', 'adisyon_sistemi'),
-    'port': int(os.getenv('DB_PORT', 3306))
+    'port': int(os.getenv('DB_PORT', 3306)),
+    # Bağlantı havuzu ayarları (ana pencere ve tüm diyaloglar ortak kullanır)
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),  # saniye
+    'pool_ping_interval': int(os.getenv('DB_POOL_PING_INTERVAL', 30)),  # saniye
+    # Bağlantı başına tutulacak hazırlanmış ifade sayısı (LRU)
+    'statement_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', 64)),
+    # Kilitlenme/kilit zaman aşımında işlemin yeniden deneme sayısı ve ilk bekleme süresi
+    'transaction_retries': int(os.getenv('DB_TRANSACTION_RETRIES', 3)),
+    'transaction_retry_backoff_ms': int(os.getenv('DB_TRANSACTION_RETRY_BACKOFF_MS', 50))
 }
 
 # Uygulama Ayarları
 APP_CONFIG = {
     'title': 'Adisyon Sistemi',
     'version': '1.0.0',
-    'window_size': (1200, 800)
+    'window_size': (1200, 800),
+    # İlk kurulumda oluşturulacak masa sayısı
+    'default_table_count': int(os.getenv('DEFAULT_TABLE_COUNT', 20)),
+    # Diğer terminallerdeki menü değişikliklerinin yoklanma aralığı (saniye)
+    'catalog_poll_interval': int(os.getenv('CATALOG_POLL_INTERVAL', 5)),
+    # Masa durumu ve sipariş değişikliklerinin yoklanma aralığı (milisaniye)
+    'change_poll_interval_ms': int(os.getenv('CHANGE_POLL_INTERVAL_MS', 500)),
+    # Bu terminalin yazdırma kuyruğundan aldığı işlerin hedef adı
+    'print_target': os.getenv('PRINT_TARGET', 'kasa'),
+    # Yazıcı çıkışı: 'printer', 'printer:<yazıcı adı>', 'file:<dizin>' veya 'pdf:<dizin>'
+    'print_sink': os.getenv('PRINT_SINK', 'printer'),
+    'print_poll_interval': int(os.getenv('PRINT_POLL_INTERVAL', 3)),
+    'print_max_attempts': int(os.getenv('PRINT_MAX_ATTEMPTS', 5)),
+    # Termal fiş genişliği (80mm yazıcıda Font A için 48 karakter)
+    'receipt_width': int(os.getenv('RECEIPT_WIDTH', 48)),
+    # Adisyon altına basılacak QR içeriği, ör. "https://ornek.com/s/{order_id}" (boşsa basılmaz)
+    'receipt_qr': os.getenv('RECEIPT_QR', ''),
+    # Yeni satırların istasyon fişinde birleştirildiği süre (milisaniye)
+    'kitchen_coalesce_ms': int(os.getenv('KITCHEN_COALESCE_MS', 2000)),
+    # Mutfak fişlerinin basılacağı çıkış (PRINT_SINK biçiminde, boşsa yalnızca ekran)
+    'kitchen_sink': os.getenv('KITCHEN_SINK', ''),
+    # Sunucuya ulaşılamazken işlemlerin tutulduğu yerel günlük dosyası
+    'offline_journal_path': os.getenv('OFFLINE_JOURNAL_PATH', 'cevrimdisi.db'),
+    # Çevrimdışıyken bağlantının yeniden denenme aralığı (saniye)
+    'offline_retry_interval': int(os.getenv('OFFLINE_RETRY_INTERVAL', 5)),
+    # Aynı ürün aynı notla tekrar eklenince mevcut satırın adedi artırılsın mı
+    'merge_order_lines': os.getenv('MERGE_ORDER_LINES', '1') != '0',
+    # Her SQL ifadesinin süre/satır istatistiği tutulsun mu
+    'query_stats': os.getenv('QUERY_STATS', '1') != '0',
+    # Bu süreyi (milisaniye) aşan ifadeler yavaş sorgu günlüğüne yazılır (0: kapalı)
+    'slow_query_ms': int(os.getenv('SLOW_QUERY_MS', 200)),
+    'slow_query_log': os.getenv('SLOW_QUERY_LOG', 'yavas_sorgular.log')
 }
@@ -1,22 +1,438 @@
-import mysql.connector
-from mysql.connector import Error
-from config import DB_CONFIG
+from config import DB_CONFIG, APP_CONFIG
+from db_backends import (Error, DatabaseError, PoolError, create_backend, statement_cache_stats,
+                         transaction_retry_stats)
+from query_stats import query_stats
+from contextlib import contextmanager
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import hashlib
+import random
+import threading
+import time
+import queue
 import logging
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# İlk kurulumda eklenen menü: (ad, açıklama, istasyon) ve (ad, kategori, fiyat, açıklama)
+DEFAULT_CATEGORIES = [
+    ('İçecekler', 'Soğuk ve sıcak içecekler', 'bar'),
+    ('Yemekler', 'Ana yemekler ve atıştırmalıklar', 'mutfak'),
+    ('Tatlılar', 'Tatlı çeşitleri', 'tatli'),
+    ('Kahvaltı', 'Kahvaltı menüsü', 'mutfak')
+]
+
+DEFAULT_PRODUCTS = [
+    ('Çay', 'İçecekler', 5.00, 'Sıcak çay'),
+    ('Kahve', 'İçecekler', 8.00, 'Türk kahvesi'),
+    ('Kola', 'İçecekler', 6.00, 'Soğuk içecek'),
+    ('Su', 'İçecekler', 2.00, 'Şişe su'),
+    ('Döner', 'Yemekler', 25.00, 'Tavuk döner'),
+    ('Lahmacun', 'Yemekler', 15.00, 'İnce hamur lahmacun'),
+    ('Pizza', 'Yemekler', 35.00, 'Margherita pizza'),
+    ('Baklava', 'Tatlılar', 20.00, 'Antep fıstıklı baklava'),
+    ('Sütlaç', 'Tatlılar', 12.00, 'Ev yapımı sütlaç'),
+    ('Menemen', 'Kahvaltı', 18.00, 'Domatesli menemen')
+]
+
+# Şema göçü ile oluşturulan ikincil indeksler: (tablo, indeks adı, kolonlar)
+INDEXES = [
+    ('siparisler', 'idx_siparisler_durum_tarih', '(durum, created_at)'),
+    ('siparisler', 'idx_siparisler_masa_durum_tarih', '(masa_id, durum, created_at)'),
+    ('siparis_detaylari', 'idx_siparis_detaylari_siparis', '(siparis_id)'),
+    ('odemeler', 'idx_odemeler_siparis', '(siparis_id)'),
+    ('masalar', 'idx_masalar_kat_bolum', '(kat, bolum, masa_no)'),
+    ('yazdirma_kuyrugu', 'idx_yazdirma_kuyrugu_hedef_durum', '(hedef, durum, sonraki_deneme)'),
+]
+
+# İstemcinin ürettiği kimlikler; çevrimdışı günlük tekrar oynatılırken aynı
+# işlemin iki kez yazılmasını engeller
+UNIQUE_INDEXES = [
+    ('siparisler', 'uq_siparisler_istemci', '(istemci_id)'),
+    ('siparis_detaylari', 'uq_siparis_detaylari_istemci', '(istemci_id)'),
+    ('odemeler', 'uq_odemeler_istemci', '(istemci_id)'),
+    # Aynı siparişte aynı ürün ve notla eklenen satırlar tek satırda birleşir
+    # (notlar_ozet NULL olan eski satırlar birleştirilmez)
+    ('siparis_detaylari', 'uq_siparis_detaylari_birlesim', '(siparis_id, urun_id, notlar_ozet)'),
+]
+
+# Mevcut tablolara şema göçü ile eklenen kolonlar: (tablo, kolon, tanım)
+COLUMNS = [
+    ('masalar', 'kat', "VARCHAR(30) NOT NULL DEFAULT 'Zemin Kat'"),
+    ('masalar', 'bolum', "VARCHAR(30) NOT NULL DEFAULT 'Salon'"),
+    ('kategoriler', 'istasyon', "VARCHAR(20) NOT NULL DEFAULT 'mutfak'"),
+    ('siparisler', 'istemci_id', "CHAR(36) NULL"),
+    ('siparis_detaylari', 'istemci_id', "CHAR(36) NULL"),
+    ('odemeler', 'istemci_id', "CHAR(36) NULL"),
+    ('siparis_detaylari', 'notlar_ozet', "CHAR(32) NULL"),
+    # Bölünmüş ödemede alınan tutar (her ödemede artırılır) ve ürüne göre
+    # ödenen satırın ödemesi
+    ('siparisler', 'odenen_tutar', "DECIMAL(10,2) NOT NULL DEFAULT 0"),
+    ('siparis_detaylari', 'odeme_id', "INT NULL"),
+]
+
+# SCHEMA, COLUMNS, INDEXES veya varsayılan veriler her değiştiğinde artırılır;
+# veritabanındaki sürüm bununla aynıysa açılışta şema adımları atlanır
+SCHEMA_VERSION = 3
+
+# Tablo tanımları MySQL sözdizimiyle yazılır; SQLite arka ucu bunları kendi
+# sözdizimine çevirir (db_backends.SQLiteBackend.ddl)
+SCHEMA = [
+    # Kategoriler tablosu
+    """
+    CREATE TABLE IF NOT EXISTS kategoriler (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        ad VARCHAR(100) NOT NULL,
+        aciklama TEXT,
+        istasyon VARCHAR(20) NOT NULL DEFAULT 'mutfak',
+        aktif BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Ürünler tablosu
+    """
+    CREATE TABLE IF NOT EXISTS urunler (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        ad VARCHAR(100) NOT NULL,
+        kategori_id INT,
+        fiyat DECIMAL(10,2) NOT NULL,
+        aciklama TEXT,
+        aktif BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (kategori_id) REFERENCES kategoriler(id)
+    )
+    """,
+    # Masalar tablosu
+    """
+    CREATE TABLE IF NOT EXISTS masalar (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        masa_no INT UNIQUE NOT NULL,
+        durum ENUM('bos', 'dolu', 'rezerve') DEFAULT 'bos',
+        kat VARCHAR(30) NOT NULL DEFAULT 'Zemin Kat',
+        bolum VARCHAR(30) NOT NULL DEFAULT 'Salon',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Siparişler tablosu
+    """
+    CREATE TABLE IF NOT EXISTS siparisler (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        masa_id INT,
+        toplam_tutar DECIMAL(10,2) DEFAULT 0,
+        durum ENUM('aktif', 'kapatildi', 'iptal') DEFAULT 'aktif',
+        odeme_durumu ENUM('beklemede', 'odendi') DEFAULT 'beklemede',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (masa_id) REFERENCES masalar(id)
+    )
+    """,
+    # Sipariş detayları tablosu
+    """
+    CREATE TABLE IF NOT EXISTS siparis_detaylari (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        siparis_id INT,
+        urun_id INT,
+        adet INT NOT NULL DEFAULT 1,
+        birim_fiyat DECIMAL(10,2) NOT NULL,
+        toplam_fiyat DECIMAL(10,2) NOT NULL,
+        notlar TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (siparis_id) REFERENCES siparisler(id),
+        FOREIGN KEY (urun_id) REFERENCES urunler(id)
+    )
+    """,
+    # Ödemeler tablosu
+    """
+    CREATE TABLE IF NOT EXISTS odemeler (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        siparis_id INT,
+        odeme_tipi ENUM('nakit', 'kredi_karti', 'banka_karti') NOT NULL,
+        tutar DECIMAL(10,2) NOT NULL,
+        tarih TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (siparis_id) REFERENCES siparisler(id)
+    )
+    """,
+    # Katalog sürümü (ürün/kategori değiştikçe artar, terminaller yoklar)
+    """
+    CREATE TABLE IF NOT EXISTS katalog_surumu (
+        id TINYINT PRIMARY KEY,
+        surum INT NOT NULL DEFAULT 0
+    )
+    """,
+    # Günlük satış özeti (gün ve ödeme tipi bazında)
+    """
+    CREATE TABLE IF NOT EXISTS gunluk_ozet (
+        tarih DATE NOT NULL,
+        odeme_tipi ENUM('nakit', 'kredi_karti', 'banka_karti') NOT NULL,
+        siparis_sayisi INT NOT NULL DEFAULT 0,
+        toplam_tutar DECIMAL(12,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (tarih, odeme_tipi)
+    )
+    """,
+    # Günlük ürün satış özeti (gün ve ürün bazında)
+    """
+    CREATE TABLE IF NOT EXISTS gunluk_urun_ozet (
+        tarih DATE NOT NULL,
+        urun_id INT NOT NULL,
+        adet INT NOT NULL DEFAULT 0,
+        toplam_tutar DECIMAL(12,2) NOT NULL DEFAULT 0,
+        satir_sayisi INT NOT NULL DEFAULT 0,
+        birim_fiyat_toplami DECIMAL(12,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (tarih, urun_id),
+        FOREIGN KEY (urun_id) REFERENCES urunler(id)
+    )
+    """,
+    # Değişiklik günlüğü (terminaller yalnızca son gördükleri ID'den sonrasını okur)
+    """
+    CREATE TABLE IF NOT EXISTS degisiklik_log (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        olay VARCHAR(20) NOT NULL,
+        masa_id INT,
+        siparis_id INT,
+        kayit_id INT,
+        deger VARCHAR(50),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # Yazdırma kuyruğu (her terminal kendi yazıcısına ait işleri alır)
+    """
+    CREATE TABLE IF NOT EXISTS yazdirma_kuyrugu (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        siparis_id INT NOT NULL,
+        tur VARCHAR(20) NOT NULL DEFAULT 'adisyon',
+        hedef VARCHAR(50) NOT NULL,
+        durum ENUM('bekliyor', 'yaziliyor', 'yazildi', 'hata') DEFAULT 'bekliyor',
+        deneme INT NOT NULL DEFAULT 0,
+        hata VARCHAR(255),
+        sonraki_deneme TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (siparis_id) REFERENCES siparisler(id)
+    )
+    """,
+    # Veritabanına en son uygulanan şema sürümü (SCHEMA_VERSION)
+    """
+    CREATE TABLE IF NOT EXISTS sema_surumu (
+        id TINYINT PRIMARY KEY,
+        surum INT NOT NULL
+    )
+    """,
+]
+
+# Kategorilerin yönlendirildiği hazırlık istasyonları: (kod, görünen ad)
+STATIONS = [
+    ('mutfak', 'Mutfak'),
+    ('bar', 'Bar'),
+    ('tatli', 'Tatlı'),
+]
+
+# degisiklik_log olay tipleri (terminaller bu kayıtları yoklayarak güncel kalır)
+CHANGE_TABLE_STATUS = 'masa_durumu'
+CHANGE_ORDER_TOTAL = 'siparis_toplami'
+CHANGE_LINE_ADDED = 'satir_eklendi'
+CHANGE_LINE_REMOVED = 'satir_silindi'
+CHANGE_LINE_UPDATED = 'satir_guncellendi'  # deger: adet farkı
+CHANGE_ORDER_CLOSED = 'siparis_kapandi'
+
+# Rapor sorguları; hepsi [başlangıç, bitiş) zaman aralığı alır, böylece
+# created_at üzerindeki indeksler kullanılabilir
+# Bir siparişin birden çok ödemesi olabilir; ödemeler sipariş başına önceden
+# toplanır ki sipariş tek satır kalsın (tipler virgülle ayrılır)
+DAILY_REPORT_QUERY = """
+    SELECT s.id, m.masa_no, s.toplam_tutar, p.odeme_tipleri, s.created_at, s.durum
+    FROM (
+        SELECT o.siparis_id, GROUP_CONCAT(DISTINCT o.odeme_tipi) as odeme_tipleri
+        FROM siparisler s
+        JOIN odemeler o ON o.siparis_id = s.id
+        WHERE s.durum = 'kapatildi' AND s.created_at >= %s AND s.created_at < %s
+        GROUP BY o.siparis_id
+    ) p
+    JOIN siparisler s ON s.id = p.siparis_id
+    JOIN masalar m ON s.masa_id = m.id
+    ORDER BY s.created_at
+"""
+
+# Aylık ve ürün raporları ham sipariş satırları yerine ödeme anında
+# güncellenen günlük özet tablolarından okunur
+MONTHLY_REPORT_QUERY = """
+    SELECT DAY(g.tarih) as gun, SUM(g.siparis_sayisi) as siparis_sayisi, SUM(g.toplam_tutar) as toplam
+    FROM gunluk_ozet g
+    WHERE g.tarih >= DATE(%s) AND g.tarih < DATE(%s)
+    GROUP BY g.tarih
+    ORDER BY g.tarih
+"""
+
+PRODUCT_REPORT_QUERY = """
+    SELECT u.ad, k.ad as kategori, SUM(g.adet) as toplam_adet, 
+           SUM(g.toplam_tutar) as toplam_tutar,
+           SUM(g.birim_fiyat_toplami) / SUM(g.satir_sayisi) as ortalama_fiyat
+    FROM gunluk_urun_ozet g
+    JOIN urunler u ON g.urun_id = u.id
+    JOIN kategoriler k ON u.kategori_id = k.id
+    WHERE g.tarih >= DATE(%s) AND g.tarih < DATE(%s)
+    GROUP BY u.id, u.ad, k.ad
+    ORDER BY toplam_tutar DESC
+"""
+
+TABLE_REPORT_QUERY = """
+    SELECT m.masa_no, COUNT(s.id) as siparis_sayisi, 
+           SUM(s.toplam_tutar) as toplam_satis, AVG(s.toplam_tutar) as ortalama_siparis
+    FROM masalar m
+    LEFT JOIN siparisler s ON m.id = s.masa_id AND s.durum = 'kapatildi'
+        AND s.created_at >= %s AND s.created_at < %s
+    GROUP BY m.id, m.masa_no
+    ORDER BY m.masa_no
+"""
+
+# Satır bazlı ham dışa aktarım (kapatılmış siparişlerin tüm detayları); sıralama
+# idx_siparisler_durum_tarih sırasıyla yapılır, büyük aralıkta filesort gerekmez
+LINE_EXPORT_QUERY = """
+    SELECT sd.id, s.id as siparis_id, s.created_at, m.masa_no, k.ad as kategori, u.ad,
+           sd.adet, sd.birim_fiyat, sd.toplam_fiyat, sd.notlar
+    FROM siparisler s
+    JOIN siparis_detaylari sd ON sd.siparis_id = s.id
+    JOIN masalar m ON s.masa_id = m.id
+    JOIN urunler u ON sd.urun_id = u.id
+    JOIN kategoriler k ON u.kategori_id = k.id
+    WHERE s.durum = 'kapatildi' AND s.created_at >= %s AND s.created_at < %s
+    ORDER BY s.created_at
+"""
+
+REPORT_QUERIES = {
+    'daily': DAILY_REPORT_QUERY,
+    'monthly': MONTHLY_REPORT_QUERY,
+    'product': PRODUCT_REPORT_QUERY,
+    'table': TABLE_REPORT_QUERY,
+}
+
+def day_range(day):
+    """Bir günü kapsayan [başlangıç, bitiş) zaman aralığı"""
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+def date_range(first_day, last_day):
+    """İki gün dahil aralığı kapsayan [başlangıç, bitiş) zaman aralığı"""
+    return day_range(first_day)[0], day_range(last_day)[1]
+
+def month_range(year, month):
+    """Bir ayı kapsayan [başlangıç, bitiş) zaman aralığı"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return day_range(start)[0], day_range(end)[0]
+
+def notes_key(notlar):
+    """Aynı notla eklenen satırları birleştiren anahtar (boşlukları atılmış notun MD5 özeti)"""
+    return hashlib.md5((notlar or '').strip().encode('utf-8')).hexdigest()
+
+class ConnectionPool:
+    """Ana pencere ve tüm diyalogların paylaştığı bağlantı havuzu"""
+    
+    def __init__(self, backend, config):
+        self.backend = backend
+        self.size = config.get('pool_size', 5)
+        self.timeout = config.get('pool_timeout', 10)
+        self.ping_interval = config.get('pool_ping_interval', 30)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _open(self):
+        """Yeni fiziksel bağlantı aç"""
+        return self.backend.connect()
+    
+    def acquire(self):
+        """Havuzdan bağlantı al, gerekirse yenisini aç"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._created < self.size
+                if can_open:
+                    self._created += 1
+            if can_open:
+                try:
+                    return self._open()
+                except Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolError("Bağlantı havuzunda boş bağlantı kalmadı")
+        
+        self.check_health(conn)
+        return conn
+    
+    def check_health(self, conn):
+        """Uzun süre boşta kalan bağlantıyı ping ile kontrol et"""
+        if time.monotonic() - conn.last_used < self.ping_interval:
+            return
+        try:
+            conn.ping()
+        except Error as e:
+            logger.warning(f"Havuzdaki bağlantı yenilenemedi: {e}")
+            self.discard(conn)
+            raise
+    
+    def release(self, conn):
+        """Bağlantıyı havuza geri bırak"""
+        if conn.broken:
+            self.discard(conn)
+            return
+        conn.last_used = time.monotonic()
+        self._idle.put(conn)
+    
+    def discard(self, conn):
+        """Bozuk bağlantıyı havuzdan çıkar"""
+        conn.close()
+        with self._lock:
+            self._created -= 1
+    
+    def close_all(self):
+        """Boştaki tüm bağlantıları kapat"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Süreç genelindeki bağlantı havuzunu döndür"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(create_backend(DB_CONFIG), DB_CONFIG)
+        return _pool
+
+def close_pool():
+    """Süreç genelindeki bağlantı havuzunu kapat"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
 class DatabaseManager:
-    def __init__(self):
-        self.connection = None
-        self.cursor = None
+    def __init__(self, pool=None):
+        self.pool = pool
+        # Son bağlantı denemesi sunucuya ulaştı mı (çevrimdışı moda geçiş için)
+        self.online = True
     
     def connect(self):
-        """Veritabanına bağlan"""
+        """Bağlantı havuzunu hazırla ve bağlantıyı doğrula"""
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            self.cursor = self.connection.cursor()
+            if self.pool is None:
+                self.pool = get_pool()
+            with self.connection():
+                pass
             logger.info("Veritabanına başarıyla bağlanıldı")
             return True
         except Error as e:
@@ -24,167 +440,217 @@ class DatabaseManager:
             return False
     
     def disconnect(self):
-        """Veritabanı bağlantısını kapat"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Havuzdaki veritabanı bağlantılarını kapat"""
+        if self.pool is not None:
+            logger.info(f"Hazırlanmış ifade önbelleği: {statement_cache_stats.snapshot()}")
+            logger.info(f"İşlem yeniden denemeleri: {transaction_retry_stats.snapshot()}")
+            if self.pool is _pool:
+                close_pool()
+            else:
+                self.pool.close_all()
+            self.pool = None
             logger.info("Veritabanı bağlantısı kapatıldı")
     
+    @property
+    def backend(self):
+        """Havuzun kullandığı veritabanı arka ucu (MySQL veya SQLite)"""
+        if self.pool is None:
+            self.pool = get_pool()
+        return self.pool.backend
+    
+    @contextmanager
+    def connection(self):
+        """Havuzdan bağlantı ödünç al, iş bitince geri bırak"""
+        if self.pool is None:
+            self.pool = get_pool()
+        try:
+            conn = self.pool.acquire()
+        except PoolError:
+            raise
+        except Error:
+            self.online = False
+            raise
+        self.online = True
+        try:
+            yield conn
+        except Error as e:
+            if self.pool.backend.is_connection_lost(e):
+                conn.broken = True
+                self.online = False
+            raise
+        finally:
+            self.pool.release(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """Tek bağlantı üzerinde açık bir işlem (transaction) yürüt"""
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                yield conn
+            except Exception:
+                try:
+                    conn.rollback()
+                except Error:
+                    pass
+                raise
+            conn.commit()
+    
+    def run_transaction(self, fn, *args):
+        """fn(conn, *args)'ı tek işlemde çalıştır; kilitlenme ya da kilit zaman aşımında yeniden dene"""
+        retries = DB_CONFIG.get('transaction_retries', 3)
+        backoff = DB_CONFIG.get('transaction_retry_backoff_ms', 50) / 1000
+        attempt = 0
+        while True:
+            try:
+                with self.transaction() as conn:
+                    return fn(conn, *args)
+            except Error as e:
+                kind = self.backend.conflict_kind(e)
+                if kind is None:
+                    raise
+                if attempt >= retries:
+                    transaction_retry_stats.record_exhausted(kind)
+                    raise
+                transaction_retry_stats.record_retry(kind)
+                # Üstel bekleme; rastgele pay, çakışan kasaların aynı anda yeniden denemesini önler
+                delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                attempt += 1
+                logger.warning(f"İşlem çakışması ({kind}), {delay * 1000:.0f} ms sonra "
+                               f"yeniden deneniyor ({attempt}/{retries})")
+                time.sleep(delay)
+    
+    def statement_cache_stats(self):
+        """Hazırlanmış ifade önbelleği sayaçlarını döndür"""
+        return statement_cache_stats.snapshot()
+    
+    def transaction_retry_stats(self):
+        """İşlem yeniden deneme sayaçlarını döndür"""
+        return transaction_retry_stats.snapshot()
+    
     def create_tables(self):
         """Gerekli tabloları oluştur"""
         try:
-            # Kategoriler tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS kategoriler (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    ad VARCHAR(100) NOT NULL,
-                    aciklama TEXT,
-                    aktif BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Ürünler tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS urunler (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    ad VARCHAR(100) NOT NULL,
-                    kategori_id INT,
-                    fiyat DECIMAL(10,2) NOT NULL,
-                    aciklama TEXT,
-                    aktif BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (kategori_id) REFERENCES kategoriler(id)
-                )
-            """)
-            
-            # Masalar tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS masalar (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    masa_no INT UNIQUE NOT NULL,
-                    durum ENUM('bos', 'dolu', 'rezerve') DEFAULT 'bos',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Siparişler tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS siparisler (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    masa_id INT,
-                    toplam_tutar DECIMAL(10,2) DEFAULT 0,
-                    durum ENUM('aktif', 'kapatildi', 'iptal') DEFAULT 'aktif',
-                    odeme_durumu ENUM('beklemede', 'odendi') DEFAULT 'beklemede',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (masa_id) REFERENCES masalar(id)
-                )
-            """)
-            
-            # Sipariş detayları tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS siparis_detaylari (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    siparis_id INT,
-                    urun_id INT,
-                    adet INT NOT NULL DEFAULT 1,
-                    birim_fiyat DECIMAL(10,2) NOT NULL,
-                    toplam_fiyat DECIMAL(10,2) NOT NULL,
-                    notlar TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (siparis_id) REFERENCES siparisler(id),
-                    FOREIGN KEY (urun_id) REFERENCES urunler(id)
-                )
-            """)
-            
-            # Ödemeler tablosu
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS odemeler (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    siparis_id INT,
-                    odeme_tipi ENUM('nakit', 'kredi_karti', 'banka_karti') NOT NULL,
-                    tutar DECIMAL(10,2) NOT NULL,
-                    tarih TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (siparis_id) REFERENCES siparisler(id)
-                )
-            """)
-            
-            self.connection.commit()
+            with self.connection() as conn:
+                for statement in SCHEMA:
+                    for ddl in self.backend.ddl(statement):
+                        conn.execute_ddl(ddl)
+                self._create_columns(conn)
+                self._create_indexes(conn)
             logger.info("Tüm tablolar başarıyla oluşturuldu")
             
             # Varsayılan verileri ekle
             self.insert_default_data()
             
+            with self.connection() as conn:
+                conn.execute(f"""
+                    {self.backend.insert_ignore} INTO sema_surumu (id, surum) VALUES (1, 0)
+                """)
+                conn.execute("UPDATE sema_surumu SET surum = %s WHERE id = 1", (SCHEMA_VERSION,))
         except Error as e:
             logger.error(f"Tablo oluşturma hatası: {e}")
             return False
         return True
     
+    def get_schema_version(self):
+        """Veritabanındaki şema sürümü (tablo henüz yoksa 0)"""
+        with self.connection() as conn:
+            try:
+                result = conn.execute("SELECT surum FROM sema_surumu WHERE id = 1")
+            except Error as e:
+                if self.pool.backend.is_connection_lost(e):
+                    raise
+                return 0
+        return result[0][0] if result else 0
+    
+    def migrate(self):
+        """Şema sürümü eskiyse tabloları, göçleri ve varsayılan verileri uygula"""
+        try:
+            version = self.get_schema_version()
+        except Error as e:
+            logger.error(f"Şema sürümü okunamadı: {e}")
+            return False
+        if version == SCHEMA_VERSION:
+            return True
+        if version > SCHEMA_VERSION:
+            # Daha yeni sürümle güncellenmiş veritabanı; şemaya dokunulmaz
+            logger.warning(f"Veritabanı şeması ({version}) uygulamadan ({SCHEMA_VERSION}) yeni")
+            return True
+        logger.info(f"Şema sürümü {version} -> {SCHEMA_VERSION} güncelleniyor")
+        return self.create_tables()
+    
+    def _create_columns(self, conn):
+        """Eski şemada eksik kolonları ekle (şema göçü)"""
+        existing = self.backend.existing_columns(conn)
+        for table, column, definition in COLUMNS:
+            if (table, column) not in existing:
+                conn.execute_ddl(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                logger.info(f"Kolon eklendi: {table}.{column}")
+    
+    def _create_indexes(self, conn):
+        """Eksik ikincil indeksleri oluştur (şema göçü)"""
+        existing = self.backend.existing_indexes(conn)
+        for kind, indexes in (("INDEX", INDEXES), ("UNIQUE INDEX", UNIQUE_INDEXES)):
+            for table, name, columns in indexes:
+                if (table, name) not in existing:
+                    conn.execute_ddl(f"CREATE {kind} {name} ON {table} {columns}")
+                    logger.info(f"İndeks oluşturuldu: {table}.{name}")
+    
     def insert_default_data(self):
         """Varsayılan verileri ekle"""
         try:
-            # Varsayılan kategoriler
-            kategoriler = [
-                ('İçecekler', 'Soğuk ve sıcak içecekler'),
-                ('Yemekler', 'Ana yemekler ve atıştırmalıklar'),
-                ('Tatlılar', 'Tatlı çeşitleri'),
-                ('Kahvaltı', 'Kahvaltı menüsü')
-            ]
-            
-            for kategori in kategoriler:
-                self.cursor.execute("""
-                    INSERT IGNORE INTO kategoriler (ad, aciklama) 
-                    VALUES (%s, %s)
-                """, kategori)
-            
-            # Varsayılan masalar (1-20 arası)
-            for masa_no in range(1, 21):
-                self.cursor.execute("""
-                    INSERT IGNORE INTO masalar (masa_no) 
-                    VALUES (%s)
-                """, (masa_no,))
-            
-            # Varsayılan ürünler
-            urunler = [
-                ('Çay', 1, 5.00, 'Sıcak çay'),
-                ('Kahve', 1, 8.00, 'Türk kahvesi'),
-                ('Kola', 1, 6.00, 'Soğuk içecek'),
-                ('Su', 1, 2.00, 'Şişe su'),
-                ('Döner', 2, 25.00, 'Tavuk döner'),
-                ('Lahmacun', 2, 15.00, 'İnce hamur lahmacun'),
-                ('Pizza', 2, 35.00, 'Margherita pizza'),
-                ('Baklava', 3, 20.00, 'Antep fıstıklı baklava'),
-                ('Sütlaç', 3, 12.00, 'Ev yapımı sütlaç'),
-                ('Menemen', 4, 18.00, 'Domatesli menemen')
-            ]
-            
-            for urun in urunler:
-                self.cursor.execute("""
-                    INSERT IGNORE INTO urunler (ad, kategori_id, fiyat, aciklama) 
-                    VALUES (%s, %s, %s, %s)
-                """, urun)
-            
-            self.connection.commit()
-            logger.info("Varsayılan veriler başarıyla eklendi")
-            
+            with self.connection() as conn:
+                insert_ignore = self.backend.insert_ignore
+                
+                # Varsayılan menü yalnızca katalog boşken eklenir; aksi halde her
+                # açılışta aynı ürünler yeniden eklenirdi (ad için tekil anahtar yok)
+                if not conn.execute("SELECT COUNT(*) FROM kategoriler")[0][0]:
+                    conn.executemany("""
+                        INSERT INTO kategoriler (ad, aciklama, istasyon) 
+                        VALUES (%s, %s, %s)
+                    """, DEFAULT_CATEGORIES)
+                
+                # Varsayılan masalar yalnızca hiç masa yoksa eklenir; kat/bölüm
+                # düzeni sonradan masalar tablosundan değiştirilebilir
+                if not conn.execute("SELECT COUNT(*) FROM masalar")[0][0]:
+                    conn.executemany(f"""
+                        {insert_ignore} INTO masalar (masa_no) 
+                        VALUES (%s)
+                    """, [(masa_no,) for masa_no in range(1, APP_CONFIG['default_table_count'] + 1)])
+                
+                if not conn.execute("SELECT COUNT(*) FROM urunler")[0][0]:
+                    conn.executemany("""
+                        INSERT INTO urunler (ad, kategori_id, fiyat, aciklama) 
+                        SELECT %s, id, %s, %s FROM kategoriler WHERE ad = %s
+                    """, [(ad, fiyat, aciklama, kategori)
+                          for ad, kategori, fiyat, aciklama in DEFAULT_PRODUCTS])
+                
+                # Katalog sürüm sayacı
+                conn.execute(f"""
+                    {insert_ignore} INTO katalog_surumu (id, surum) 
+                    VALUES (1, 0)
+                """)
+                
+                logger.info("Varsayılan veriler başarıyla eklendi")
+                
         except Error as e:
             logger.error(f"Varsayılan veri ekleme hatası: {e}")
     
     def execute_query(self, query, params=None):
         """SQL sorgusu çalıştır"""
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            if query.strip().upper().startswith('SELECT'):
-                return self.cursor.fetchall()
-            else:
-                self.connection.commit()
-                return True
+            with self.connection() as conn:
+                return conn.execute(query, params)
+        except Error as e:
+            logger.error(f"Sorgu hatası: {e}")
+            return None
+    
+    def execute_insert(self, query, params=None):
+        """INSERT sorgusu çalıştır ve eklenen kaydın ID'sini döndür"""
+        try:
+            with self.connection() as conn:
+                conn.execute(query, params)
+                return conn.lastrowid
         except Error as e:
             logger.error(f"Sorgu hatası: {e}")
             return None
@@ -205,65 +671,827 @@ class DatabaseManager:
         query = "SELECT id, ad FROM kategoriler WHERE aktif = TRUE ORDER BY ad"
         return self.execute_query(query)
     
+    def get_all_categories(self):
+        """Pasifler dahil tüm kategorileri (id, ad, açıklama, istasyon) getir"""
+        query = "SELECT id, ad, aciklama, istasyon FROM kategoriler ORDER BY ad"
+        return self.execute_query(query)
+    
+    def count_category_products(self, category_id):
+        """Kategorideki ürün sayısı (sorgu başarısızsa None)"""
+        result = self.execute_query("SELECT COUNT(*) FROM urunler WHERE kategori_id = %s",
+                                    (category_id,))
+        return result[0][0] if result else None
+    
+    def get_catalog(self):
+        """Aktif ürünleri (kategori ID'siyle) ve kategorileri tek bağlantıda getir"""
+        try:
+            with self.connection() as conn:
+                products = conn.execute("""
+                    SELECT u.id, u.ad, k.ad as kategori, u.fiyat, u.aciklama, u.kategori_id 
+                    FROM urunler u 
+                    JOIN kategoriler k ON u.kategori_id = k.id 
+                    WHERE u.aktif = TRUE
+                    ORDER BY k.ad, u.ad
+                """)
+                categories = conn.execute(
+                    "SELECT id, ad FROM kategoriler WHERE aktif = TRUE ORDER BY ad")
+            return products, categories
+        except Error as e:
+            logger.error(f"Katalog okuma hatası: {e}")
+            return None
+    
+    def get_all_products(self):
+        """Pasifler dahil tüm ürünler: (id, ad, kategori ID, kategori, fiyat, açıklama, aktif)"""
+        query = """
+            SELECT u.id, u.ad, u.kategori_id, k.ad, u.fiyat, u.aciklama, u.aktif 
+            FROM urunler u 
+            JOIN kategoriler k ON u.kategori_id = k.id 
+            ORDER BY u.id
+        """
+        return self.execute_query(query)
+    
+    def import_catalog(self, new_categories, new_products, updates, deactivated):
+        """Toplu menü değişikliğini tek işlemde uygula ve katalog sürümünü bir kez artır"""
+        # new_categories: (ad, açıklama, istasyon); new_products: (ad, kategori adı, fiyat,
+        # açıklama, aktif); updates: (id, ad, kategori adı, fiyat, açıklama, aktif);
+        # deactivated: pasif yapılacak ürün ID'leri
+        try:
+            with self.transaction() as conn:
+                if new_categories:
+                    conn.executemany("""
+                        INSERT INTO kategoriler (ad, aciklama, istasyon) 
+                        VALUES (%s, %s, %s)
+                    """, new_categories)
+                category_ids = {name: category_id for category_id, name
+                                in conn.execute("SELECT id, ad FROM kategoriler")}
+                
+                if new_products:
+                    conn.executemany("""
+                        INSERT INTO urunler (ad, kategori_id, fiyat, aciklama, aktif)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, [(ad, category_ids[kategori], fiyat, aciklama, aktif)
+                          for ad, kategori, fiyat, aciklama, aktif in new_products])
+                if updates:
+                    conn.executemany("""
+                        UPDATE urunler 
+                        SET ad = %s, kategori_id = %s, fiyat = %s, aciklama = %s, aktif = %s
+                        WHERE id = %s
+                    """, [(ad, category_ids[kategori], fiyat, aciklama, aktif, product_id)
+                          for product_id, ad, kategori, fiyat, aciklama, aktif in updates])
+                if deactivated:
+                    conn.executemany("UPDATE urunler SET aktif = FALSE WHERE id = %s",
+                                     [(product_id,) for product_id in deactivated])
+                self._bump_catalog_version(conn)
+            return True
+        except Error as e:
+            logger.error(f"Toplu menü aktarım hatası: {e}")
+            return False
+    
+    def get_catalog_version(self):
+        """Katalog sürümünü getir"""
+        result = self.execute_query("SELECT surum FROM katalog_surumu WHERE id = 1")
+        return result[0][0] if result else None
+    
+    def _bump_catalog_version(self, conn):
+        conn.execute("UPDATE katalog_surumu SET surum = surum + 1 WHERE id = 1")
+    
+    def save_product(self, product_id, ad, kategori_id, fiyat, aciklama, aktif):
+        """Ürünü ekle veya güncelle ve katalog sürümünü artır"""
+        try:
+            with self.transaction() as conn:
+                if product_id:
+                    conn.execute("""
+                        UPDATE urunler 
+                        SET ad = %s, kategori_id = %s, fiyat = %s, aciklama = %s, aktif = %s
+                        WHERE id = %s
+                    """, (ad, kategori_id, fiyat, aciklama, aktif, product_id))
+                else:
+                    conn.execute("""
+                        INSERT INTO urunler (ad, kategori_id, fiyat, aciklama, aktif)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (ad, kategori_id, fiyat, aciklama, aktif))
+                self._bump_catalog_version(conn)
+            return True
+        except Error as e:
+            logger.error(f"Ürün kaydetme hatası: {e}")
+            return False
+    
+    def delete_product(self, product_id):
+        """Ürünü pasif yap (soft delete) ve katalog sürümünü artır"""
+        try:
+            with self.transaction() as conn:
+                conn.execute("UPDATE urunler SET aktif = FALSE WHERE id = %s", (product_id,))
+                self._bump_catalog_version(conn)
+            return True
+        except Error as e:
+            logger.error(f"Ürün silme hatası: {e}")
+            return False
+    
+    def save_category(self, category_id, ad, aciklama, istasyon='mutfak'):
+        """Kategoriyi ekle veya güncelle ve katalog sürümünü artır"""
+        try:
+            with self.transaction() as conn:
+                if category_id:
+                    conn.execute("""
+                        UPDATE kategoriler SET ad = %s, aciklama = %s, istasyon = %s 
+                        WHERE id = %s
+                    """, (ad, aciklama, istasyon, category_id))
+                else:
+                    conn.execute("INSERT INTO kategoriler (ad, aciklama, istasyon) VALUES (%s, %s, %s)",
+                                 (ad, aciklama, istasyon))
+                self._bump_catalog_version(conn)
+            return True
+        except Error as e:
+            logger.error(f"Kategori kaydetme hatası: {e}")
+            return False
+    
+    def delete_category(self, category_id):
+        """Kategoriyi sil ve katalog sürümünü artır"""
+        try:
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM kategoriler WHERE id = %s", (category_id,))
+                self._bump_catalog_version(conn)
+            return True
+        except Error as e:
+            logger.error(f"Kategori silme hatası: {e}")
+            return False
+    
     def get_tables(self):
-        """Tüm masaları getir"""
-        query = "SELECT id, masa_no, durum FROM masalar ORDER BY masa_no"
+        """Tüm masaları (id, masa_no, durum, kat, bölüm) olarak getir"""
+        query = "SELECT id, masa_no, durum, kat, bolum FROM masalar ORDER BY kat, bolum, masa_no"
         return self.execute_query(query)
     
-    def create_order(self, masa_id):
-        """Yeni sipariş oluştur"""
-        query = "INSERT INTO siparisler (masa_id) VALUES (%s)"
+    def get_table(self, masa_no):
+        """Tek masayı masa numarasıyla getir"""
+        query = "SELECT id, masa_no, durum, kat, bolum FROM masalar WHERE masa_no = %s"
+        result = self.execute_query(query, (masa_no,))
+        return result[0] if result else None
+    
+    def get_table_by_id(self, masa_id):
+        """Tek masayı ID ile getir"""
+        query = "SELECT id, masa_no, durum, kat, bolum FROM masalar WHERE id = %s"
         result = self.execute_query(query, (masa_id,))
-        if result:
-            return self.cursor.lastrowid
-        return None
-    
-    def add_order_item(self, siparis_id, urun_id, adet, notlar=None):
-        """Siparişe ürün ekle"""
-        # Ürün fiyatını al
-        price_query = "SELECT fiyat FROM urunler WHERE id = %s"
-        price_result = self.execute_query(price_query, (urun_id,))
-        
-        if not price_result:
-            return False
-        
-        birim_fiyat = price_result[0][0]
-        toplam_fiyat = birim_fiyat * adet
-        
+        return result[0] if result else None
+    
+    def get_active_order(self, masa_id):
+        """Masanın aktif siparişini (id, toplam, durum) getir"""
         query = """
-            INSERT INTO siparis_detaylari 
-            (siparis_id, urun_id, adet, birim_fiyat, toplam_fiyat, notlar) 
-            VALUES (%s, %s, %s, %s, %s, %s)
+            SELECT id, toplam_tutar, durum 
+            FROM siparisler 
+            WHERE masa_id = %s AND durum = 'aktif'
         """
-        return self.execute_query(query, (siparis_id, urun_id, adet, birim_fiyat, toplam_fiyat, notlar))
+        result = self.execute_query(query, (masa_id,))
+        return result[0] if result else None
+    
+    def create_order(self, masa_id, client_id=None, created_at=None, join_active=True):
+        """Yeni sipariş oluştur ve masayı dolu olarak işaretle"""
+        # join_active: masada açık sipariş varsa yenisi açılmaz, onun ID'si döner. Çevrimdışı
+        # günlükten gelen sipariş kendi satırlarıyla yazılır, ayrı kalır
+        try:
+            with self.transaction() as conn:
+                # Masa satırı kilitlenir; aynı boş masayı aynı anda açan kasalar sıraya girer
+                conn.execute(f"SELECT id FROM masalar WHERE id = %s{self.backend.for_update}",
+                             (masa_id,))
+                if client_id:
+                    # Aynı istemci kimliğiyle daha önce yazıldıysa yeniden oluşturma
+                    existing = conn.execute("SELECT id FROM siparisler WHERE istemci_id = %s",
+                                            (client_id,))
+                    if existing:
+                        return existing[0][0]
+                if join_active:
+                    active = conn.execute("""
+                        SELECT id FROM siparisler 
+                        WHERE masa_id = %s AND durum = 'aktif' 
+                        ORDER BY id LIMIT 1
+                    """, (masa_id,))
+                    if active:
+                        return active[0][0]
+                conn.execute("""
+                    INSERT INTO siparisler (masa_id, istemci_id, created_at) 
+                    VALUES (%s, %s, COALESCE(%s, NOW()))
+                """, (masa_id, client_id, created_at))
+                order_id = conn.lastrowid
+                conn.execute("UPDATE masalar SET durum = 'dolu' WHERE id = %s", (masa_id,))
+                self._log_change(conn, CHANGE_TABLE_STATUS, masa_id=masa_id,
+                                 siparis_id=order_id, deger='dolu')
+            return order_id
+        except Error as e:
+            logger.error(f"Sipariş oluşturma hatası: {e}")
+            return None
+    
+    def add_order_line(self, siparis_id, urun_id, adet, notlar=None, client_id=None,
+                       birim_fiyat=None, merge=None):
+        """Siparişe ürün ekle, toplamı aynı işlemde artır ve (satır, yeni toplam) döndür"""
+        # birim_fiyat verilmezse ürünün güncel fiyatı kullanılır; çevrimdışı girilen
+        # satırlarda müşteriye gösterilmiş fiyat korunur
+        if merge is None:
+            merge = APP_CONFIG['merge_order_lines']
+        # Yalnızca aynı birim fiyatlı satıra birleştirilir, toplam_fiyat eklenen tutar kadar artar;
+        # istemci_id son eklemeninkiyle değişir ki tekrar oynatılan ekleme yeniden yazılmasın
+        merge_key = notes_key(notlar) if merge else None
+        upsert = self.backend.upsert_sum('siparis_detaylari',
+                                         ('siparis_id', 'urun_id', 'notlar_ozet'),
+                                         ('adet', 'toplam_fiyat'),
+                                         replace=('istemci_id',)) if merge else ""
+        try:
+            with self.transaction() as conn:
+                existing = None
+                if client_id:
+                    existing = conn.execute("SELECT id FROM siparis_detaylari WHERE istemci_id = %s",
+                                            (client_id,))
+                if existing:
+                    where, params = "sd.id = %s", (existing[0][0],)
+                else:
+                    if merge:
+                        # Fiyat değiştiyse eski satır birleştirme dışı kalır, ekleme yeni satır açar
+                        conn.execute("""
+                            UPDATE siparis_detaylari SET notlar_ozet = NULL
+                            WHERE siparis_id = %s AND urun_id = %s AND notlar_ozet = %s
+                              AND birim_fiyat <> (SELECT COALESCE(%s, fiyat) FROM urunler WHERE id = %s)
+                        """, (siparis_id, urun_id, merge_key, birim_fiyat, urun_id))
+                    # Kapanmış siparişe (başka kasada ödenmiş ya da günlükten geç gelen) satır eklenmez
+                    conn.execute(f"""
+                        INSERT INTO siparis_detaylari 
+                        (siparis_id, urun_id, adet, birim_fiyat, toplam_fiyat, notlar, istemci_id,
+                         notlar_ozet) 
+                        SELECT s.id, u.id, %s, COALESCE(%s, u.fiyat), COALESCE(%s, u.fiyat) * %s,
+                               %s, %s, %s
+                        FROM urunler u 
+                        JOIN siparisler s ON s.id = %s AND s.durum = 'aktif'
+                        WHERE u.id = %s
+                        {upsert}
+                    """, (adet, birim_fiyat, birim_fiyat, adet, notlar, client_id, merge_key,
+                          siparis_id, urun_id))
+                    if not conn.rowcount:
+                        return None
+                    # Birleşen satırda lastrowid güvenilir değil; satır anahtarıyla okunur
+                    if merge:
+                        where = "sd.siparis_id = %s AND sd.urun_id = %s AND sd.notlar_ozet = %s"
+                        params = (siparis_id, urun_id, merge_key)
+                    else:
+                        where, params = "sd.id = %s", (conn.lastrowid,)
+                    
+                    conn.execute("""
+                        UPDATE siparisler 
+                        SET toplam_tutar = toplam_tutar + (
+                            SELECT COALESCE(%s, fiyat) * %s FROM urunler WHERE id = %s
+                        )
+                        WHERE id = %s AND durum = 'aktif'
+                    """, (birim_fiyat, adet, urun_id, siparis_id))
+                
+                result = conn.execute(f"""
+                    SELECT sd.id, u.ad, sd.adet, sd.birim_fiyat, sd.toplam_fiyat, sd.notlar,
+                           s.toplam_tutar
+                    FROM siparis_detaylari sd
+                    JOIN urunler u ON sd.urun_id = u.id
+                    JOIN siparisler s ON sd.siparis_id = s.id
+                    WHERE {where}
+                """, params)
+                
+                if not existing:
+                    item_id, quantity = result[0][0], result[0][2]
+                    # Adet eklenenden fazlaysa mevcut satıra eklenmiştir
+                    if quantity > adet:
+                        self._log_change(conn, CHANGE_LINE_UPDATED, siparis_id=siparis_id,
+                                         kayit_id=item_id, deger=str(adet))
+                    else:
+                        self._log_change(conn, CHANGE_LINE_ADDED, siparis_id=siparis_id,
+                                         kayit_id=item_id)
+                    self._log_change(conn, CHANGE_ORDER_TOTAL, siparis_id=siparis_id,
+                                     deger=str(result[0][-1]))
+            
+            *line, total = result[0]
+            return tuple(line), total
+        except Error as e:
+            logger.error(f"Ürün ekleme hatası: {e}")
+            return None
+    
+    def change_order_item_quantity(self, siparis_id, item_id, delta):
+        """Satırın adedini delta kadar değiştir, toplamı aynı işlemde güncelle ve (satır, toplam) döndür"""
+        try:
+            with self.transaction() as conn:
+                # Adet 1'in altına inemez (satırı kaldırmak için remove_order_items);
+                # ödenmiş satırın ve kapanmış siparişin adedi değişmez
+                conn.execute("""
+                    UPDATE siparis_detaylari 
+                    SET adet = adet + %s, toplam_fiyat = toplam_fiyat + birim_fiyat * %s
+                    WHERE id = %s AND siparis_id = %s AND adet + %s >= 1 AND odeme_id IS NULL
+                      AND EXISTS (SELECT 1 FROM siparisler WHERE id = %s AND durum = 'aktif')
+                """, (delta, delta, item_id, siparis_id, delta, siparis_id))
+                if not conn.rowcount:
+                    return None
+                conn.execute("""
+                    UPDATE siparisler 
+                    SET toplam_tutar = toplam_tutar + (
+                        SELECT birim_fiyat * %s FROM siparis_detaylari WHERE id = %s
+                    )
+                    WHERE id = %s AND durum = 'aktif'
+                """, (delta, item_id, siparis_id))
+                
+                result = conn.execute("""
+                    SELECT sd.id, u.ad, sd.adet, sd.birim_fiyat, sd.toplam_fiyat, sd.notlar,
+                           s.toplam_tutar, s.odenen_tutar
+                    FROM siparis_detaylari sd
+                    JOIN urunler u ON sd.urun_id = u.id
+                    JOIN siparisler s ON sd.siparis_id = s.id
+                    WHERE sd.id = %s
+                """, (item_id,))
+                *line, total, paid = result[0]
+                self._check_balance(total, paid)
+                self._log_change(conn, CHANGE_LINE_UPDATED, siparis_id=siparis_id,
+                                 kayit_id=item_id, deger=str(delta))
+                self._log_change(conn, CHANGE_ORDER_TOTAL, siparis_id=siparis_id,
+                                 deger=str(total))
+            
+            return tuple(line), total
+        except Error as e:
+            logger.error(f"Adet güncelleme hatası: {e}")
+            return None
+    
+    def get_order_total(self, siparis_id):
+        """Siparişin güncel toplamı (bulunamazsa None)"""
+        result = self.execute_query("SELECT toplam_tutar FROM siparisler WHERE id = %s",
+                                    (siparis_id,))
+        return result[0][0] if result else None
+    
+    def get_order_balance(self, siparis_id):
+        """Siparişin (toplam, ödenen) tutarı (bulunamazsa None)"""
+        result = self.execute_query("""
+            SELECT toplam_tutar, odenen_tutar FROM siparisler WHERE id = %s
+        """, (siparis_id,))
+        return tuple(result[0]) if result else None
+    
+    def get_paid_item_ids(self, siparis_id):
+        """Ürüne göre ödenmiş satırların ID'leri"""
+        result = self.execute_query("""
+            SELECT id FROM siparis_detaylari WHERE siparis_id = %s AND odeme_id IS NOT NULL
+        """, (siparis_id,))
+        return {row[0] for row in result or []}
+    
+    @staticmethod
+    def _check_balance(total, paid):
+        """Sipariş toplamı alınmış ödemelerin altına inemez (işlem geri alınır)"""
+        if Decimal(total) < Decimal(paid):
+            raise DatabaseError(f"Sipariş toplamı ({total}) ödenen tutarın ({paid}) altına inemez")
     
     def get_order_details(self, siparis_id):
-        """Sipariş detaylarını getir"""
+        """Sipariş detaylarını eklenme sırasıyla getir"""
         query = """
             SELECT sd.id, u.ad, sd.adet, sd.birim_fiyat, sd.toplam_fiyat, sd.notlar
             FROM siparis_detaylari sd
             JOIN urunler u ON sd.urun_id = u.id
             WHERE sd.siparis_id = %s
+            ORDER BY sd.id
         """
         return self.execute_query(query, (siparis_id,))
     
     def update_order_total(self, siparis_id):
         """Sipariş toplamını güncelle"""
-        query = """
+        try:
+            with self.transaction() as conn:
+                conn.execute("""
+                    UPDATE siparisler 
+                    SET toplam_tutar = (
+                        SELECT COALESCE(SUM(toplam_fiyat), 0) 
+                        FROM siparis_detaylari 
+                        WHERE siparis_id = %s
+                    )
+                    WHERE id = %s
+                """, (siparis_id, siparis_id))
+                self._log_order_total(conn, siparis_id)
+            return True
+        except Error as e:
+            logger.error(f"Sipariş toplamı güncelleme hatası: {e}")
+            return False
+    
+    def remove_order_items(self, siparis_id, item_ids):
+        """Siparişten verilen satırları sil, toplamı aynı işlemde düşür ve yeni toplamı döndür"""
+        if not item_ids:
+            return self.get_order_total(siparis_id)
+        placeholders = ", ".join(["%s"] * len(item_ids))
+        params = (siparis_id, *item_ids)
+        try:
+            with self.transaction() as conn:
+                # Ödenmiş satır seçildiyse hiçbir satır çıkarılmaz
+                paid = conn.execute(f"""
+                    SELECT COUNT(*) FROM siparis_detaylari 
+                    WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NOT NULL
+                """, params)
+                if paid[0][0]:
+                    raise DatabaseError(f"Sipariş #{siparis_id} ödenmiş satır içeriyor, çıkarılamaz")
+                conn.execute(f"""
+                    INSERT INTO degisiklik_log (olay, siparis_id, kayit_id)
+                    SELECT %s, siparis_id, id FROM siparis_detaylari 
+                    WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NULL
+                """, (CHANGE_LINE_REMOVED, *params))
+                # Başka sipariş ya da zaten silinmiş satırlar toplamdan düşülmez
+                conn.execute(f"""
+                    UPDATE siparisler 
+                    SET toplam_tutar = toplam_tutar - (
+                        SELECT COALESCE(SUM(toplam_fiyat), 0) 
+                        FROM siparis_detaylari 
+                        WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NULL
+                    )
+                    WHERE id = %s
+                """, (*params, siparis_id))
+                conn.execute(f"""
+                    DELETE FROM siparis_detaylari 
+                    WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NULL
+                """, params)
+                result = conn.execute("""
+                    SELECT toplam_tutar, odenen_tutar FROM siparisler WHERE id = %s
+                """, (siparis_id,))
+                if not result:
+                    return None
+                self._check_balance(*result[0])
+                self._log_change(conn, CHANGE_ORDER_TOTAL, siparis_id=siparis_id,
+                                 deger=str(result[0][0]))
+            return result[0][0]
+        except Error as e:
+            logger.error(f"Sipariş detayı silme hatası: {e}")
+            return None
+    
+    def clear_order_items(self, siparis_id):
+        """Siparişin tüm satırlarını sil ve toplamı sıfırla"""
+        try:
+            with self.transaction() as conn:
+                paid = conn.execute("SELECT odenen_tutar FROM siparisler WHERE id = %s",
+                                    (siparis_id,))
+                if paid and paid[0][0]:
+                    raise DatabaseError(f"Sipariş #{siparis_id} kısmen ödenmiş, temizlenemez")
+                conn.execute("""
+                    INSERT INTO degisiklik_log (olay, siparis_id, kayit_id)
+                    SELECT %s, siparis_id, id FROM siparis_detaylari WHERE siparis_id = %s
+                """, (CHANGE_LINE_REMOVED, siparis_id))
+                conn.execute("DELETE FROM siparis_detaylari WHERE siparis_id = %s", (siparis_id,))
+                conn.execute("UPDATE siparisler SET toplam_tutar = 0 WHERE id = %s", (siparis_id,))
+                self._log_change(conn, CHANGE_ORDER_TOTAL, siparis_id=siparis_id, deger='0.00')
+            return True
+        except Error as e:
+            logger.error(f"Sipariş temizleme hatası: {e}")
+            return False
+    
+    def add_payment(self, siparis_id, odeme_tipi, tutar=None, client_id=None, item_ids=None):
+        """Siparişe ödeme ekle, kalan kapanınca siparişi kapat ve (alınan, ödenen, kalan) döndür"""
+        try:
+            return self.run_transaction(self._add_payment, siparis_id, odeme_tipi, tutar,
+                                        client_id, item_ids)
+        except Error as e:
+            logger.error(f"Ödeme hatası: {e}")
+            return None
+    
+    def _add_payment(self, conn, siparis_id, odeme_tipi, tutar, client_id, item_ids):
+        """add_payment'ın tek işlemde çalışan gövdesi"""
+        # Son ödemede masa boşaltılır ve günlük özetler güncellenir. item_ids verilirse tutar seçili ve henüz ödenmemiş satırlardan hesaplanır,
+        # verilmezse tutar (None ise kalanın tamamı) alınır; kalandan fazlası alınmaz
+        # Sipariş satırı işlem sonuna kadar kilitlenir; aynı siparişe gelen ödemeler sıraya girer
+        order = conn.execute(f"""
+            SELECT toplam_tutar, odenen_tutar, durum FROM siparisler 
+            WHERE id = %s{self.backend.for_update}
+        """, (siparis_id,))
+        if client_id:
+            # Kilitten sonra bakılır; aynı anahtarla bekleyen ikinci istek ilk ödemeyi görür
+            existing = conn.execute("""
+                SELECT o.tutar, s.odenen_tutar, s.toplam_tutar - s.odenen_tutar
+                FROM odemeler o
+                JOIN siparisler s ON o.siparis_id = s.id
+                WHERE o.istemci_id = %s
+            """, (client_id,))
+            if existing:
+                # Bu ödeme daha önce yazılmış (çift tıklama ya da günlük tekrar oynatılıyor)
+                return tuple(Decimal(value) for value in existing[0])
+    
+        if not order or order[0][2] != 'aktif':
+            raise DatabaseError(f"Sipariş #{siparis_id} aktif değil")
+        total, paid = Decimal(order[0][0]), Decimal(order[0][1])
+        remaining = total - paid
+    
+        if item_ids:
+            placeholders = ", ".join(["%s"] * len(item_ids))
+            lines = conn.execute(f"""
+                SELECT COALESCE(SUM(toplam_fiyat), 0) FROM siparis_detaylari 
+                WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NULL
+            """, (siparis_id, *item_ids))
+            amount = Decimal(lines[0][0])
+        else:
+            amount = remaining if tutar is None else Decimal(tutar)
+        amount = min(amount, remaining)
+        if amount <= 0:
+            raise DatabaseError(f"Sipariş #{siparis_id} için alınacak tutar yok")
+    
+        conn.execute("""
+            INSERT INTO odemeler (siparis_id, odeme_tipi, tutar, istemci_id)
+            VALUES (%s, %s, %s, %s)
+        """, (siparis_id, odeme_tipi, amount, client_id))
+        payment_id = conn.lastrowid
+        if item_ids:
+            # Ödenen satır artık birleştirme hedefi de değildir
+            conn.execute(f"""
+                UPDATE siparis_detaylari SET odeme_id = %s, notlar_ozet = NULL
+                WHERE siparis_id = %s AND id IN ({placeholders}) AND odeme_id IS NULL
+            """, (payment_id, siparis_id, *item_ids))
+    
+        # Ödenen tutar yeniden toplanmaz, artırılır
+        paid += amount
+        remaining -= amount
+        if remaining > 0:
+            conn.execute("""
+                UPDATE siparisler SET odenen_tutar = odenen_tutar + %s WHERE id = %s
+            """, (amount, siparis_id))
+            return amount, paid, remaining
+    
+        conn.execute("""
             UPDATE siparisler 
-            SET toplam_tutar = (
-                SELECT COALESCE(SUM(toplam_fiyat), 0) 
-                FROM siparis_detaylari 
-                WHERE siparis_id = %s
-            )
+            SET odenen_tutar = odenen_tutar + %s, durum = 'kapatildi', 
+                odeme_durumu = 'odendi'
+            WHERE id = %s AND durum = 'aktif'
+        """, (amount, siparis_id))
+        if not conn.rowcount:
+            raise DatabaseError(f"Sipariş #{siparis_id} aktif değil")
+    
+        conn.execute("""
+            UPDATE masalar 
+            SET durum = 'bos' 
+            WHERE id = (SELECT masa_id FROM siparisler WHERE id = %s)
+        """, (siparis_id,))
+    
+        conn.execute("""
+            INSERT INTO degisiklik_log (olay, masa_id, siparis_id, deger)
+            SELECT %s, masa_id, id, 'bos' FROM siparisler WHERE id = %s
+            UNION ALL
+            SELECT %s, masa_id, id, NULL FROM siparisler WHERE id = %s
+        """, (CHANGE_TABLE_STATUS, siparis_id, CHANGE_ORDER_CLOSED, siparis_id))
+    
+        self._add_order_to_rollups(conn, siparis_id, payment_id)
+        return amount, paid, remaining
+    
+    def _add_order_to_rollups(self, conn, siparis_id, payment_id):
+        """Kapatılan siparişi günlük özet tablolarına ekle"""
+        # Tutarlar ödeme tipine göre bölünür; sipariş, kapatan ödemenin tipinde sayılır
+        conn.execute(f"""
+            INSERT INTO gunluk_ozet (tarih, odeme_tipi, siparis_sayisi, toplam_tutar)
+            SELECT DATE(s.created_at), o.odeme_tipi, 
+                   SUM(CASE WHEN o.id = %s THEN 1 ELSE 0 END), SUM(o.tutar)
+            FROM odemeler o
+            JOIN siparisler s ON o.siparis_id = s.id
+            WHERE o.siparis_id = %s
+            GROUP BY DATE(s.created_at), o.odeme_tipi
+            {self.backend.upsert_sum('gunluk_ozet', ('tarih', 'odeme_tipi'),
+                                     ('siparis_sayisi', 'toplam_tutar'))}
+        """, (payment_id, siparis_id))
+        
+        conn.execute(f"""
+            INSERT INTO gunluk_urun_ozet 
+            (tarih, urun_id, adet, toplam_tutar, satir_sayisi, birim_fiyat_toplami)
+            SELECT DATE(s.created_at), sd.urun_id, SUM(sd.adet), SUM(sd.toplam_fiyat),
+                   COUNT(*), SUM(sd.birim_fiyat)
+            FROM siparis_detaylari sd
+            JOIN siparisler s ON sd.siparis_id = s.id
+            WHERE sd.siparis_id = %s
+            GROUP BY DATE(s.created_at), sd.urun_id
+            {self.backend.upsert_sum('gunluk_urun_ozet', ('tarih', 'urun_id'),
+                                     ('adet', 'toplam_tutar', 'satir_sayisi', 'birim_fiyat_toplami'))}
+        """, (siparis_id,))
+    
+    def rebuild_rollups(self):
+        """Günlük özet tablolarını geçmiş siparişlerden yeniden oluştur"""
+        try:
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM gunluk_ozet")
+                conn.execute("DELETE FROM gunluk_urun_ozet")
+                
+                # Eski kayıtlarda ödeme tutarı verilen parayı (para üstü dahil) tutar;
+                # sipariş toplamını aşan kısım sayılmaz
+                conn.execute("""
+                    INSERT INTO gunluk_ozet (tarih, odeme_tipi, siparis_sayisi, toplam_tutar)
+                    SELECT DATE(s.created_at), o.odeme_tipi, 
+                           SUM(CASE WHEN o.id = son.odeme_id THEN 1 ELSE 0 END),
+                           SUM(LEAST(o.tutar, s.toplam_tutar))
+                    FROM siparisler s
+                    JOIN odemeler o ON o.siparis_id = s.id
+                    JOIN (
+                        SELECT siparis_id, MAX(id) as odeme_id FROM odemeler GROUP BY siparis_id
+                    ) son ON son.siparis_id = s.id
+                    WHERE s.durum = 'kapatildi'
+                    GROUP BY DATE(s.created_at), o.odeme_tipi
+                """)
+                days = conn.rowcount
+                
+                conn.execute("""
+                    INSERT INTO gunluk_urun_ozet 
+                    (tarih, urun_id, adet, toplam_tutar, satir_sayisi, birim_fiyat_toplami)
+                    SELECT DATE(s.created_at), sd.urun_id, SUM(sd.adet), SUM(sd.toplam_fiyat),
+                           COUNT(*), SUM(sd.birim_fiyat)
+                    FROM siparisler s
+                    JOIN siparis_detaylari sd ON sd.siparis_id = s.id
+                    WHERE s.durum = 'kapatildi'
+                    GROUP BY DATE(s.created_at), sd.urun_id
+                """)
+                products = conn.rowcount
+            
+            logger.info(f"Günlük özetler yeniden oluşturuldu ({days} gün/ödeme tipi, {products} gün/ürün)")
+            return True
+        except Error as e:
+            logger.error(f"Özet yeniden oluşturma hatası: {e}")
+            return False
+    
+    def resolve_order(self, order_ref):
+        """Sunucu ID'si veya istemci kimliğiyle verilen siparişin ID'sini bul"""
+        if isinstance(order_ref, int):
+            return order_ref
+        result = self.execute_query("SELECT id FROM siparisler WHERE istemci_id = %s", (order_ref,))
+        return result[0][0] if result else None
+    
+    def replay_operation(self, kind, client_id, payload):
+        """Çevrimdışı günlükteki tek işlemi sunucuya yaz; aynı işlem ikinci kez yazılmaz"""
+        if kind == 'siparis':
+            return self.create_order(payload['masa_id'], client_id, payload['zaman'],
+                                     join_active=False) is not None
+        
+        order_id = self.resolve_order(payload['siparis'])
+        if order_id is None:
+            return False
+        if kind == 'satir':
+            return self.add_order_line(order_id, payload['urun_id'], payload['adet'],
+                                       payload['notlar'], client_id,
+                                       Decimal(payload['birim_fiyat'])) is not None
+        if kind == 'odeme':
+            return self.add_payment(order_id, payload['odeme_tipi'],
+                                    Decimal(payload['tutar']), client_id) is not None
+        raise ValueError(f"Bilinmeyen günlük işlemi: {kind}")
+    
+    def _log_change(self, conn, olay, masa_id=None, siparis_id=None, kayit_id=None, deger=None):
+        """Değişikliği, yapıldığı işlem içinde degisiklik_log'a yaz"""
+        conn.execute("""
+            INSERT INTO degisiklik_log (olay, masa_id, siparis_id, kayit_id, deger)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (olay, masa_id, siparis_id, kayit_id, deger))
+    
+    def _log_order_total(self, conn, siparis_id):
+        conn.execute("""
+            INSERT INTO degisiklik_log (olay, siparis_id, deger)
+            SELECT %s, id, toplam_tutar FROM siparisler WHERE id = %s
+        """, (CHANGE_ORDER_TOTAL, siparis_id))
+    
+    def get_last_change_id(self):
+        """Değişiklik günlüğündeki son ID'yi getir (sunucuya ulaşılamazsa None)"""
+        result = self.execute_query("SELECT COALESCE(MAX(id), 0) FROM degisiklik_log")
+        return result[0][0] if result else None
+    
+    def get_changes_since(self, last_id, limit=500):
+        """Verilen ID'den sonraki değişiklikleri getir (birincil anahtar aralığı, ucuz sorgu)"""
+        query = """
+            SELECT id, olay, masa_id, siparis_id, kayit_id, deger
+            FROM degisiklik_log
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """
+        return self.execute_query(query, (last_id, limit))
+    
+    def prune_changes(self, keep_hours=24):
+        """Eski değişiklik kayıtlarını sil"""
+        query = f"DELETE FROM degisiklik_log WHERE created_at < {self.backend.seconds_from_now('-%s')}"
+        return self.execute_query(query, (keep_hours * 3600,))
+    
+    def get_order_lines(self, item_ids):
+        """Verilen sipariş detaylarını get_order_details biçiminde getir"""
+        if not item_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(item_ids))
+        query = f"""
+            SELECT sd.id, u.ad, sd.adet, sd.birim_fiyat, sd.toplam_fiyat, sd.notlar
+            FROM siparis_detaylari sd
+            JOIN urunler u ON sd.urun_id = u.id
+            WHERE sd.id IN ({placeholders})
+            ORDER BY sd.id
+        """
+        return self.execute_query(query, tuple(item_ids))
+    
+    def stream_query(self, query, params=None, batch_size=1000):
+        """Sonucu istemcide tamponlamadan fetchmany ile parça parça döndüren üreteç"""
+        with self.connection() as conn:
+            cursor = None
+            finished = False
+            # Yalnızca sunucuda geçen süre ölçülür, satırları işleyenin süresi değil
+            elapsed = 0.0
+            total_rows = 0
+            try:
+                started = time.perf_counter()
+                cursor = conn.open_stream(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    elapsed += time.perf_counter() - started
+                    if not rows:
+                        break
+                    total_rows += len(rows)
+                    yield rows
+                    started = time.perf_counter()
+                finished = True
+            finally:
+                query_stats.record(query, elapsed, total_rows, error=not finished)
+                if finished:
+                    cursor.close()
+                else:
+                    # Okunmamış satırı kalan bağlantı havuza dönmez, kapatılır
+                    conn.broken = True
+    
+    def get_kitchen_lines(self, item_ids):
+        """Sipariş detaylarını kategorinin istasyonuyla birlikte getir"""
+        if not item_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(item_ids))
+        query = f"""
+            SELECT sd.id, sd.siparis_id, m.masa_no, k.istasyon, u.ad, sd.adet, sd.notlar, 
+                   sd.created_at
+            FROM siparis_detaylari sd
+            JOIN siparisler s ON sd.siparis_id = s.id
+            JOIN masalar m ON s.masa_id = m.id
+            JOIN urunler u ON sd.urun_id = u.id
+            JOIN kategoriler k ON u.kategori_id = k.id
+            WHERE sd.id IN ({placeholders})
+            ORDER BY sd.id
+        """
+        return self.execute_query(query, tuple(item_ids))
+    
+    def get_daily_report(self, start, end):
+        """Kapatılmış siparişlerin günlük listesi"""
+        return self.execute_query(DAILY_REPORT_QUERY, (start, end))
+    
+    def get_monthly_report(self, start, end):
+        """Gün bazında sipariş sayısı ve satış toplamı"""
+        return self.execute_query(MONTHLY_REPORT_QUERY, (start, end))
+    
+    def get_product_report(self, start, end):
+        """Ürün bazında satış toplamları"""
+        return self.execute_query(PRODUCT_REPORT_QUERY, (start, end))
+    
+    def get_table_report(self, start, end):
+        """Masa bazında satış toplamları"""
+        return self.execute_query(TABLE_REPORT_QUERY, (start, end))
+    
+    def explain(self, query, params=None):
+        """Sorgunun çalışma planını (MySQL'de EXPLAIN, SQLite'ta EXPLAIN QUERY PLAN) sözlük listesi olarak döndür"""
+        with self.connection() as conn:
+            return conn.explain(query, params)
+    
+    def enqueue_print_job(self, siparis_id, hedef, tur='adisyon'):
+        """Yazdırma işini kuyruğa ekle"""
+        query = "INSERT INTO yazdirma_kuyrugu (siparis_id, tur, hedef) VALUES (%s, %s, %s)"
+        return self.execute_insert(query, (siparis_id, tur, hedef))
+    
+    def claim_print_jobs(self, hedef, limit=10):
+        """Hedef yazıcının bekleyen işlerini al ve 'yaziliyor' olarak işaretle"""
+        pending = self.execute_query("""
+            SELECT id, siparis_id, tur, deneme 
+            FROM yazdirma_kuyrugu 
+            WHERE hedef = %s AND durum = 'bekliyor' AND sonraki_deneme <= NOW()
+            ORDER BY id
+            LIMIT %s
+        """, (hedef, limit))
+        
+        claimed = []
+        for job in pending or []:
+            # Aynı yazıcıyı dinleyen başka bir terminal işi önce almış olabilir
+            try:
+                with self.connection() as conn:
+                    conn.execute("""
+                        UPDATE yazdirma_kuyrugu SET durum = 'yaziliyor' 
+                        WHERE id = %s AND durum = 'bekliyor'
+                    """, (job[0],))
+                    if conn.rowcount:
+                        claimed.append(job)
+            except Error as e:
+                logger.error(f"Yazdırma işi alınamadı: {e}")
+        return claimed
+    
+    def complete_print_job(self, job_id):
+        """Yazdırma işini tamamlandı olarak işaretle"""
+        query = "UPDATE yazdirma_kuyrugu SET durum = 'yazildi', hata = NULL WHERE id = %s"
+        return self.execute_query(query, (job_id,))
+    
+    def fail_print_job(self, job_id, hata, max_attempts):
+        """Başarısız işi artan bekleme ile yeniden dene, deneme hakkı bitince 'hata' yap"""
+        # Atamalar deneme'nin eski değerini kullanır (SQLite'ta da aynı sonuç için
+        # deneme en son artırılır)
+        query = f"""
+            UPDATE yazdirma_kuyrugu 
+            SET hata = %s,
+                durum = CASE WHEN deneme + 1 >= %s THEN 'hata' ELSE 'bekliyor' END,
+                sonraki_deneme = {self.backend.seconds_from_now('LEAST(POW(2, deneme + 1), 300)')},
+                deneme = deneme + 1
             WHERE id = %s
         """
-        return self.execute_query(query, (siparis_id, siparis_id))
+        return self.execute_query(query, (str(hata)[:255], max_attempts, job_id))
     
-    def remove_order_item(self, order_item_id):
-        """Sipariş detayını sil"""
-        query = "DELETE FROM siparis_detaylari WHERE id = %s"
-        return self.execute_query(query, (order_item_id,))
+    def reset_stale_print_jobs(self, hedef, stale_minutes=5):
+        """Yazdırılırken uygulaması kapanan işleri yeniden kuyruğa al"""
+        query = f"""
+            UPDATE yazdirma_kuyrugu SET durum = 'bekliyor' 
+            WHERE hedef = %s AND durum = 'yaziliyor' 
+              AND updated_at < {self.backend.seconds_from_now('-%s')}
+        """
+        return self.execute_query(query, (hedef, stale_minutes * 60))
     
     def get_order_summary(self, order_id):
         """Sipariş özetini getir"""
@@ -0,0 +1,496 @@
+from query_stats import timed_statement
+from collections import Counter, OrderedDict
+from datetime import datetime, date
+from decimal import Decimal
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+try:
+    import mysql.connector
+    from mysql.connector import Error as MySQLError
+except ImportError:  # Yalnızca SQLite kullanan kurulumlarda MySQL sürücüsü gerekmez
+    mysql = None
+    MySQLError = None
+
+logger = logging.getLogger(__name__)
+
+class DatabaseError(Exception):
+    """Arka uçtan bağımsız veritabanı hatası"""
+    errno = None
+
+class PoolError(DatabaseError):
+    """Bağlantı havuzunda boş bağlantı kalmadı"""
+
+# `except Error` ile yakalanan, tüm arka uçların hata sınıfları
+Error = tuple(cls for cls in (DatabaseError, sqlite3.Error, MySQLError) if cls is not None)
+
+# Bağlantı koparsa MySQL'in döndürdüğü hata kodları
+CONNECTION_LOST_ERRORS = (2006, 2013, 2055)
+# Sunucu hazırlanmış ifadeyi tanımıyorsa (ör. yeniden bağlantı sonrası)
+UNKNOWN_STATEMENT_ERROR = 1243
+# İşlemin baştan yeniden denenebileceği MySQL çakışma hataları
+CONFLICT_ERRORS = {
+    1213: 'deadlock',       # ER_LOCK_DEADLOCK
+    1205: 'lock_timeout',   # ER_LOCK_WAIT_TIMEOUT
+}
+
+class StatementCacheStats:
+    """Hazırlanmış ifade önbelleği isabet/ıska sayaçları"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def record_eviction(self):
+        with self._lock:
+            self.evictions += 1
+    
+    def snapshot(self):
+        """Sayaçların anlık kopyasını döndür"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+statement_cache_stats = StatementCacheStats()
+
+class TransactionRetryStats:
+    """Çakışma nedeniyle yeniden denenen ve vazgeçilen işlem sayaçları"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = Counter()
+        self.exhausted = Counter()
+    
+    def record_retry(self, kind):
+        with self._lock:
+            self.retries[kind] += 1
+    
+    def record_exhausted(self, kind):
+        with self._lock:
+            self.exhausted[kind] += 1
+    
+    def snapshot(self):
+        """Sayaçların anlık kopyasını döndür"""
+        with self._lock:
+            return {
+                'retries': sum(self.retries.values()),
+                'exhausted': sum(self.exhausted.values()),
+                'by_kind': dict(self.retries)
+            }
+
+transaction_retry_stats = TransactionRetryStats()
+
+class MySQLConnection:
+    """Havuzdan ödünç alınan MySQL bağlantısı (hazırlanmış ifade önbellekli)"""
+    
+    def __init__(self, raw, statement_cache_size=64):
+        self.raw = raw
+        self.last_used = time.monotonic()
+        self.broken = False
+        self.lastrowid = None
+        self.rowcount = 0
+        self.connection_id = raw.connection_id
+        # SQL metni -> hazırlanmış imleç (LRU)
+        self.statement_cache_size = statement_cache_size
+        self.statements = OrderedDict()
+    
+    def _prepared_cursor(self, query):
+        """SQL metnine ait hazırlanmış imleci önbellekten al veya oluştur"""
+        cursor = self.statements.get(query)
+        if cursor is not None:
+            self.statements.move_to_end(query)
+            statement_cache_stats.record(True)
+            return cursor
+        
+        statement_cache_stats.record(False)
+        cursor = self.raw.cursor(prepared=True)
+        self.statements[query] = cursor
+        if len(self.statements) > self.statement_cache_size:
+            _, evicted = self.statements.popitem(last=False)
+            evicted.close()
+            statement_cache_stats.record_eviction()
+        return cursor
+    
+    def reset_statements(self):
+        """Yeniden bağlantı sonrası önbelleği boşalt, ifadeler yeniden hazırlanır"""
+        # Eski ifadeler sunucuda zaten yok, imleçleri kapatmadan bırak
+        self.statements.clear()
+        self.connection_id = self.raw.connection_id
+    
+    def _drop_statement(self, query):
+        cursor = self.statements.pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except MySQLError:
+                pass
+    
+    @timed_statement
+    def execute(self, query, params=None):
+        """Tek bir sorgu çalıştır, SELECT ise satırları döndür"""
+        try:
+            return self._execute_prepared(query, params)
+        except MySQLError as e:
+            if e.errno != UNKNOWN_STATEMENT_ERROR:
+                raise
+            # Sunucu ifadeyi unutmuş, önbelleği boşaltıp bir kez daha dene
+            self.reset_statements()
+            return self._execute_prepared(query, params)
+    
+    def _execute_prepared(self, query, params):
+        cursor = self._prepared_cursor(query)
+        try:
+            cursor.execute(query, params or ())
+            if cursor.with_rows:
+                return cursor.fetchall()
+        except MySQLError:
+            # Yarım kalan imleci önbellekte tutma
+            self._drop_statement(query)
+            raise
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = cursor.rowcount
+        return True
+    
+    @timed_statement
+    def executemany(self, query, rows):
+        """Aynı ifadeyi çok satırla çalıştır (sürücü tek INSERT'e çevirir)"""
+        cursor = self.raw.cursor()
+        try:
+            cursor.executemany(query, rows)
+            self.rowcount = cursor.rowcount
+        finally:
+            cursor.close()
+    
+    def execute_ddl(self, statement):
+        """Şema ifadesini hazırlamadan çalıştır"""
+        cursor = self.raw.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+    
+    def begin(self):
+        self.raw.start_transaction()
+    
+    def commit(self):
+        self.raw.commit()
+    
+    def rollback(self):
+        self.raw.rollback()
+    
+    def open_stream(self, query, params=None):
+        """Satırları istemcide tamponlamayan imleç döndür"""
+        cursor = self.raw.cursor(buffered=False)
+        # İstemci satırları yazarken sunucu gönderimde zaman aşımına düşmesin
+        cursor.execute("SET SESSION net_write_timeout = 600")
+        cursor.execute(query, params or ())
+        return cursor
+    
+    def explain(self, query, params=None):
+        cursor = self.raw.cursor(dictionary=True)
+        try:
+            cursor.execute(f"EXPLAIN {query}", params or ())
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    
+    def ping(self):
+        """Uzun süre boşta kalan bağlantıyı yokla, gerekirse yeniden bağlan"""
+        self.raw.ping(reconnect=True, attempts=3, delay=1)
+        if self.raw.connection_id != self.connection_id:
+            # Bağlantı yeniden kuruldu, hazırlanmış ifadeler geçersiz
+            self.reset_statements()
+    
+    def close(self):
+        """Fiziksel bağlantıyı kapat"""
+        self.statements.clear()
+        try:
+            self.raw.close()
+        except MySQLError:
+            pass
+
+class MySQLBackend:
+    """mysql-connector ile MySQL sunucusu"""
+    name = 'mysql'
+    insert_ignore = "INSERT IGNORE"
+    # Okunan satırı işlem sonuna kadar kilitler
+    for_update = " FOR UPDATE"
+    
+    # DB_CONFIG'te MySQL sürücüsüne gitmeyen ayarlar
+    NON_DRIVER_KEYS = ('backend', 'sqlite_path', 'pool_size', 'pool_timeout',
+                       'pool_ping_interval', 'statement_cache_size', 'transaction_retries',
+                       'transaction_retry_backoff_ms')
+    
+    def __init__(self, config):
+        if mysql is None:
+            raise RuntimeError("MySQL için mysql-connector-python paketi gerekli")
+        self.connect_args = {key: value for key, value in config.items()
+                             if key not in self.NON_DRIVER_KEYS}
+        self.connect_args.setdefault('autocommit', True)
+        self.statement_cache_size = config.get('statement_cache_size', 64)
+    
+    def connect(self):
+        return MySQLConnection(mysql.connector.connect(**self.connect_args),
+                               self.statement_cache_size)
+    
+    def is_connection_lost(self, error):
+        return getattr(error, 'errno', None) in CONNECTION_LOST_ERRORS
+    
+    def conflict_kind(self, error):
+        """Hata yeniden denenebilir bir kilit çakışmasıysa türünü döndür"""
+        return CONFLICT_ERRORS.get(getattr(error, 'errno', None))
+    
+    def ddl(self, statement):
+        """Şema ifadeleri MySQL sözdizimiyle yazılmıştır"""
+        return [statement]
+    
+    def existing_columns(self, conn):
+        rows = conn.execute("""
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE()
+        """)
+        return {(table.lower(), column.lower()) for table, column in rows}
+    
+    def existing_indexes(self, conn):
+        rows = conn.execute("""
+            SELECT DISTINCT table_name, index_name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+        """)
+        return {(table.lower(), name) for table, name in rows}
+    
+    def upsert_sum(self, table, keys, columns, replace=()):
+        """Anahtar varsa kolonlara yeni değerleri ekleyen ON DUPLICATE KEY ifadesi"""
+        updates = [f"{column} = {table}.{column} + VALUES({column})" for column in columns]
+        updates += [f"{column} = VALUES({column})" for column in replace]
+        return f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+    
+    def seconds_from_now(self, seconds):
+        """Şimdiden verilen saniye kadar sonraki zaman (SQL ifadesi)"""
+        return f"NOW() + INTERVAL ({seconds}) SECOND"
+
+class SQLiteConnection:
+    """Gömülü SQLite dosyasına bağlantı (MySQL bağlantısıyla aynı arayüz)"""
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.last_used = time.monotonic()
+        self.broken = False
+        self.lastrowid = None
+        self.rowcount = 0
+    
+    @timed_statement
+    def execute(self, query, params=None):
+        """Tek bir sorgu çalıştır, SELECT ise satırları döndür"""
+        cursor = self.raw.execute(_sqlite_sql(query), params or ())
+        if cursor.description is not None:
+            return cursor.fetchall()
+        self.lastrowid = cursor.lastrowid
+        self.rowcount = cursor.rowcount
+        return True
+    
+    @timed_statement
+    def executemany(self, query, rows):
+        cursor = self.raw.executemany(_sqlite_sql(query), rows)
+        self.rowcount = cursor.rowcount
+    
+    def execute_ddl(self, statement):
+        self.raw.execute(statement)
+    
+    def begin(self):
+        # Yazma kilidi baştan alınır; iki işlemin kilit yükseltirken takılması önlenir
+        self.raw.execute("BEGIN IMMEDIATE")
+    
+    def commit(self):
+        self.raw.execute("COMMIT")
+    
+    def rollback(self):
+        self.raw.execute("ROLLBACK")
+    
+    def open_stream(self, query, params=None):
+        return self.raw.execute(_sqlite_sql(query), params or ())
+    
+    def explain(self, query, params=None):
+        rows = self.raw.execute(f"EXPLAIN QUERY PLAN {_sqlite_sql(query)}", params or ())
+        return [{'id': row[0], 'parent': row[1], 'detail': row[3]} for row in rows]
+    
+    def ping(self):
+        pass
+    
+    def close(self):
+        try:
+            self.raw.close()
+        except sqlite3.Error:
+            pass
+
+# Çevrilmiş sorgular; dinamik SQL sınırsız büyütmesin diye en eski kullanılan atılır
+SQLITE_STATEMENT_CACHE_SIZE = 256
+_sqlite_statements = OrderedDict()
+_sqlite_statements_lock = threading.Lock()
+
+def _sqlite_sql(query):
+    """%s yer tutucularını SQLite'ın ? biçimine çevir (sonuç önbelleğe alınır)"""
+    with _sqlite_statements_lock:
+        translated = _sqlite_statements.get(query)
+        if translated is not None:
+            _sqlite_statements.move_to_end(query)
+            return translated
+        translated = query.replace('%s', '?')
+        _sqlite_statements[query] = translated
+        if len(_sqlite_statements) > SQLITE_STATEMENT_CACHE_SIZE:
+            _sqlite_statements.popitem(last=False)
+    return translated
+
+# Şemadaki tüm DECIMAL kolonları iki ondalıklıdır
+_CENT = Decimal('0.01')
+
+def _decimal(value):
+    """DECIMAL kolonunu iki ondalığa sabitlenmiş Decimal olarak oku"""
+    # SQLite sayıyı 15 anlamlı basamakla metne çevirir; toplama artıkları burada temizlenir
+    return Decimal(value.decode()).quantize(_CENT)
+
+def _decimal_row(cursor, row):
+    """Tür bilgisi olmayan ifadelerin (SUM, AVG…) kesirli sonucunu MySQL gibi Decimal döndür"""
+    if float not in map(type, row):
+        return row
+    return tuple(Decimal(f"{value:.15g}") if type(value) is float else value for value in row)
+
+def _local_now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _day_of(value):
+    return int(str(value)[8:10]) if value else None
+
+def _least(*values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+# MySQL şema tanımlarının SQLite karşılıkları
+_SQLITE_DDL_RULES = [
+    (re.compile(r"\b(?:BIG)?INT AUTO_INCREMENT PRIMARY KEY"), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"(\w+) ENUM\(([^)]*)\)"), r"\1 TEXT CHECK (\1 IN (\2))"),
+    (re.compile(r"DEFAULT CURRENT_TIMESTAMP( ON UPDATE CURRENT_TIMESTAMP)?"),
+     "DEFAULT (datetime('now', 'localtime'))"),
+]
+_CREATE_TABLE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+)")
+
+class SQLiteBackend:
+    """Sunucu gerektirmeyen gömülü SQLite veritabanı (WAL kipinde)"""
+    name = 'sqlite'
+    insert_ignore = "INSERT OR IGNORE"
+    # BEGIN IMMEDIATE yazma kilidini baştan aldığı için satır kilidi gerekmez
+    for_update = ""
+    
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        # WAL ile NORMAL güvenlidir; yalnızca elektrik kesintisinde son işlem kaybolabilir
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA cache_size = -16000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA mmap_size = 268435456",
+    )
+    
+    def __init__(self, config):
+        self.path = config.get('sqlite_path', 'adisyon.db')
+    
+    def connect(self):
+        raw = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES,
+                              check_same_thread=False, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            raw.execute(pragma)
+        raw.row_factory = _decimal_row
+        # Sorgularda kullanılan MySQL fonksiyonları
+        raw.create_function("NOW", 0, _local_now)
+        raw.create_function("DAY", 1, _day_of)
+        raw.create_function("LEAST", -1, _least)
+        raw.create_function("POW", 2, pow)
+        return SQLiteConnection(raw)
+    
+    def is_connection_lost(self, error):
+        return False
+    
+    def conflict_kind(self, error):
+        # busy_timeout dolduğunda yazma kilidi alınamamıştır
+        if isinstance(error, sqlite3.OperationalError) and 'locked' in str(error):
+            return 'busy'
+        return None
+    
+    def ddl(self, statement):
+        """MySQL sözdizimli şema ifadesini SQLite'a çevir"""
+        translated = statement
+        for pattern, replacement in _SQLITE_DDL_RULES:
+            translated = pattern.sub(replacement, translated)
+        statements = [translated]
+        
+        table = _CREATE_TABLE.search(statement)
+        if table and "ON UPDATE CURRENT_TIMESTAMP" in statement:
+            # SQLite'ta ON UPDATE yok; updated_at tetikleyiciyle güncellenir
+            name = table.group(1)
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{name}_updated_at
+                AFTER UPDATE ON {name} FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+                BEGIN
+                    UPDATE {name} SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+                END
+            """)
+        return statements
+    
+    def existing_columns(self, conn):
+        columns = set()
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            for row in conn.execute(f"PRAGMA table_info({table})"):
+                columns.add((table.lower(), row[1].lower()))
+        return columns
+    
+    def existing_indexes(self, conn):
+        rows = conn.execute("SELECT tbl_name, name FROM sqlite_master WHERE type = 'index'")
+        return {(table.lower(), name) for table, name in rows}
+    
+    def upsert_sum(self, table, keys, columns, replace=()):
+        """Anahtar varsa kolonlara yeni değerleri ekleyen ON CONFLICT ifadesi"""
+        updates = [f"{column} = {table}.{column} + excluded.{column}" for column in columns]
+        updates += [f"{column} = excluded.{column}" for column in replace]
+        return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(updates)}"
+    
+    def seconds_from_now(self, seconds):
+        return f"datetime('now', 'localtime', ({seconds}) || ' seconds')"
+
+# SQLite'ta DECIMAL ve zaman kolonları Python türlerine çevrilir
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DECIMAL", _decimal)
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+def create_backend(config):
+    """DB_CONFIG['backend'] ayarına göre arka ucu oluştur"""
+    kind = config.get('backend', 'mysql')
+    if kind not in BACKENDS:
+        raise ValueError(f"Bilinmeyen veritabanı arka ucu: {kind}")
+    return BACKENDS[kind](config)
@@ -0,0 +1,133 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+from config import DB_CONFIG
+from query_stats import caller_context, find_caller
+from concurrent.futures import CancelledError
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DbFuture(QObject):
+    """Arka planda çalışan veritabanı işinin sonucu (sinyaller GUI thread'inde gelir)"""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    settled = pyqtSignal()
+    _completed = pyqtSignal(object, object)  # sonuç, hata
+    
+    def __init__(self, key=None, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.cancelled = False
+        # Worker thread'den gelen sinyal bu nesnenin thread'ine (GUI) kuyruklanır
+        self._completed.connect(self._deliver)
+    
+    def cancel(self):
+        """Sonucu artık bekleme, geldiğinde yok say"""
+        self.cancelled = True
+    
+    @pyqtSlot(object, object)
+    def _deliver(self, result, error):
+        if not self.cancelled:
+            if error is not None:
+                self.failed.emit(str(error))
+            else:
+                self.finished.emit(result)
+        self.settled.emit()
+
+class _DbTask(QRunnable):
+    """QThreadPool üzerinde tek bir veritabanı işini çalıştırır"""
+    
+    def __init__(self, future, fn, args, kwargs, caller=None):
+        super().__init__()
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.caller = caller
+    
+    def run(self):
+        if self.future.cancelled:
+            self.future._completed.emit(None, None)
+            return
+        try:
+            with caller_context(self.caller):
+                result = self.fn(*self.args, **self.kwargs)
+        except CancelledError as e:
+            # Kullanıcının iptal ettiği iş hata değildir; yığın izi basılmaz
+            logger.info(f"Arka plan işi iptal edildi: {type(e).__name__}")
+            self.future._completed.emit(None, e)
+        except Exception as e:
+            logger.exception(f"Arka plan veritabanı işi başarısız: {e}")
+            self.future._completed.emit(None, e)
+        else:
+            self.future._completed.emit(result, None)
+
+class DbExecutor(QObject):
+    """Veritabanı işlerini GUI thread'i dışında çalıştıran yürütücü"""
+    busy_changed = pyqtSignal(bool)
+    
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        # GUI thread'inin de havuzdan bağlantı alabilmesi için bir bağlantı boş bırakılır
+        self.thread_pool.setMaxThreadCount(max_threads or max(1, DB_CONFIG.get('pool_size', 5) - 1))
+        self._pending = set()
+        self._latest = {}
+    
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, **kwargs):
+        """İşi arka planda çalıştır; aynı key ile gelen yeni iş öncekinin sonucunu geçersiz kılar"""
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+        
+        future = DbFuture(key, self)
+        if on_done is not None:
+            future.finished.connect(on_done)
+        if on_error is not None:
+            future.failed.connect(on_error)
+        future.settled.connect(lambda: self._settle(future))
+        
+        if key is not None:
+            self._latest[key] = future
+        self._pending.add(future)
+        if len(self._pending) == 1:
+            self.busy_changed.emit(True)
+        
+        # Sorgu istatistiklerinde işin hangi ekrandan geldiği görünsün
+        self.thread_pool.start(_DbTask(future, fn, args, kwargs, find_caller()))
+        return future
+    
+    def cancel(self, key):
+        """Verilen anahtarla bekleyen işin sonucunu yok say"""
+        future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+    
+    def is_busy(self):
+        return bool(self._pending)
+    
+    def _settle(self, future):
+        self._pending.discard(future)
+        if self._latest.get(future.key) is future:
+            del self._latest[future.key]
+        future.deleteLater()
+        if not self._pending:
+            self.busy_changed.emit(False)
+    
+    def shutdown(self, timeout_ms=5000):
+        """Bekleyen işlerin bitmesini bekle"""
+        for future in list(self._pending):
+            future.cancel()
+        self.thread_pool.waitForDone(timeout_ms)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Süreç genelindeki veritabanı yürütücüsünü döndür (GUI thread'inden çağrılmalı)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DbExecutor()
+        return _executor
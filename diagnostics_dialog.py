@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QTextEdit,
+                             QAbstractItemView)
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from database import DatabaseManager
+from query_stats import query_stats, BUCKETS_MS
+from config import APP_CONFIG
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DiagnosticsDialog(QDialog):
+    """En çok süre harcayan SQL özetlerini gösteren tanılama penceresi"""
+    
+    COLUMNS = ["Sorgu", "Çağrı", "Toplam (ms)", "Ortalama (ms)", "~p95 (ms)",
+               "En Uzun (ms)", "Satır", "Hata", "Çağıran"]
+    
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent)
+        self.db = db or DatabaseManager()
+        self.rows = []
+        self.init_ui()
+        self.refresh()
+    
+    def init_ui(self):
+        """Tanılama arayüzünü oluştur"""
+        self.setWindowTitle("🩺 Sorgu İstatistikleri")
+        self.setMinimumSize(1100, 650)
+        
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #f8f9fa;
+            }
+            QTableWidget {
+                background-color: white;
+                border: 2px solid #dee2e6;
+                border-radius: 8px;
+                gridline-color: #e9ecef;
+                font-size: 12px;
+            }
+            QPushButton {
+                background-color: #007bff;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                font-weight: bold;
+                padding: 8px 16px;
+            }
+            QPushButton:hover {
+                background-color: #0056b3;
+            }
+        """)
+        
+        layout = QVBoxLayout(self)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setFont(QFont("Arial", 11, QFont.Bold))
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(self.COLUMNS)):
+            header.setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.table.itemSelectionChanged.connect(self.show_selected)
+        layout.addWidget(self.table, 3)
+        
+        # Seçili sorgunun tam metni ve süre dağılımı
+        self.detail_text = QTextEdit()
+        self.detail_text.setReadOnly(True)
+        self.detail_text.setFont(QFont("Courier", 10))
+        layout.addWidget(self.detail_text, 2)
+        
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton("🔄 Yenile")
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn = QPushButton("🗑️ Sıfırla")
+        reset_btn.clicked.connect(self.reset)
+        close_btn = QPushButton("Kapat")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(reset_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+    
+    def refresh(self):
+        """İstatistikleri yeniden oku (bellekteki sayaçlar, veritabanına gidilmez)"""
+        self.rows = query_stats.top(50)
+        calls, total_ms = query_stats.totals()
+        cache = self.db.statement_cache_stats()
+        retries = self.db.transaction_retry_stats()
+        slow = f"{query_stats.slow_ms} ms" if query_stats.slow_ms > 0 else "kapalı"
+        self.summary_label.setText(
+            f"Toplam {calls} ifade, {total_ms:.0f} ms  |  Yavaş sorgu eşiği: {slow} "
+            f"({APP_CONFIG['slow_query_log']})  |  İfade önbelleği isabeti: "
+            f"{cache['hit_ratio'] * 100:.0f}%  |  İşlem yeniden denemesi: {retries['retries']} "
+            f"(vazgeçilen {retries['exhausted']})")
+        
+        self.table.setRowCount(len(self.rows))
+        for row, stats in enumerate(self.rows):
+            query_item = QTableWidgetItem(stats['fingerprint'])
+            query_item.setToolTip(stats['fingerprint'])
+            self.table.setItem(row, 0, query_item)
+            values = [stats['calls'], f"{stats['total_ms']:.1f}", f"{stats['mean_ms']:.2f}",
+                      f"{stats['p95_ms']:.0f}", f"{stats['max_ms']:.1f}", stats['rows'],
+                      stats['errors'], stats['callers'][0][0] if stats['callers'] else ""]
+            for column, value in enumerate(values, start=1):
+                item = QTableWidgetItem(str(value))
+                if column < len(values):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.detail_text.clear()
+    
+    def show_selected(self):
+        """Seçili özetin tam metnini, çağıranlarını ve süre dağılımını göster"""
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.rows):
+            return
+        stats = self.rows[row]
+        
+        lines = [stats['fingerprint'], "", "Çağıranlar:"]
+        lines += [f"  {caller}: {count}" for caller, count in stats['callers']]
+        lines += ["", "Süre dağılımı:"]
+        peak = max(stats['buckets']) or 1
+        labels = [f"<= {limit} ms" for limit in BUCKETS_MS] + [f"> {BUCKETS_MS[-1]} ms"]
+        for label, count in zip(labels, stats['buckets']):
+            if count:
+                lines.append(f"  {label:>12} {'█' * max(1, count * 40 // peak)} {count}")
+        self.detail_text.setPlainText("\n".join(lines))
+    
+    def reset(self):
+        """Sayaçları sıfırla (ör. bir ekranı tek başına ölçmeden önce)"""
+        query_stats.reset()
+        self.refresh()
@@ -0,0 +1,177 @@
+from config import APP_CONFIG
+import os
+import socket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ESC/POS komutları
+ESC = b'\x1b'
+GS = b'\x1d'
+NEWLINE = b'\n'
+INIT = ESC + b'@'
+CODEPAGE_TURKISH = ESC + b't\x0d'  # PC857
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+SIZE_NORMAL = GS + b'!\x00'
+SIZE_DOUBLE = GS + b'!\x11'
+FEED_AND_CUT = GS + b'V\x42\x03'
+
+ENCODING = 'cp857'
+
+def encode(text):
+    """Metni yazıcının Türkçe kod sayfasına çevir"""
+    return text.encode(ENCODING, errors='replace')
+
+def qr_code(data, size=6):
+    """QR kodu yazdıran GS ( k komut dizisi"""
+    payload = data.encode('ascii', errors='replace')
+    length = len(payload) + 3
+    return b''.join([
+        GS, b'(k\x04\x001A2\x00',                        # model 2
+        GS, b'(k\x03\x001C', bytes([size]),              # modül boyutu
+        GS, b'(k\x03\x001E0',                            # hata düzeltme L
+        GS, b'(k', bytes([length % 256, length // 256]), b'1P0', payload,
+        GS, b'(k\x03\x001Q0',                            # yazdır
+    ])
+
+class ReceiptTemplate:
+    """Sabit kısımları bir kez bayta çevrilen, her fişte yalnızca satırları doldurulan şablon"""
+    
+    def __init__(self, title, width, show_prices=True, footer=(), qr=None):
+        self.width = width
+        self.show_prices = show_prices
+        self.qr = qr
+        rule = encode('-' * width) + NEWLINE
+        
+        self._head = b''.join([
+            INIT, CODEPAGE_TURKISH,
+            ALIGN_CENTER, SIZE_DOUBLE, BOLD_ON, encode(title), NEWLINE,
+            SIZE_NORMAL, BOLD_OFF, ALIGN_LEFT, rule,
+        ])
+        self._rule = rule
+        
+        if show_prices:
+            name_width = width - 23
+            self._line_format = (f"{{name:<{name_width}.{name_width}}} {{quantity:>3}}x "
+                                 f"{{unit_price:>7.2f}} {{total_price:>9.2f}}")
+            self._total_format = f"{{label}}{{total:>{width - 10}.2f}} TL"
+        else:
+            # Mutfak fişi: adet önde, ürün adı kesilmeden
+            self._line_format = "{quantity:>3} x {name}"
+            self._total_format = None
+        self._note_format = "      Not: {notes}"
+        
+        self._tail = b''.join(
+            [ALIGN_CENTER] + [encode(text) + NEWLINE for text in footer] + [ALIGN_LEFT]
+        ) + FEED_AND_CUT
+    
+    def render(self, header_lines, items, total=None, highlight=None, qr_data=None):
+        """Fişi ESC/POS bayt dizisi olarak oluştur"""
+        # items: (ürün, adet, birim fiyat, toplam, notlar) demetleri
+        parts = [self._head]
+        if highlight:
+            parts += [ALIGN_CENTER, SIZE_DOUBLE, encode(highlight), NEWLINE, SIZE_NORMAL, ALIGN_LEFT]
+        parts += [encode(line) + NEWLINE for line in header_lines]
+        parts.append(self._rule)
+        
+        line_format = self._line_format
+        note_format = self._note_format
+        for name, quantity, unit_price, total_price, notes in items:
+            parts.append(encode(line_format.format(name=name, quantity=quantity,
+                                                   unit_price=unit_price,
+                                                   total_price=total_price)) + NEWLINE)
+            if notes:
+                parts.append(encode(note_format.format(notes=notes)) + NEWLINE)
+        
+        parts.append(self._rule)
+        if total is not None and self._total_format:
+            parts += [BOLD_ON, encode(self._total_format.format(label="TOPLAM:", total=total)),
+                      NEWLINE, BOLD_OFF]
+        if qr_data and self.qr:
+            parts += [ALIGN_CENTER, qr_code(qr_data), NEWLINE, ALIGN_LEFT]
+        parts.append(self._tail)
+        return b''.join(parts)
+
+# Şablonlar ilk kullanımda derlenip saklanır
+_templates = {}
+
+def get_template(kind, width=None):
+    """Fiş türü için derlenmiş şablonu döndür ('adisyon' veya 'mutfak')"""
+    width = width or APP_CONFIG['receipt_width']
+    key = (kind, width)
+    template = _templates.get(key)
+    if template is None:
+        if kind == 'mutfak':
+            template = ReceiptTemplate("MUTFAK", width, show_prices=False)
+        else:
+            template = ReceiptTemplate(APP_CONFIG['title'].upper(), width,
+                                       footer=("Teşekkür ederiz!",),
+                                       qr=APP_CONFIG['receipt_qr'] or None)
+        _templates[key] = template
+    return template
+
+def render_bill(order, items, width=None):
+    """get_order_summary satırı ve sipariş detaylarından ESC/POS adisyon"""
+    order_id, total, created_at, table_no = order[:4]
+    template = get_template('adisyon', width)
+    header = [
+        f"Sipariş No: #{order_id}",
+        f"Masa No: {table_no}",
+        f"Tarih: {created_at.strftime('%d.%m.%Y %H:%M')}",
+    ]
+    lines = [(name, quantity, unit_price, total_price, notes)
+             for item_id, name, quantity, unit_price, total_price, notes in items or []]
+    total_amount = sum(line[3] for line in lines)
+    qr_data = template.qr.format(order_id=order_id, total=total_amount) if template.qr else None
+    return template.render(header, lines, total=total_amount, qr_data=qr_data)
+
+def render_kitchen_ticket(order_id, table_no, station, items, created_at, width=None):
+    """İstasyona giden mutfak fişi; items (ürün, adet, notlar) demetleri"""
+    template = get_template('mutfak', width)
+    header = [
+        f"İstasyon: {station}",
+        f"Sipariş No: #{order_id}",
+        f"Saat: {created_at.strftime('%H:%M')}",
+    ]
+    lines = [(name, quantity, None, None, notes) for name, quantity, notes in items]
+    return template.render(header, lines, highlight=f"MASA {table_no}")
+
+class DeviceSink:
+    """ESC/POS baytlarını yazıcı aygıt dosyasına yazar (ör. /dev/usb/lp0)"""
+    raw = True
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def send(self, job_id, payload):
+        with open(self.path, 'wb') as device:
+            device.write(payload)
+
+class TcpSink:
+    """ESC/POS baytlarını ağ yazıcısına (RAW, genelde 9100) gönderir"""
+    raw = True
+    
+    def __init__(self, host, port=9100, timeout=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+    
+    def send(self, job_id, payload):
+        with socket.create_connection((self.host, self.port), timeout=self.timeout) as conn:
+            conn.sendall(payload)
+
+class RawFileSink:
+    """Test için sahte yazıcı: her işi dizine .bin dosyası olarak yazar"""
+    raw = True
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def send(self, job_id, payload):
+        path = os.path.join(self.directory, f"fis_{job_id}.bin")
+        with open(path, 'wb') as f:
+            f.write(payload)
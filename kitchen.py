@@ -0,0 +1,237 @@
+import sys
+import time
+from collections import OrderedDict
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
+                             QHBoxLayout, QListWidget, QListWidgetItem, QPushButton,
+                             QLabel, QMessageBox)
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont
+from database import DatabaseManager, STATIONS
+from db_worker import get_executor
+from change_feed import ChangeFeed
+from print_spooler import create_sink
+from config import APP_CONFIG
+import escpos
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATION_NAMES = dict(STATIONS)
+
+class StationTicket:
+    """Bir siparişin tek istasyona giden, pencere süresince biriken satırları"""
+    
+    def __init__(self, order_id, table_no, station, created_at, opened_at):
+        self.order_id = order_id
+        self.table_no = table_no
+        self.station = station
+        self.created_at = created_at
+        self.opened_at = opened_at
+        self.items = []  # (ürün, adet, notlar)
+    
+    def text(self):
+        """Ekranda ve düz metin yazıcıda gösterilecek fiş metni"""
+        lines = [f"MASA {self.table_no}  #{self.order_id}  {self.created_at.strftime('%H:%M')}"]
+        for name, quantity, notes in self.items:
+            lines.append(f"{quantity:>3} x {name}")
+            if notes:
+                lines.append(f"      Not: {notes}")
+        return "\n".join(lines)
+
+class TicketBatcher:
+    """Yeni satırları (sipariş, istasyon) başına toplayıp pencere dolunca fiş olarak verir"""
+    
+    def __init__(self, window_seconds):
+        self.window = window_seconds
+        self.pending = OrderedDict()  # (sipariş, istasyon) -> StationTicket
+    
+    def add(self, order_id, table_no, station, name, quantity, notes, created_at, now):
+        key = (order_id, station)
+        ticket = self.pending.get(key)
+        if ticket is None:
+            ticket = StationTicket(order_id, table_no, station, created_at, now)
+            self.pending[key] = ticket
+        ticket.items.append((name, quantity, notes))
+    
+    def pop_expired(self, now):
+        """Penceresi dolan fişleri sırayla çıkar"""
+        expired = []
+        # Fişler açılış sırasıyla tutulduğu için ilk dolmayanda durulur
+        while self.pending:
+            key, ticket = next(iter(self.pending.items()))
+            if now - ticket.opened_at < self.window:
+                break
+            del self.pending[key]
+            expired.append(ticket)
+        return expired
+
+class KitchenRouter(QObject):
+    """Değişiklik akışındaki yeni satırları istasyonlara yönlendirip fişe dönüştürür"""
+    ticket_ready = pyqtSignal(object)
+    
+    def __init__(self, db, executor, feed, stations=None, sink=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.executor = executor
+        self.stations = set(stations) if stations else None
+        self.sink = sink
+        self.batcher = TicketBatcher(APP_CONFIG['kitchen_coalesce_ms'] / 1000)
+        self._pending = {}  # detay ID -> fişe yazılacak adet (None: satırın tamamı)
+        self._in_flight = False
+        self._printed = 0
+        feed.order_lines_added.connect(self.on_lines_added)
+        feed.order_lines_updated.connect(self.on_lines_updated)
+        
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(200)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
+    
+    def on_lines_added(self, order_id, item_ids):
+        """Yeni satır ID'lerini biriktir; tek sorguda istasyonlarıyla getir"""
+        for item_id in item_ids:
+            self._pending[item_id] = None
+        self.fetch()
+    
+    def on_lines_updated(self, order_id, changes):
+        """Mevcut satıra eklenen adetleri yeni satır gibi fişe yönlendir (azalışlar basılmaz)"""
+        for item_id, delta in changes:
+            if delta <= 0:
+                continue
+            if item_id in self._pending and self._pending[item_id] is None:
+                # Satırın tamamı zaten okunacak
+                continue
+            self._pending[item_id] = self._pending.get(item_id, 0) + delta
+        self.fetch()
+    
+    def fetch(self):
+        if self._in_flight or not self._pending:
+            return
+        quantities, self._pending = self._pending, {}
+        self._in_flight = True
+        future = self.executor.submit(self.db.get_kitchen_lines, list(quantities),
+                                      on_done=lambda rows: self.route(rows, quantities))
+        future.settled.connect(self._on_settled)
+    
+    def _on_settled(self):
+        self._in_flight = False
+        self.fetch()
+    
+    def route(self, rows, quantities=None):
+        """Satırları istasyonlarına göre bekleyen fişlere ekle"""
+        now = time.monotonic()
+        for item_id, order_id, table_no, station, name, quantity, notes, created_at in rows or []:
+            if self.stations is not None and station not in self.stations:
+                continue
+            if quantities and quantities.get(item_id) is not None:
+                quantity = quantities[item_id]
+            self.batcher.add(order_id, table_no, station, name, quantity, notes, created_at, now)
+    
+    def flush(self):
+        """Penceresi dolan fişleri ekrana ve (varsa) istasyon yazıcısına gönder"""
+        for ticket in self.batcher.pop_expired(time.monotonic()):
+            self.ticket_ready.emit(ticket)
+            if self.sink is not None:
+                self._printed += 1
+                self.executor.submit(self.print_ticket, ticket, self._printed)
+    
+    def print_ticket(self, ticket, number):
+        """Fişi istasyon yazıcısına gönder (arka planda çalışır)"""
+        if getattr(self.sink, 'raw', False):
+            payload = escpos.render_kitchen_ticket(
+                ticket.order_id, ticket.table_no, STATION_NAMES.get(ticket.station, ticket.station),
+                ticket.items, ticket.created_at)
+        else:
+            payload = ticket.text()
+        self.sink.send(f"mutfak_{ticket.order_id}_{ticket.station}_{number}", payload)
+
+class KitchenDisplayWindow(QMainWindow):
+    """İstasyona düşen fişleri listeleyen hafif mutfak ekranı"""
+    
+    MAX_TICKETS = 200
+    
+    def __init__(self, stations=None):
+        super().__init__()
+        self.stations = stations
+        self.init_ui()
+    
+    def init_ui(self):
+        """Mutfak ekranı arayüzünü oluştur"""
+        if self.stations:
+            names = ", ".join(STATION_NAMES.get(code, code) for code in self.stations)
+        else:
+            names = "Tüm İstasyonlar"
+        self.setWindowTitle(f"{APP_CONFIG['title']} - {names}")
+        self.resize(600, 800)
+        
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QVBoxLayout(central_widget)
+        
+        title = QLabel(f"👨‍🍳 {names}")
+        title.setFont(QFont("Arial", 18, QFont.Bold))
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+        
+        self.ticket_list = QListWidget()
+        self.ticket_list.setFont(QFont("Courier", 13))
+        self.ticket_list.setSpacing(6)
+        self.ticket_list.itemDoubleClicked.connect(self.complete_ticket)
+        layout.addWidget(self.ticket_list)
+        
+        button_layout = QHBoxLayout()
+        self.done_btn = QPushButton("✅ Hazır")
+        self.done_btn.clicked.connect(self.complete_selected)
+        button_layout.addStretch()
+        button_layout.addWidget(self.done_btn)
+        layout.addLayout(button_layout)
+    
+    def add_ticket(self, ticket):
+        """Yeni fişi listenin sonuna ekle"""
+        station = STATION_NAMES.get(ticket.station, ticket.station)
+        item = QListWidgetItem(f"[{station}] {ticket.text()}")
+        self.ticket_list.addItem(item)
+        # Ekran hafif kalsın diye en eski fişler düşürülür
+        while self.ticket_list.count() > self.MAX_TICKETS:
+            self.ticket_list.takeItem(0)
+        self.statusBar().showMessage(f"Bekleyen fiş: {self.ticket_list.count()}")
+    
+    def complete_ticket(self, item):
+        self.ticket_list.takeItem(self.ticket_list.row(item))
+        self.statusBar().showMessage(f"Bekleyen fiş: {self.ticket_list.count()}")
+    
+    def complete_selected(self):
+        item = self.ticket_list.currentItem()
+        if item is not None:
+            self.complete_ticket(item)
+
+def main():
+    """Mutfak ekranı: python kitchen.py [istasyon ...] (ör. python kitchen.py bar)"""
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')
+    
+    stations = sys.argv[1:] or None
+    db = DatabaseManager()
+    if not db.connect():
+        QMessageBox.critical(None, "Hata", "Veritabanına bağlanılamadı!")
+        sys.exit(1)
+    
+    executor = get_executor()
+    feed = ChangeFeed(db, executor, APP_CONFIG['change_poll_interval_ms'])
+    sink = create_sink(APP_CONFIG['kitchen_sink']) if APP_CONFIG['kitchen_sink'] else None
+    router = KitchenRouter(db, executor, feed, stations, sink)
+    
+    window = KitchenDisplayWindow(stations)
+    router.ticket_ready.connect(window.add_ticket)
+    window.show()
+    feed.start(db.get_last_change_id())
+    
+    exit_code = app.exec_()
+    feed.stop()
+    executor.shutdown()
+    db.disconnect()
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import time
+# Açılış raporunda modül içe aktarma süresi de görünsün
+STARTED_AT = time.perf_counter()
 import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
@@ -5,114 +8,88 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QTableWidget, QTableWidgetItem, QComboBox, 
                              QSpinBox, QTextEdit, QMessageBox, QDialog,
                              QTabWidget, QGroupBox, QLineEdit, QDateEdit,
-                             QHeaderView, QSplitter, QFrame)
+                             QHeaderView, QSplitter, QFrame, QTableView,
+                             QAbstractItemView, QProgressBar, QScrollArea)
 from PyQt5.QtCore import Qt, QTimer, QDate
 from PyQt5.QtGui import QFont, QIcon, QPixmap
 from database import DatabaseManager
+from order_model import OrderItemsModel
+from db_worker import get_executor
+from catalog_cache import CatalogCache
+from change_feed import ChangeFeed
+from table_index import TableIndex
+from print_spooler import PrintSpooler
+from offline_journal import OfflineJournal, JournalReplayer, new_client_id
 from config import APP_CONFIG
-from product_management import ProductManagementDialog, CategoryManagementDialog
-from payment_dialog import PaymentDialog, BillPrintDialog
-from reports_dialog import ReportsDialog
+from styles import APP_STYLESHEET, TABLE_STATES, set_state
+# Diyalog modülleri (ürün, ödeme, rapor, tanılama) açılışı yavaşlatmasın diye
+# ilk kullanıldıkları anda içe aktarılır
 import logging
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class StartupTimer:
+    """Açılış adımlarının sürelerini toplayıp tek satırda loglar"""
+    
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.steps = []
+    
+    def mark(self, name):
+        """Önceki işaretten bu yana geçen süreyi adım olarak kaydet"""
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+    
+    def report(self):
+        total = (self.last - self.started) * 1000
+        steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.steps)
+        logger.info(f"Açılış süresi: {total:.0f} ms ({steps})")
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup=None):
         super().__init__()
+        self.startup = startup or StartupTimer(time.perf_counter())
         self.db = DatabaseManager()
+        self.db_executor = get_executor()
+        self.catalog = CatalogCache(self.db)
+        self.order_model = OrderItemsModel(self)
         self.current_order_id = None
         self.current_table_id = None
+        self.selected_table_no = None
+        self.tables = TableIndex()
+        # Yalnızca görüntülenmiş katların butonları oluşturulur
+        self.table_buttons = {}
+        self.built_floors = set()
+        self.change_feed = ChangeFeed(self.db, self.db_executor,
+                                      APP_CONFIG['change_poll_interval_ms'], self)
+        self.print_spooler = PrintSpooler(self.db, self.db_executor, parent=self)
+        # Sunucuya ulaşılamazken yapılan işlemler yerel günlüğe yazılır
+        self.journal = OfflineJournal(APP_CONFIG['offline_journal_path'])
+        self.replayer = JournalReplayer(self.db, self.db_executor, self.journal,
+                                        APP_CONFIG['offline_retry_interval'], self)
+        self.services_started = False
+        # Sipariş listesi sekmesi ilk açıldığında oluşturulur
+        self.order_table = None
+        self.remove_item_btn = None
+        self.increase_qty_btn = None
+        self.decrease_qty_btn = None
+        self.clear_order_btn = None
+        self.clear_order_enabled = False
         self.init_ui()
+        self.startup.mark("arayüz")
         self.connect_database()
+        self.startup.mark("veritabanı")
         
     def init_ui(self):
         """Ana arayüzü oluştur"""
         self.setWindowTitle(APP_CONFIG['title'])
         self.setGeometry(100, 100, *APP_CONFIG['window_size'])
         
-        # Modern stil uygula
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f5f5f5;
-            }
-            QWidget {
-                font-family: 'Segoe UI', Arial, sans-serif;
-            }
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 6px;
-                font-weight: bold;
-                font-size: 12px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QPushButton:pressed {
-                background-color: #3d8b40;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-                color: #666666;
-            }
-            QGroupBox {
-                font-weight: bold;
-                border: 2px solid #cccccc;
-                border-radius: 8px;
-                margin-top: 10px;
-                padding-top: 10px;
-                background-color: white;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px 0 5px;
-                color: #333333;
-            }
-            QTableWidget {
-                background-color: white;
-                border: 1px solid #ddd;
-                border-radius: 6px;
-                gridline-color: #e0e0e0;
-                selection-background-color: #e3f2fd;
-            }
-            QTableWidget::item {
-                padding: 8px;
-                border-bottom: 1px solid #f0f0f0;
-            }
-            QTableWidget::item:selected {
-                background-color: #e3f2fd;
-                color: #1976d2;
-            }
-            QComboBox {
-                border: 2px solid #ddd;
-                border-radius: 6px;
-                padding: 5px;
-                background-color: white;
-            }
-            QComboBox:focus {
-                border-color: #4CAF50;
-            }
-            QSpinBox, QDoubleSpinBox {
-                border: 2px solid #ddd;
-                border-radius: 6px;
-                padding: 5px;
-                background-color: white;
-            }
-            QTextEdit {
-                border: 2px solid #ddd;
-                border-radius: 6px;
-                background-color: white;
-            }
-            QLabel {
-                color: #333333;
-            }
-        """)
+        # Genel stil açılışta uygulamaya bir kez verilir (bkz. styles.py)
         
         # Ana widget
         central_widget = QWidget()
@@ -151,6 +128,14 @@ class MainWindow(QMainWindow):
         
         # Status bar
         self.statusBar().showMessage("Sistem hazır - Masa seçin")
+        
+        # Arka planda veritabanı işi sürerken meşgul göstergesi
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(120)
+        self.busy_indicator.setVisible(False)
+        self.statusBar().addPermanentWidget(self.busy_indicator)
+        self.db_executor.busy_changed.connect(self.busy_indicator.setVisible)
         self.statusBar().setStyleSheet("""
             QStatusBar {
                 background-color: #f0f0f0;
@@ -186,6 +171,8 @@ class MainWindow(QMainWindow):
         
         # Yardım menüsü
         help_menu = menubar.addMenu('Yardım')
+        diagnostics_action = help_menu.addAction('Sorgu İstatistikleri')
+        diagnostics_action.triggered.connect(self.open_diagnostics)
         about_action = help_menu.addAction('Hakkında')
         about_action.triggered.connect(self.show_about)
     
@@ -216,62 +203,15 @@ class MainWindow(QMainWindow):
         layout.setSpacing(15)
         layout.setContentsMargins(15, 20, 15, 15)
         
-        # Masa butonları
-        self.table_buttons = {}
-        table_layout = QGridLayout()
-        table_layout.setSpacing(8)
-        
-        # 20 masa için butonlar oluştur
-        for i in range(1, 21):
-            btn = QPushButton(f"🍽️\nMasa {i}")
-            btn.setMinimumSize(90, 70)
-            btn.setMaximumSize(90, 70)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                        stop:0 #3498db, stop:1 #2980b9);
-                    color: white;
-                    border: 2px solid #2980b9;
-                    border-radius: 8px;
-                    font-weight: bold;
-                    font-size: 11px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                        stop:0 #5dade2, stop:1 #3498db);
-                    border-color: #5dade2;
-                }
-                QPushButton:pressed {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                        stop:0 #2980b9, stop:1 #1f618d);
-                }
-                QPushButton:disabled {
-                    background: #bdc3c7;
-                    border-color: #95a5a6;
-                    color: #7f8c8d;
-                }
-            """)
-            btn.clicked.connect(lambda checked, table_no=i: self.select_table(table_no))
-            self.table_buttons[i] = btn
-            
-            row = (i - 1) // 4
-            col = (i - 1) % 4
-            table_layout.addWidget(btn, row, col)
-        
-        layout.addLayout(table_layout)
+        # Masa butonları kat başına sekmelerde, sekme ilk açıldığında oluşturulur
+        self.floor_tabs = QTabWidget()
+        self.floor_tabs.currentChanged.connect(self.on_floor_tab_changed)
+        layout.addWidget(self.floor_tabs, 1)
         
         # Masa durumu
         self.table_status_label = QLabel("🔍 Masa seçin")
         self.table_status_label.setAlignment(Qt.AlignCenter)
-        self.table_status_label.setStyleSheet("""
-            color: #e74c3c; 
-            font-weight: bold; 
-            font-size: 13px;
-            padding: 8px;
-            background-color: #fadbd8;
-            border: 1px solid #f1948a;
-            border-radius: 6px;
-        """)
+        self.table_status_label.setObjectName('tableStatus')
         layout.addWidget(self.table_status_label)
         
         # Yeni sipariş butonu
@@ -397,9 +337,12 @@ class MainWindow(QMainWindow):
         order_tab = self.create_order_tab()
         tab_widget.addTab(order_tab, "➕ Sipariş Ekle")
         
-        # Sipariş listesi sekmesi
-        order_list_tab = self.create_order_list_tab()
-        tab_widget.addTab(order_list_tab, "📋 Sipariş Listesi")
+        # Sipariş listesi sekmesi görünmediği sürece boş bir kap olarak kalır
+        self.order_list_tab = QWidget()
+        QVBoxLayout(self.order_list_tab).setContentsMargins(0, 0, 0, 0)
+        tab_widget.addTab(self.order_list_tab, "📋 Sipariş Listesi")
+        tab_widget.currentChanged.connect(self.on_order_tab_changed)
+        self.order_tabs = tab_widget
         
         layout.addWidget(tab_widget)
         
@@ -574,6 +517,8 @@ class MainWindow(QMainWindow):
                 border-color: #007bff;
             }
         """)
+        # Ürün seçildiğinde fiyatı güncelle
+        self.product_combo.currentTextChanged.connect(self.update_price_display)
         product_layout.addWidget(self.product_combo)
         
         layout.addWidget(product_group)
@@ -745,13 +690,15 @@ class MainWindow(QMainWindow):
         """)
         table_layout = QVBoxLayout(table_group)
         
-        self.order_table = QTableWidget()
-        self.order_table.setColumnCount(5)
-        self.order_table.setHorizontalHeaderLabels(["🍽️ Ürün", "🔢 Adet", "💰 Birim Fiyat", "💵 Toplam", "📝 Notlar"])
+        self.order_table = QTableView()
+        self.order_table.setModel(self.order_model)
+        self.order_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.order_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.order_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         
         # Tablo ayarları
         self.order_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 2px solid #dee2e6;
                 border-radius: 8px;
@@ -759,11 +706,11 @@ class MainWindow(QMainWindow):
                 selection-background-color: #e3f2fd;
                 font-size: 13px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 10px;
                 border-bottom: 1px solid #f8f9fa;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #1976d2;
             }
@@ -808,7 +755,7 @@ class MainWindow(QMainWindow):
         button_layout = QHBoxLayout(button_group)
         button_layout.setSpacing(10)
         
-        self.remove_item_btn = QPushButton("🗑️ Seçili Ürünü Çıkar")
+        self.remove_item_btn = QPushButton("🗑️ Seçili Ürünleri Çıkar")
         self.remove_item_btn.setEnabled(False)
         self.remove_item_btn.setStyleSheet("""
             QPushButton {
@@ -833,9 +780,19 @@ class MainWindow(QMainWindow):
             }
         """)
         self.remove_item_btn.clicked.connect(self.remove_order_item)
+        self.order_table.selectionModel().selectionChanged.connect(self.on_order_selection_changed)
+        
+        # Seçili satırın adedi tek tek artırılıp azaltılır
+        self.decrease_qty_btn = QPushButton("➖")
+        self.decrease_qty_btn.setToolTip("Seçili ürünün adedini azalt")
+        self.decrease_qty_btn.setEnabled(False)
+        self.decrease_qty_btn.clicked.connect(lambda: self.change_item_quantity(-1))
+        self.increase_qty_btn = QPushButton("➕")
+        self.increase_qty_btn.setToolTip("Seçili ürünün adedini artır")
+        self.increase_qty_btn.setEnabled(False)
+        self.increase_qty_btn.clicked.connect(lambda: self.change_item_quantity(1))
         
         self.clear_order_btn = QPushButton("🧹 Siparişi Temizle")
-        self.clear_order_btn.setEnabled(False)
         self.clear_order_btn.setStyleSheet("""
             QPushButton {
                 background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
@@ -859,7 +816,10 @@ class MainWindow(QMainWindow):
             }
         """)
         self.clear_order_btn.clicked.connect(self.clear_order)
+        self.clear_order_btn.setEnabled(self.clear_order_enabled)
         
+        button_layout.addWidget(self.decrease_qty_btn)
+        button_layout.addWidget(self.increase_qty_btn)
         button_layout.addWidget(self.remove_item_btn)
         button_layout.addWidget(self.clear_order_btn)
         
@@ -867,48 +827,229 @@ class MainWindow(QMainWindow):
         
         return widget
     
+    def on_order_tab_changed(self, index):
+        """Sipariş listesi sekmesi ilk açıldığında içeriğini oluştur"""
+        if self.order_tabs.widget(index) is self.order_list_tab and self.order_table is None:
+            self.order_list_tab.layout().addWidget(self.create_order_list_tab())
+    
+    def set_clear_order_enabled(self, enabled):
+        """Siparişi temizle butonunun durumu (sekme henüz oluşturulmamış olabilir)"""
+        self.clear_order_enabled = enabled
+        if self.clear_order_btn is not None:
+            self.clear_order_btn.setEnabled(enabled)
+    
     def connect_database(self):
-        """Veritabanına bağlan"""
+        """Veritabanına bağlan; ulaşılamazsa son yerel kopyayla çevrimdışı aç"""
         if self.db.connect():
-            self.db.create_tables()
-            self.load_categories()
-            self.statusBar().showMessage("Veritabanına bağlandı")
+            self.start_services()
+        elif self.start_offline():
+            self.statusBar().showMessage("⚠️ Sunucuya ulaşılamıyor: işlemler yerel günlüğe yazılıyor")
         else:
             QMessageBox.critical(self, "Hata", "Veritabanına bağlanılamadı!")
+        
+        self.replayer.online_changed.connect(self.on_online_changed)
+        self.replayer.synced.connect(self.on_journal_synced)
+        self.replayer.start()
+    
+    def start_services(self):
+        """Sunucu bağlantısı gerektiren yükleme ve izleyicileri başlat (bir kez)"""
+        if self.services_started:
+            return
+        self.services_started = True
+        self.statusBar().showMessage("Veritabanı hazırlanıyor...")
+        self.db_executor.submit(self.load_server_state, on_done=self.on_server_ready,
+                                on_error=self.on_server_start_failed)
+    
+    def load_server_state(self):
+        """Şemayı güncelle, değişiklik başlangıcını ve masaları getir (arka planda çalışır)"""
+        # Şema güncelse yalnızca sürüm okunur, DDL çalıştırılmaz
+        self.db.migrate()
+        # Başlangıç noktası masalardan önce okunur; arada gelen değişiklik kaçmaz
+        return self.db.get_last_change_id(), self.db.get_tables()
+    
+    def on_server_start_failed(self, error):
+        """Hazırlık yarıda kaldıysa bir sonraki bağlantıda yeniden dene"""
+        self.services_started = False
+        self.statusBar().showMessage(f"Veritabanı hazırlanamadı: {error}")
+    
+    def on_server_ready(self, state):
+        """Şema hazır olunca menüyü, masaları ve izleyicileri başlat"""
+        last_change_id, tables = state
+        self.db_executor.submit(self.catalog.load, on_done=self.on_catalog_changed)
+        self.load_table_statuses(tables)
+        
+        # Diğer terminallerdeki masa ve sipariş değişikliklerini izle
+        self.change_feed.table_status_changed.connect(self.on_remote_table_status)
+        self.change_feed.order_total_changed.connect(self.on_remote_order_total)
+        self.change_feed.order_lines_added.connect(self.on_remote_lines_added)
+        self.change_feed.order_lines_removed.connect(self.on_remote_lines_removed)
+        self.change_feed.order_lines_updated.connect(self.on_remote_lines_updated)
+        self.change_feed.order_closed.connect(self.on_remote_order_closed)
+        self.change_feed.start(last_change_id)
+        
+        # Yazdırma kuyruğu
+        self.print_spooler.job_printed.connect(
+            lambda job_id: self.statusBar().showMessage("Adisyon yazdırıldı"))
+        self.print_spooler.job_failed.connect(
+            lambda job_id, error: self.statusBar().showMessage(f"Yazdırma hatası, yeniden denenecek: {error}"))
+        self.print_spooler.start()
+        self.db_executor.submit(self.db.prune_changes)
+        
+        # Diğer terminallerdeki menü değişikliklerini yokla
+        self.catalog_timer = QTimer(self)
+        self.catalog_timer.timeout.connect(self.poll_catalog)
+        self.catalog_timer.start(APP_CONFIG['catalog_poll_interval'] * 1000)
+        self.statusBar().showMessage("Veritabanına bağlandı")
+    
+    def start_offline(self):
+        """Menüyü ve masaları son bağlantıda saklanan yerel kopyadan yükle"""
+        tables = self.journal.load_snapshot('masalar')
+        if not tables or not self.catalog.load_snapshot(self.journal.load_snapshot('katalog')):
+            return False
+        self.on_catalog_changed(True)
+        self.tables.load([tuple(row) for row in tables])
+        self.build_floor_tabs()
+        return True
+    
+    def on_online_changed(self, online):
+        """Sunucu bağlantısı koptuğunda veya yeniden kurulduğunda"""
+        if not online:
+            self.statusBar().showMessage("⚠️ Sunucuya ulaşılamıyor: işlemler yerel günlüğe yazılıyor")
+            return
+        if self.services_started:
+            self.poll_catalog()
+        else:
+            self.start_services()
+        self.statusBar().showMessage("Sunucu bağlantısı yeniden kuruldu")
+    
+    def on_journal_synced(self, count):
+        """Çevrimdışı işlemler sunucuya yazıldığında seçili masayı sunucudan yenile"""
+        self.statusBar().showMessage(f"Çevrimdışı {count} işlem sunucuya aktarıldı")
+        if self.selected_table_no is not None:
+            self.db_executor.submit(self.load_table_state, self.selected_table_no, key='table',
+                                    on_done=self.check_existing_order)
+    
+    def poll_catalog(self):
+        """Katalog sürümünü arka planda kontrol et"""
+        self.db_executor.submit(self.catalog.refresh_if_changed, key='catalog',
+                                on_done=self.on_catalog_changed)
+    
+    def on_catalog_changed(self, changed):
+        """Katalog yüklendiğinde veya değiştiğinde menüyü yenile"""
+        if changed:
+            self.load_categories()
+            self.load_products()
+            if self.catalog.version is not None:
+                self.journal.save_snapshot('katalog', self.catalog.snapshot())
     
     def load_categories(self):
         """Kategorileri yükle"""
-        categories = self.db.get_categories()
+        categories = self.catalog.get_categories()
         if categories:
+            selected = self.category_combo.currentData()
+            self.category_combo.blockSignals(True)
             self.category_combo.clear()
             self.category_combo.addItem("Tüm Kategoriler", 0)
             for cat_id, cat_name in categories:
                 self.category_combo.addItem(cat_name, cat_id)
+            index = self.category_combo.findData(selected)
+            self.category_combo.setCurrentIndex(max(index, 0))
+            self.category_combo.blockSignals(False)
     
     def load_products(self):
         """Ürünleri yükle"""
+        # Tüm kategoriler için 0, ürünler bellekteki katalogdan gelir
         category_id = self.category_combo.currentData()
-        
-        if category_id == 0:  # Tüm kategoriler
-            products = self.db.get_products()
-        else:
-            query = """
-                SELECT u.id, u.ad, k.ad as kategori, u.fiyat, u.aciklama 
-                FROM urunler u 
-                JOIN kategoriler k ON u.kategori_id = k.id 
-                WHERE u.aktif = TRUE AND u.kategori_id = %s
-                ORDER BY u.ad
-            """
-            products = self.db.execute_query(query, (category_id,))
+        products = self.catalog.get_products(category_id)
         
         self.product_combo.clear()
         if products:
             for product in products:
                 product_id, name, category, price, description = product
                 self.product_combo.addItem(f"{name} - {price:.2f} TL", (product_id, price))
-        
-        # Ürün seçildiğinde fiyatı güncelle
-        self.product_combo.currentTextChanged.connect(self.update_price_display)
+    
+    def load_table_statuses(self, tables):
+        """Masa indeksini bir kez yükle (sonrası değişiklik günlüğünden gelir)"""
+        self.tables.load(tables)
+        if tables:
+            self.journal.save_snapshot('masalar', tables)
+        self.build_floor_tabs()
+    
+    def build_floor_tabs(self):
+        """Her kat için boş bir sekme aç; butonlar sekme görüntülenince oluşturulur"""
+        self.floor_tabs.blockSignals(True)
+        self.floor_tabs.clear()
+        self.table_buttons = {}
+        self.built_floors = set()
+        for floor in self.tables.floor_names():
+            self.add_floor_tab(floor)
+        self.floor_tabs.blockSignals(False)
+        self.on_floor_tab_changed(self.floor_tabs.currentIndex())
+    
+    def add_floor_tab(self, floor):
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setFrameShape(QFrame.NoFrame)
+        return self.floor_tabs.addTab(scroll, floor)
+    
+    def on_floor_tab_changed(self, index):
+        """Kat sekmesi açıldığında butonlarını (bir kez) oluştur"""
+        if index < 0:
+            return
+        floor = self.floor_tabs.tabText(index)
+        if floor not in self.built_floors:
+            self.build_floor(index, floor)
+    
+    def build_floor(self, index, floor):
+        """Katın bölümlerini ve masa butonlarını oluştur"""
+        content = QWidget()
+        content_layout = QVBoxLayout(content)
+        content_layout.setSpacing(10)
+        
+        for section, table_numbers in self.tables.sections(floor):
+            section_label = QLabel(section)
+            section_label.setStyleSheet("color: #2c3e50; font-weight: bold; font-size: 12px;")
+            content_layout.addWidget(section_label)
+            
+            grid = QGridLayout()
+            grid.setSpacing(8)
+            for position, table_no in enumerate(table_numbers):
+                btn = QPushButton(f"🍽️\nMasa {table_no}")
+                btn.setMinimumSize(90, 70)
+                btn.setMaximumSize(90, 70)
+                btn.setObjectName('tableButton')
+                btn.clicked.connect(lambda checked, table_no=table_no: self.select_table(table_no))
+                self.table_buttons[table_no] = btn
+                self.style_table_button(table_no)
+                grid.addWidget(btn, position // 4, position % 4)
+            content_layout.addLayout(grid)
+        
+        content_layout.addStretch()
+        self.floor_tabs.widget(index).setWidget(content)
+        self.built_floors.add(floor)
+    
+    def add_table(self, row):
+        """Sonradan eklenen masayı indekse ve (açılmışsa) katına ekle"""
+        if row is None:
+            return
+        self.tables.add(row)
+        floor = self.tables.floor_of(row[1])
+        floors = [self.floor_tabs.tabText(index) for index in range(self.floor_tabs.count())]
+        if floor not in floors:
+            self.add_floor_tab(floor)
+        elif floor in self.built_floors:
+            # Açılmış katı yeni masayla birlikte yeniden oluştur
+            self.build_floor(floors.index(floor), floor)
+    
+    def style_table_button(self, table_no):
+        """Masa butonunun durumunu seçim ve doluluğa göre ayarla (değişmediyse dokunma)"""
+        btn = self.table_buttons.get(table_no)
+        if btn is None:
+            return
+        if table_no == self.selected_table_no:
+            set_state(btn, 'selected')
+        else:
+            set_state(btn, TABLE_STATES.get(self.tables.status(table_no), 'free'))
     
     def update_price_display(self):
         """Ürün seçildiğinde fiyatı güncelle"""
@@ -923,88 +1064,55 @@ class MainWindow(QMainWindow):
     
     def select_table(self, table_no):
         """Masa seç"""
-        self.current_table_id = table_no
-        
-        # Masa durumunu güncelle
-        tables = self.db.get_tables()
-        for table in tables:
-            if table[1] == table_no:  # masa_no
-                table_id, _, status = table
-                self.current_table_id = table_id
-                break
+        self.current_table_id = None
+        self.new_order_btn.setEnabled(False)
         
         # Buton renklerini güncelle
-        for btn_no, btn in self.table_buttons.items():
-            if btn_no == table_no:
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                            stop:0 #e74c3c, stop:1 #c0392b);
-                        color: white;
-                        border: 2px solid #c0392b;
-                        border-radius: 8px;
-                        font-weight: bold;
-                        font-size: 11px;
-                    }
-                """)
-            else:
-                btn.setStyleSheet("""
-                    QPushButton {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                            stop:0 #3498db, stop:1 #2980b9);
-                        color: white;
-                        border: 2px solid #2980b9;
-                        border-radius: 8px;
-                        font-weight: bold;
-                        font-size: 11px;
-                    }
-                    QPushButton:hover {
-                        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                            stop:0 #5dade2, stop:1 #3498db);
-                        border-color: #5dade2;
-                    }
-                """)
+        previous_no = self.selected_table_no
+        self.selected_table_no = table_no
+        self.style_table_button(previous_no)
+        self.style_table_button(table_no)
         
         self.table_status_label.setText(f"✅ Masa {table_no} seçildi")
-        self.table_status_label.setStyleSheet("""
-            color: #27ae60; 
-            font-weight: bold; 
-            font-size: 13px;
-            padding: 8px;
-            background-color: #d5f4e6;
-            border: 1px solid #a9dfbf;
-            border-radius: 6px;
-        """)
-        self.new_order_btn.setEnabled(True)
+        set_state(self.table_status_label, 'selected')
         
-        # Mevcut siparişi kontrol et
-        self.check_existing_order()
+        # Masa ve mevcut sipariş arka planda yüklenir
+        self.db_executor.submit(self.load_table_state, table_no, key='table',
+                                on_done=self.check_existing_order)
     
-    def check_existing_order(self):
+    def load_table_state(self, table_no):
+        """Masanın ID'sini, aktif siparişini ve sipariş satırlarını getir (arka planda çalışır)"""
+        table_id = self.tables.table_id(table_no)
+        if table_id is None:
+            table = self.db.get_table(table_no)
+            table_id = table[0] if table else table_no
+        
+        # Sunucuya henüz yazılmamış çevrimdışı sipariş önceliklidir
+        order, items = self.journal.local_state(table_id)
+        if order is None and self.db.online:
+            order = self.db.get_active_order(table_id)
+            items = self.db.get_order_details(order[0]) if order else []
+        return table_id, order, items
+    
+    def check_existing_order(self, state):
         """Mevcut siparişi kontrol et"""
-        if not self.current_table_id:
-            return
-        
-        query = """
-            SELECT id, toplam_tutar, durum 
-            FROM siparisler 
-            WHERE masa_id = %s AND durum = 'aktif'
-        """
-        result = self.db.execute_query(query, (self.current_table_id,))
+        table_id, order, items = state
+        self.current_table_id = table_id
+        self.new_order_btn.setEnabled(True)
         
-        if result:
-            order_id, total, status = result[0]
+        if order:
+            order_id, total, status = order
             self.current_order_id = order_id
-            self.order_id_label.setText(f"Sipariş: #{order_id}")
+            self.order_id_label.setText(self.order_label(order_id))
             self.order_total_label.setText(f"Toplam: {total:.2f} TL")
-            self.load_order_items()
+            self.order_model.set_items(items)
             self.payment_btn.setEnabled(True)
             self.print_bill_btn.setEnabled(True)
         else:
             self.current_order_id = None
             self.order_id_label.setText("Sipariş: Yok")
             self.order_total_label.setText("Toplam: 0.00 TL")
-            self.order_table.setRowCount(0)
+            self.order_model.clear()
             self.payment_btn.setEnabled(False)
             self.print_bill_btn.setEnabled(False)
     
@@ -1014,17 +1122,48 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Uyarı", "Lütfen önce bir masa seçin!")
             return
         
-        order_id = self.db.create_order(self.current_table_id)
+        client_id = new_client_id()
+        table_id, table_no = self.current_table_id, self.selected_table_no
+        if not self.db.online:
+            self.on_order_created(table_id, table_no, client_id, None)
+            return
+        # Sipariş yazılırken ikinci tıklama ikinci sipariş açmasın
+        self.new_order_btn.setEnabled(False)
+        self.db_executor.submit(
+            self.db.create_order, table_id, client_id,
+            on_done=lambda order_id: self.on_order_created(table_id, table_no, client_id, order_id))
+    
+    def on_order_created(self, table_id, table_no, client_id, order_id):
+        """Sipariş açıldığında (sunucuya yazılamadıysa günlüğe alınarak) ekranı hazırla"""
+        if table_id != self.current_table_id:
+            # Bu arada başka masa seçildi; sipariş açıldı ama ekrana yüklenmez
+            if order_id:
+                self.tables.set_status(table_no, 'dolu')
+                self.style_table_button(table_no)
+            else:
+                QMessageBox.critical(self, "Hata", f"Masa {table_no} için sipariş oluşturulamadı!")
+            return
+        self.new_order_btn.setEnabled(True)
+        
+        if order_id is None and not self.db.online:
+            if self.tables.status(table_no) == 'dolu':
+                # Masanın sunucudaki siparişi çevrimdışıyken görülemez
+                QMessageBox.warning(self, "Uyarı", "Masanın sunucuda açık siparişi var; "
+                                    "bağlantı gelene kadar yeni sipariş açılamaz!")
+                return
+            order_id = self.journal.record_order(table_id, client_id)
+        
         if order_id:
             self.current_order_id = order_id
-            self.order_id_label.setText(f"Sipariş: #{order_id}")
+            self.tables.set_status(table_no, 'dolu')
+            self.order_id_label.setText(self.order_label(order_id))
             self.order_total_label.setText("Toplam: 0.00 TL")
-            self.order_table.setRowCount(0)
+            self.order_model.clear()
             self.payment_btn.setEnabled(True)
             self.print_bill_btn.setEnabled(True)
             self.add_product_btn.setEnabled(True)
-            self.clear_order_btn.setEnabled(True)
-            self.statusBar().showMessage(f"Yeni sipariş oluşturuldu: #{order_id}")
+            self.set_clear_order_enabled(True)
+            self.statusBar().showMessage(f"Yeni sipariş oluşturuldu: {self.order_label(order_id)}")
         else:
             QMessageBox.critical(self, "Hata", "Sipariş oluşturulamadı!")
     
@@ -1043,49 +1182,100 @@ class MainWindow(QMainWindow):
         quantity = self.quantity_spin.value()
         notes = self.notes_text.toPlainText().strip()
         
-        if self.db.add_order_item(self.current_order_id, product_id, quantity, notes):
-            self.db.update_order_total(self.current_order_id)
-            self.load_order_items()
-            self.update_order_total()
-            self.notes_text.clear()
-            self.quantity_spin.setValue(1)
-            self.statusBar().showMessage("Ürün siparişe eklendi")
-        else:
-            QMessageBox.critical(self, "Hata", "Ürün eklenemedi!")
+        order_id = self.current_order_id
+        self.db_executor.submit(self.add_order_line, order_id, product_id, quantity, notes,
+                                on_done=lambda result: self.on_product_added(order_id, result))
     
-    def load_order_items(self):
-        """Sipariş ürünlerini yükle"""
-        if not self.current_order_id:
+    def add_order_line(self, order_id, product_id, quantity, notes):
+        """Satırı sunucuya yaz; ulaşılamıyorsa çevrimdışı günlüğe al (arka planda çalışır)"""
+        client_id = new_client_id()
+        if isinstance(order_id, int) and self.db.online:
+            result = self.db.add_order_line(order_id, product_id, quantity, notes, client_id)
+            if result or self.db.online:
+                return result
+        product = self.catalog.get_product(product_id)
+        if product is None:
+            return None
+        # Toplam, çevrimdışıyken ekrandaki satırlardan hesaplanır
+        return self.journal.record_line(order_id, product, quantity, notes, client_id), None
+    
+    def order_label(self, order_id):
+        """Sunucu siparişi için numarası, çevrimdışı açılan sipariş için işaret"""
+        if isinstance(order_id, int):
+            return f"Sipariş: #{order_id}"
+        return "Sipariş: (çevrimdışı)"
+    
+    def require_server_order(self):
+        """Yalnızca sunucudaki siparişte yapılabilen işlemler için kontrol"""
+        if self.db.online and isinstance(self.current_order_id, int):
+            return True
+        QMessageBox.warning(self, "Uyarı", "Bu işlem sunucu bağlantısı gerektirir; "
+                            "bağlantı gelince tekrar deneyin.")
+        return False
+    
+    def on_product_added(self, order_id, result):
+        """Ürün ekleme işlemi tamamlandığında"""
+        if not result:
+            QMessageBox.critical(self, "Hata", "Ürün eklenemedi!")
             return
         
-        items = self.db.get_order_details(self.current_order_id)
-        self.order_table.setRowCount(len(items))
-        
-        for row, item in enumerate(items):
-            item_id, product_name, quantity, unit_price, total_price, notes = item
-            
-            self.order_table.setItem(row, 0, QTableWidgetItem(product_name))
-            self.order_table.setItem(row, 1, QTableWidgetItem(str(quantity)))
-            self.order_table.setItem(row, 2, QTableWidgetItem(f"{unit_price:.2f}"))
-            self.order_table.setItem(row, 3, QTableWidgetItem(f"{total_price:.2f}"))
-            self.order_table.setItem(row, 4, QTableWidgetItem(notes or ""))
-    
-    def update_order_total(self):
-        """Sipariş toplamını güncelle"""
-        if not self.current_order_id:
+        # Bu arada başka masaya geçildiyse ekranı değiştirme
+        if order_id != self.current_order_id:
             return
         
-        query = "SELECT toplam_tutar FROM siparisler WHERE id = %s"
-        result = self.db.execute_query(query, (self.current_order_id,))
+        # Dönen satır ve toplamla tabloyu yeniden sorgulamadan güncelle; aynı ürün
+        # aynı notla eklendiyse mevcut satırın adedi artmıştır
+        item, total = result
+        self.order_model.upsert_item(item)
+        if total is None:
+            total = self.order_model.total()
+        self.order_total_label.setText(f"Toplam: {total:.2f} TL")
+        self.notes_text.clear()
+        self.quantity_spin.setValue(1)
+        self.statusBar().showMessage("Ürün siparişe eklendi")
+    
+    def on_order_selection_changed(self):
+        """Sipariş satırı seçildiğinde çıkarma ve adet butonlarını etkinleştir"""
+        selected = len(self.order_table.selectionModel().selectedRows())
+        self.remove_item_btn.setEnabled(selected > 0)
+        self.increase_qty_btn.setEnabled(selected == 1)
+        self.decrease_qty_btn.setEnabled(selected == 1)
+    
+    def change_item_quantity(self, delta):
+        """Seçili satırın adedini tek güncellemeyle artır veya azalt"""
+        rows = self.order_table.selectionModel().selectedRows()
+        if len(rows) != 1 or not self.current_order_id:
+            return
+        if not self.require_server_order():
+            return
+        row = rows[0].row()
+        if self.order_model.quantity(row) + delta < 1:
+            # Son adet azaltılınca satır (onayla) çıkarılır
+            self.remove_order_item()
+            return
         
-        if result:
-            total = result[0][0]
-            self.order_total_label.setText(f"Toplam: {total:.2f} TL")
+        order_id = self.current_order_id
+        self.db_executor.submit(self.db.change_order_item_quantity, order_id,
+                                self.order_model.item_id(row), delta,
+                                on_done=lambda result: self.on_quantity_changed(order_id, result))
+    
+    def on_quantity_changed(self, order_id, result):
+        """Adet güncellemesi tamamlandığında satırı ve toplamı güncelle"""
+        if not result:
+            QMessageBox.critical(self, "Hata", "Adet güncellenemedi!")
+            return
+        if order_id != self.current_order_id:
+            return
+        item, total = result
+        self.order_model.upsert_item(item)
+        self.order_total_label.setText(f"Toplam: {total:.2f} TL")
     
     def remove_order_item(self):
-        """Seçili ürünü siparişten çıkar"""
-        current_row = self.order_table.currentRow()
-        if current_row < 0:
+        """Seçili ürünleri siparişten çıkar"""
+        rows = [index.row() for index in self.order_table.selectionModel().selectedRows()]
+        # Satırlar modeldeki sipariş detay ID'leriyle eşlenir, sunucuya sorulmaz
+        item_ids = self.order_model.item_ids(rows)
+        if not item_ids:
             QMessageBox.warning(self, "Uyarı", "Lütfen çıkarılacak ürünü seçin!")
             return
         
@@ -1093,57 +1283,57 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Uyarı", "Aktif sipariş bulunamadı!")
             return
         
-        # Sipariş detay ID'sini al
-        query = """
-            SELECT sd.id 
-            FROM siparis_detaylari sd
-            WHERE sd.siparis_id = %s
-            ORDER BY sd.created_at
-            LIMIT 1 OFFSET %s
-        """
-        result = self.db.execute_query(query, (self.current_order_id, current_row))
-        
-        if not result:
-            QMessageBox.warning(self, "Uyarı", "Sipariş detayı bulunamadı!")
+        if not self.require_server_order():
             return
         
-        item_id = result[0][0]
-        
         # Onay al
-        reply = QMessageBox.question(self, "Onay", 
-                                   "Bu ürünü siparişten çıkarmak istediğinizden emin misiniz?",
-                                   QMessageBox.Yes | QMessageBox.No)
+        question = ("Bu ürünü siparişten çıkarmak istediğinizden emin misiniz?"
+                    if len(item_ids) == 1 else
+                    f"Seçili {len(item_ids)} ürünü siparişten çıkarmak istediğinizden emin misiniz?")
+        reply = QMessageBox.question(self, "Onay", question, QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # Sipariş detayını sil
-            if self.db.remove_order_item(item_id):
-                # Toplamı güncelle
-                self.db.update_order_total(self.current_order_id)
-                self.load_order_items()
-                self.update_order_total()
-                self.statusBar().showMessage("Ürün siparişten çıkarıldı")
-            else:
-                QMessageBox.critical(self, "Hata", "Ürün çıkarılamadı!")
+            # Satırları tek ifadeyle sil; toplam aynı işlemde düşülür
+            order_id = self.current_order_id
+            self.db_executor.submit(
+                self.db.remove_order_items, order_id, item_ids,
+                on_done=lambda total: self.on_items_removed(order_id, item_ids, total))
+    
+    def on_items_removed(self, order_id, item_ids, total):
+        """Satırlar çıkarıldığında modeli ve toplamı güncelle"""
+        if total is None:
+            QMessageBox.critical(self, "Hata", "Ürün çıkarılamadı!")
+            return
+        if order_id != self.current_order_id:
+            return
+        self.order_model.remove_items(item_ids)
+        self.order_total_label.setText(f"Toplam: {total:.2f} TL")
+        self.statusBar().showMessage(f"{len(item_ids)} ürün siparişten çıkarıldı")
     
     def clear_order(self):
         """Siparişi temizle"""
-        if not self.current_order_id:
+        if not self.current_order_id or not self.require_server_order():
             return
         
         reply = QMessageBox.question(self, "Onay", "Siparişi temizlemek istediğinizden emin misiniz?",
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # Sipariş detaylarını sil
-            query = "DELETE FROM siparis_detaylari WHERE siparis_id = %s"
-            self.db.execute_query(query, (self.current_order_id,))
-            
-            # Toplamı güncelle
-            self.db.update_order_total(self.current_order_id)
-            
-            self.load_order_items()
-            self.update_order_total()
-            self.statusBar().showMessage("Sipariş temizlendi")
+            # Sipariş detaylarını sil ve toplamı sıfırla
+            order_id = self.current_order_id
+            self.db_executor.submit(self.db.clear_order_items, order_id,
+                                    on_done=lambda ok: self.on_order_cleared(order_id, ok))
+    
+    def on_order_cleared(self, order_id, ok):
+        """Sipariş temizlendiğinde satırları ve toplamı sıfırla"""
+        if not ok:
+            QMessageBox.critical(self, "Hata", "Sipariş temizlenemedi!")
+            return
+        if order_id != self.current_order_id:
+            return
+        self.order_model.clear()
+        self.order_total_label.setText("Toplam: 0.00 TL")
+        self.statusBar().showMessage("Sipariş temizlendi")
     
     def process_payment(self):
         """Ödeme işlemi"""
@@ -1151,33 +1341,62 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Uyarı", "Önce bir sipariş oluşturun!")
             return
         
-        # Sipariş toplamını al
-        query = "SELECT toplam_tutar FROM siparisler WHERE id = %s"
-        result = self.db.execute_query(query, (self.current_order_id,))
-        
-        if not result:
-            QMessageBox.critical(self, "Hata", "Sipariş bilgileri alınamadı!")
+        # Sipariş toplamını ve alınmış kısmi ödemeleri arka planda al; aynı anahtar
+        # art arda tıklamada yalnızca son isteğin pencere açmasını sağlar
+        order_id = self.current_order_id
+        if isinstance(order_id, int) and self.db.online:
+            # Pencere iş sonucu sinyalinin içinde açılmaz; iş önce kapanır, meşgul göstergesi
+            # ve diğer işlerin sonuçları pencere açıkken beklemez
+            self.db_executor.submit(
+                self.db.get_order_balance, order_id, key='payment',
+                on_done=lambda balance: QTimer.singleShot(
+                    0, lambda: self.open_payment_dialog(order_id, balance)))
+        else:
+            self.open_payment_dialog(order_id, None)
+    
+    def open_payment_dialog(self, order_id, balance):
+        """Ödeme penceresini siparişin toplamı ve alınmış ödemeleriyle aç"""
+        if order_id != self.current_order_id:
             return
-        
-        order_total = result[0][0]
+        server_order = isinstance(order_id, int)
+        if balance is None:
+            if self.db.online and server_order:
+                QMessageBox.critical(self, "Hata", "Sipariş bilgileri alınamadı!")
+                return
+            # Çevrimdışı: toplam ekrandaki satırlardan hesaplanır
+            balance = (self.order_model.total(), 0)
+        order_total, paid_total = balance
         
         if order_total <= 0:
             QMessageBox.warning(self, "Uyarı", "Sipariş toplamı 0 TL!")
             return
         
         # Ödeme penceresini aç
-        dialog = PaymentDialog(self.current_order_id, order_total, self)
+        from payment_dialog import PaymentDialog
+        dialog = PaymentDialog(order_id, order_total, self, db=self.db,
+                               order_model=self.order_model, journal=self.journal,
+                               paid_total=paid_total, executor=self.db_executor)
         dialog.payment_completed.connect(self.on_payment_completed)
+        dialog.payment_added.connect(self.on_payment_added)
         dialog.exec_()
     
+    def on_payment_added(self, order_id, remaining):
+        """Kısmi ödeme alındığında kalan tutarı göster"""
+        self.statusBar().showMessage(f"Kısmi ödeme alındı - Kalan: {remaining:.2f} TL")
+    
     def print_bill(self):
         """Adisyon yazdır"""
         if not self.current_order_id:
             QMessageBox.warning(self, "Uyarı", "Önce bir sipariş oluşturun!")
             return
         
+        if not self.require_server_order():
+            return
+        
         # Adisyon yazdırma penceresini aç
-        dialog = BillPrintDialog(self.current_order_id, self)
+        from payment_dialog import BillPrintDialog
+        dialog = BillPrintDialog(self.current_order_id, self, db=self.db,
+                                 spooler=self.print_spooler, executor=self.db_executor)
         dialog.exec_()
     
     def on_payment_completed(self, order_id):
@@ -1188,61 +1407,108 @@ class MainWindow(QMainWindow):
         # Arayüzü sıfırla
         self.order_id_label.setText("Sipariş: Yok")
         self.order_total_label.setText("Toplam: 0.00 TL")
-        self.order_table.setRowCount(0)
+        self.order_model.clear()
         self.payment_btn.setEnabled(False)
         self.print_bill_btn.setEnabled(False)
         self.add_product_btn.setEnabled(False)
-        self.clear_order_btn.setEnabled(False)
+        self.set_clear_order_enabled(False)
         
         # Masa butonlarını sıfırla
-        for btn in self.table_buttons.values():
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                        stop:0 #3498db, stop:1 #2980b9);
-                    color: white;
-                    border: 2px solid #2980b9;
-                    border-radius: 8px;
-                    font-weight: bold;
-                    font-size: 11px;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, 
-                        stop:0 #5dade2, stop:1 #3498db);
-                    border-color: #5dade2;
-                }
-            """)
+        table_no = self.selected_table_no
+        self.selected_table_no = None
+        if table_no is not None:
+            self.tables.set_status(table_no, 'bos')
+            self.style_table_button(table_no)
         
         self.table_status_label.setText("🔍 Masa seçin")
-        self.table_status_label.setStyleSheet("""
-            color: #e74c3c; 
-            font-weight: bold; 
-            font-size: 13px;
-            padding: 8px;
-            background-color: #fadbd8;
-            border: 1px solid #f1948a;
-            border-radius: 6px;
-        """)
+        set_state(self.table_status_label, 'idle')
         self.new_order_btn.setEnabled(False)
         
         self.statusBar().showMessage("Ödeme tamamlandı, masa boşaltıldı")
     
+    def on_remote_table_status(self, table_id, status):
+        """Başka terminalde masa açıldığında veya boşaltıldığında"""
+        table_no = self.tables.table_no(table_id)
+        if table_no is None:
+            # Başka terminalde yeni eklenmiş masa; yalnızca o satırı getir
+            self.db_executor.submit(self.db.get_table_by_id, table_id, on_done=self.add_table)
+            return
+        self.tables.set_status(table_no, status)
+        self.style_table_button(table_no)
+        
+        # Seçili masada başka terminalden sipariş açıldıysa onu göster
+        if (status == 'dolu' and table_id == self.current_table_id
+                and not self.current_order_id):
+            self.db_executor.submit(self.load_table_state, table_no, key='table',
+                                    on_done=self.check_existing_order)
+    
+    def on_remote_order_total(self, order_id, total):
+        """Açık siparişin toplamı değiştiğinde"""
+        if order_id == self.current_order_id:
+            self.order_total_label.setText(f"Toplam: {total:.2f} TL")
+    
+    def on_remote_lines_added(self, order_id, item_ids):
+        """Açık siparişe eklenen satırları yalnızca ID ile getir"""
+        if order_id != self.current_order_id:
+            return
+        missing = [item_id for item_id in item_ids if self.order_model.row_of(item_id) < 0]
+        if missing:
+            self.db_executor.submit(self.db.get_order_lines, missing,
+                                    on_done=lambda rows: self.on_remote_lines_loaded(order_id, rows))
+    
+    def on_remote_lines_updated(self, order_id, changes):
+        """Açık siparişte adedi değişen satırları yalnızca ID ile yeniden getir"""
+        if order_id != self.current_order_id:
+            return
+        item_ids = [item_id for item_id, delta in changes]
+        self.db_executor.submit(self.db.get_order_lines, item_ids,
+                                on_done=lambda rows: self.on_remote_lines_loaded(order_id, rows))
+    
+    def on_remote_lines_loaded(self, order_id, rows):
+        if order_id != self.current_order_id:
+            return
+        for item in rows or []:
+            self.order_model.upsert_item(item)
+    
+    def on_remote_lines_removed(self, order_id, item_ids):
+        """Açık siparişten çıkarılan satırları tablodan kaldır"""
+        if order_id != self.current_order_id:
+            return
+        for item_id in item_ids:
+            self.order_model.remove_row(self.order_model.row_of(item_id))
+    
+    def on_remote_order_closed(self, order_id, table_id):
+        """Açık sipariş başka terminalde kapatıldığında"""
+        if order_id == self.current_order_id:
+            self.on_payment_completed(order_id)
+            self.statusBar().showMessage("Sipariş başka bir terminalde kapatıldı")
+    
     def open_product_management(self):
         """Ürün yönetimi penceresini aç"""
-        dialog = ProductManagementDialog(self)
+        from product_management import ProductManagementDialog
+        dialog = ProductManagementDialog(self, db=self.db, catalog=self.catalog)
         dialog.product_updated.connect(self.load_categories)
         dialog.product_updated.connect(self.load_products)
         dialog.exec_()
     
     def open_category_management(self):
         """Kategori yönetimi penceresini aç"""
-        dialog = CategoryManagementDialog(self)
+        from product_management import CategoryManagementDialog
+        dialog = CategoryManagementDialog(self, db=self.db, catalog=self.catalog)
         dialog.category_updated.connect(self.load_categories)
+        dialog.category_updated.connect(self.load_products)
         dialog.exec_()
     
     def open_reports(self):
         """Raporlar penceresini aç"""
-        dialog = ReportsDialog(self)
+        from reports_dialog import ReportsDialog
+        dialog = ReportsDialog(self, db=self.db)
+        dialog.exec_()
+    
+    def open_diagnostics(self):
+        """Sorgu istatistikleri penceresini aç"""
+        from diagnostics_dialog import DiagnosticsDialog
+        dialog = DiagnosticsDialog(self, db=self.db)
         dialog.exec_()
     
     def show_about(self):
@@ -1253,18 +1519,32 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Uygulama kapatılırken"""
+        self.change_feed.stop()
+        self.print_spooler.stop()
+        self.replayer.stop()
+        self.db_executor.shutdown()
         self.db.disconnect()
+        self.journal.close()
         event.accept()
 
 def main():
+    startup = StartupTimer(STARTED_AT)
+    startup.mark("içe aktarma")
     app = QApplication(sys.argv)
     
     # Uygulama stilini ayarla
     app.setStyle('Fusion')
+    app.setStyleSheet(APP_STYLESHEET)
     
-    window = MainWindow()
+    window = MainWindow(startup)
     window.show()
     
+    # İlk çizim olay döngüsü başlayınca yapılır; rapor ondan sonra yazılır
+    def first_paint():
+        startup.mark("ilk çizim")
+        startup.report()
+    QTimer.singleShot(0, first_paint)
+    
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
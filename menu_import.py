@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Toplu menü aktarımı ve fiyat güncelleme
+
+CSV (; veya , ayraçlı) ya da JSON dosyasındaki ürünler mevcut katalogla ad
+üzerinden eşleştirilir. Önce değişiklik listesi gösterilir (deneme), onaylanırsa
+tüm değişiklik tek işlemde yazılır:
+
+    python menu_import.py menu.csv                      # yalnızca farkı göster
+    python menu_import.py menu.csv --apply              # uygula
+    python menu_import.py menu.json --apply --deactivate-missing
+
+Kolonlar: ad, kategori, fiyat, aciklama, aktif, istasyon. Yalnızca ad ve fiyat
+verilen satırlar mevcut ürünün fiyatını günceller; eksik kolonlar ürünün mevcut
+değerini korur. istasyon yalnızca yeni açılan kategoriler için kullanılır.
+"""
+
+from database import DatabaseManager, STATIONS
+from decimal import Decimal, InvalidOperation
+import argparse
+import csv
+import json
+import os
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+TRUE_VALUES = ('1', 'evet', 'e', 'true', 'aktif', 'yes')
+FALSE_VALUES = ('0', 'hayir', 'hayır', 'h', 'false', 'pasif', 'no')
+
+class MenuImportError(ValueError):
+    """Dosyadaki satır okunamadı"""
+
+class MenuItem:
+    """Dosyadaki tek ürün; verilmeyen alanlar None"""
+    
+    def __init__(self, line, ad, fiyat, kategori=None, aciklama=None, aktif=None, istasyon=None):
+        self.line = line
+        self.ad = ad
+        self.fiyat = fiyat
+        self.kategori = kategori
+        self.aciklama = aciklama
+        self.aktif = aktif
+        self.istasyon = istasyon
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def _parse_price(value, line):
+    text = _text(value)
+    if text is None:
+        raise MenuImportError(f"{line}. satır: fiyat boş olamaz")
+    try:
+        price = Decimal(text.replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        raise MenuImportError(f"{line}. satır: geçersiz fiyat '{text}'")
+    if price < 0:
+        raise MenuImportError(f"{line}. satır: fiyat negatif olamaz")
+    return price.quantize(Decimal('0.01'))
+
+def _parse_active(value, line):
+    if isinstance(value, bool):
+        return value
+    text = _text(value)
+    if text is None:
+        return None
+    text = text.lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise MenuImportError(f"{line}. satır: aktif için geçersiz değer '{text}'")
+
+def parse_record(record, line):
+    """Sözlük biçimindeki satırı MenuItem'a çevir"""
+    record = {str(key).strip().lower(): value for key, value in record.items() if key}
+    ad = _text(record.get('ad'))
+    if ad is None:
+        raise MenuImportError(f"{line}. satır: ürün adı boş olamaz")
+    istasyon = _text(record.get('istasyon'))
+    if istasyon is not None and istasyon not in dict(STATIONS):
+        raise MenuImportError(f"{line}. satır: bilinmeyen istasyon '{istasyon}'")
+    return MenuItem(line, ad, _parse_price(record.get('fiyat'), line),
+                    kategori=_text(record.get('kategori')),
+                    aciklama=_text(record.get('aciklama')),
+                    aktif=_parse_active(record.get('aktif'), line),
+                    istasyon=istasyon)
+
+def read_menu(path):
+    """CSV veya JSON menü dosyasını oku, MenuItem listesi döndür"""
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, encoding='utf-8-sig') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('urunler', [])
+        if not isinstance(data, list):
+            raise MenuImportError("JSON dosyası ürün listesi içermeli")
+        records = enumerate(data, start=1)
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            delimiter = ';' if sample.count(';') >= sample.count(',') else ','
+            # Başlık satırı 1. satırdır, veriler 2'den başlar
+            records = list(enumerate(csv.DictReader(f, delimiter=delimiter), start=2))
+    
+    items = []
+    seen = {}
+    for line, record in records:
+        if not isinstance(record, dict):
+            raise MenuImportError(f"{line}. kayıt: nesne bekleniyordu")
+        item = parse_record(record, line)
+        key = item.ad.casefold()
+        if key in seen:
+            raise MenuImportError(f"{line}. satır: '{item.ad}' {seen[key]}. satırda da var")
+        seen[key] = line
+        items.append(item)
+    return items
+
+class ImportPlan:
+    """Dosya ile mevcut katalog arasındaki fark"""
+    
+    def __init__(self):
+        self.new_categories = []  # (ad, açıklama, istasyon)
+        self.new_products = []    # (ad, kategori, fiyat, açıklama, aktif)
+        self.updates = []         # (id, ad, kategori, fiyat, açıklama, aktif)
+        self.deactivated = []     # (id, ad)
+        self.unchanged = 0
+        self.diff = []            # insan okunur değişiklik satırları
+    
+    def is_empty(self):
+        return not (self.new_categories or self.new_products or self.updates or self.deactivated)
+    
+    def summary(self):
+        return (f"{len(self.new_categories)} yeni kategori, {len(self.new_products)} yeni ürün, "
+                f"{len(self.updates)} güncelleme, {len(self.deactivated)} pasif, "
+                f"{self.unchanged} değişmedi")
+    
+    def apply(self, db):
+        """Planı tek işlemde veritabanına yaz"""
+        return db.import_catalog(self.new_categories, self.new_products, self.updates,
+                                 [product_id for product_id, name in self.deactivated])
+
+def plan_import(db, items, deactivate_missing=False):
+    """Dosyadaki ürünleri katalogla karşılaştırıp ImportPlan oluştur"""
+    products = db.get_all_products()
+    categories = db.get_all_categories()
+    if products is None or categories is None:
+        raise RuntimeError("Mevcut katalog okunamadı")
+    
+    plan = ImportPlan()
+    category_names = {name.casefold(): name for category_id, name, description, station
+                      in categories}
+    # Aynı adlı birden çok kayıt varsa aktif olan ve en yenisi esas alınır
+    existing = {}
+    for row in products:
+        key = row[1].casefold()
+        if key not in existing or row[6] or not existing[key][6]:
+            existing[key] = row
+    
+    def category_of(item):
+        """Dosyadaki kategori adını katalogdaki yazımıyla döndür, yoksa yeni aç"""
+        key = item.kategori.casefold()
+        if key not in category_names:
+            category_names[key] = item.kategori
+            plan.new_categories.append((item.kategori, None, item.istasyon or 'mutfak'))
+            plan.diff.append(f"+ Kategori: {item.kategori}")
+        return category_names[key]
+    
+    for item in items:
+        current = existing.pop(item.ad.casefold(), None)
+        if current is None:
+            if item.kategori is None:
+                raise MenuImportError(f"{item.line}. satır: yeni ürün '{item.ad}' için kategori gerekli")
+            active = True if item.aktif is None else item.aktif
+            kategori = category_of(item)
+            plan.new_products.append((item.ad, kategori, item.fiyat, item.aciklama, active))
+            plan.diff.append(f"+ Ürün: {item.ad} ({kategori}) {item.fiyat:.2f} TL")
+            continue
+        
+        product_id, name, category_id, category, price, description, active = current
+        new = {
+            'kategori': category_of(item) if item.kategori else category,
+            'fiyat': item.fiyat,
+            'aciklama': description if item.aciklama is None else item.aciklama,
+            'aktif': bool(active) if item.aktif is None else item.aktif,
+        }
+        old = {'kategori': category, 'fiyat': Decimal(price).quantize(Decimal('0.01')),
+               'aciklama': description, 'aktif': bool(active)}
+        changes = [f"{field}: {old[field]} → {new[field]}" for field in old
+                   if old[field] != new[field]]
+        # Büyük/küçük harf düzeltmesi de güncelleme sayılır
+        if item.ad != name:
+            changes.insert(0, f"ad: {name} → {item.ad}")
+        if not changes:
+            plan.unchanged += 1
+            continue
+        plan.updates.append((product_id, item.ad, new['kategori'], new['fiyat'],
+                             new['aciklama'], new['aktif']))
+        plan.diff.append(f"~ {name}: " + ", ".join(changes))
+    
+    if deactivate_missing:
+        for product_id, name, *rest, active in existing.values():
+            if active:
+                plan.deactivated.append((product_id, name))
+                plan.diff.append(f"- Pasif: {name}")
+    return plan
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Toplu menü aktarımı ve fiyat güncelleme")
+    parser.add_argument('path', help="CSV veya JSON menü dosyası")
+    parser.add_argument('--apply', action='store_true',
+                        help="değişiklikleri yaz (verilmezse yalnızca fark gösterilir)")
+    parser.add_argument('--deactivate-missing', action='store_true',
+                        help="dosyada olmayan aktif ürünleri pasif yap")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        items = read_menu(args.path)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Dosya okunamadi: {e}")
+        return False
+    
+    db = DatabaseManager()
+    if not db.connect():
+        print("ERROR: Veritabani baglantisi basarisiz!")
+        return False
+    
+    try:
+        plan = plan_import(db, items, args.deactivate_missing)
+        for line in plan.diff:
+            print(line)
+        print(plan.summary())
+        
+        if plan.is_empty():
+            print("Degisiklik yok.")
+            return True
+        if not args.apply:
+            print("Deneme calismasi; yazmak icin --apply ekleyin.")
+            return True
+        if not plan.apply(db):
+            print("ERROR: Menu aktarilamadi, hicbir degisiklik yazilmadi!")
+            return False
+        print("SUCCESS: Menu guncellendi!")
+        return True
+    except (RuntimeError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return False
+    finally:
+        db.disconnect()
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
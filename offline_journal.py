@@ -0,0 +1,211 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from datetime import datetime
+from decimal import Decimal
+import json
+import sqlite3
+import threading
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Günlükteki işlem türleri (database.replay_operation ile aynı)
+OP_ORDER = 'siparis'
+OP_LINE = 'satir'
+OP_PAYMENT = 'odeme'
+
+def new_client_id():
+    """İşlem için istemci tarafında üretilen benzersiz kimlik"""
+    return str(uuid.uuid4())
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    raise TypeError(f"JSON'a çevrilemeyen değer: {value!r}")
+
+class OfflineJournal:
+    """Sunucuya ulaşılamazken yapılan işlemleri yerel SQLite dosyasında sırayla tutar"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Kayıt diske yazılmadan işlem tamamlanmış sayılmaz
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS islemler (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tur TEXT NOT NULL,
+                istemci_id TEXT NOT NULL UNIQUE,
+                veri TEXT NOT NULL,
+                durum TEXT NOT NULL DEFAULT 'bekliyor',
+                hata TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot (
+                anahtar TEXT PRIMARY KEY,
+                veri TEXT NOT NULL
+            )
+        """)
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+    
+    def _record(self, kind, client_id, payload):
+        now = datetime.now()
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR IGNORE INTO islemler (tur, istemci_id, veri, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (kind, client_id, json.dumps(payload, default=_json_default),
+                  now.strftime('%Y-%m-%d %H:%M:%S')))
+        logger.info(f"Çevrimdışı işlem günlüğe yazıldı: {kind} {client_id}")
+        return client_id
+    
+    def record_order(self, masa_id, client_id=None):
+        """Masada yeni sipariş aç; siparişin istemci kimliğini döndür"""
+        return self._record(OP_ORDER, client_id or new_client_id(),
+                            {'masa_id': masa_id, 'zaman': datetime.now()})
+    
+    def record_line(self, order_ref, product, quantity, notes, client_id=None):
+        """Siparişe satır ekle; get_order_details biçiminde satırı döndür"""
+        product_id, name, category, price, description = product
+        client_id = self._record(OP_LINE, client_id or new_client_id(), {
+            'siparis': order_ref, 'urun_id': product_id, 'ad': name, 'adet': quantity,
+            'birim_fiyat': price, 'notlar': notes,
+        })
+        return client_id, name, quantity, price, price * quantity, notes
+    
+    def record_payment(self, order_ref, odeme_tipi, tutar, client_id=None):
+        return self._record(OP_PAYMENT, client_id or new_client_id(),
+                            {'siparis': order_ref, 'odeme_tipi': odeme_tipi, 'tutar': tutar})
+    
+    def pending(self):
+        """Sunucuya henüz yazılmamış işlemleri sırasıyla (seq, tür, kimlik, veri) döndür"""
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT seq, tur, istemci_id, veri FROM islemler
+                WHERE durum = 'bekliyor' ORDER BY seq
+            """).fetchall()
+        return [(seq, kind, client_id, json.loads(payload)) for seq, kind, client_id, payload in rows]
+    
+    def has_pending(self):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM islemler WHERE durum = 'bekliyor' LIMIT 1").fetchone()
+        return row is not None
+    
+    def mark_done(self, seq):
+        with self._lock:
+            self.conn.execute("UPDATE islemler SET durum = 'yazildi' WHERE seq = ?", (seq,))
+    
+    def mark_failed(self, seq, hata):
+        """Sunucunun kabul etmediği işlemi elle incelenmek üzere ayır"""
+        with self._lock:
+            self.conn.execute("UPDATE islemler SET durum = 'hata', hata = ? WHERE seq = ?",
+                              (str(hata), seq))
+    
+    def local_state(self, masa_id):
+        """Masada çevrimdışı açılmış ve ödenmemiş sipariş: ((kimlik, toplam, 'aktif'), satırlar)"""
+        order_ref = None
+        lines = {}
+        for seq, kind, client_id, payload in self.pending():
+            if kind == OP_ORDER and payload['masa_id'] == masa_id:
+                order_ref = client_id
+                lines = {}
+            elif kind == OP_LINE and payload['siparis'] == order_ref:
+                price = Decimal(payload['birim_fiyat'])
+                lines[client_id] = (client_id, payload['ad'], payload['adet'], price,
+                                    price * payload['adet'], payload['notlar'])
+            elif kind == OP_PAYMENT and payload['siparis'] == order_ref:
+                order_ref = None
+        
+        if order_ref is None:
+            return None, []
+        items = list(lines.values())
+        total = sum((item[4] for item in items), Decimal('0'))
+        return (order_ref, total, 'aktif'), items
+    
+    def save_snapshot(self, key, value):
+        """Çevrimdışı açılış için son bilinen katalog/masa verisini sakla"""
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO snapshot (anahtar, veri) VALUES (?, ?)",
+                              (key, json.dumps(value, default=_json_default)))
+    
+    def load_snapshot(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT veri FROM snapshot WHERE anahtar = ?",
+                                    (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+class JournalReplayer(QObject):
+    """Sunucuya yeniden ulaşıldığında günlükteki işlemleri sırayla ve bir kez yazar"""
+    online_changed = pyqtSignal(bool)
+    synced = pyqtSignal(int)  # yazılan işlem sayısı
+    
+    def __init__(self, db, executor, journal, interval=5, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.executor = executor
+        self.journal = journal
+        self.online = db.online
+        self._in_flight = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval * 1000)
+        self.timer.timeout.connect(self.poll)
+    
+    def start(self):
+        self.timer.start()
+        self.poll()
+    
+    def stop(self):
+        self.timer.stop()
+    
+    def poll(self):
+        if self._in_flight:
+            return
+        self._in_flight = True
+        future = self.executor.submit(self.sync, on_done=self.on_synced)
+        future.settled.connect(self._on_settled)
+    
+    def _on_settled(self):
+        self._in_flight = False
+    
+    def sync(self):
+        """Bağlantıyı dene ve bekleyen işlemleri yaz (arka planda çalışır)"""
+        if not self.db.online and not self.db.connect():
+            return False, 0
+        
+        written = 0
+        for seq, kind, client_id, payload in self.journal.pending():
+            try:
+                ok = self.db.replay_operation(kind, client_id, payload)
+            except Exception as e:
+                ok, error = False, e
+            else:
+                error = "Sunucu işlemi kabul etmedi"
+            if ok:
+                self.journal.mark_done(seq)
+                written += 1
+            elif not self.db.online:
+                # Bağlantı yine koptu; kalan işlemler sırası bozulmadan sonra denenir
+                break
+            else:
+                logger.error(f"Günlük işlemi #{seq} ({kind}) yazılamadı: {error}")
+                self.journal.mark_failed(seq, error)
+        return self.db.online, written
+    
+    def on_synced(self, result):
+        online, written = result
+        if written:
+            logger.info(f"Çevrimdışı günlükten {written} işlem sunucuya yazıldı")
+            self.synced.emit(written)
+        if online != self.online:
+            self.online = online
+            self.online_changed.emit(online)
@@ -0,0 +1,116 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+class OrderItemsModel(QAbstractTableModel):
+    """Ana pencere ve ödeme penceresinin paylaştığı sipariş satırları modeli"""
+    
+    HEADERS = ["🍽️ Ürün", "🔢 Adet", "💰 Birim Fiyat", "💵 Toplam", "📝 Notlar"]
+    NOTES_COLUMN = 4
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # get_order_details satırları: (id, ürün, adet, birim fiyat, toplam, notlar)
+        self.items = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        item_id, product_name, quantity, unit_price, total_price, notes = self.items[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return product_name
+            if column == 1:
+                return str(quantity)
+            if column == 2:
+                return f"{unit_price:.2f}"
+            if column == 3:
+                return f"{total_price:.2f}"
+            return notes or ""
+        if role == Qt.UserRole:
+            return item_id
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def set_items(self, items):
+        """Tüm satırları değiştir (masa değişiminde)"""
+        self.beginResetModel()
+        self.items = [tuple(item) for item in items or []]
+        self.endResetModel()
+    
+    def clear(self):
+        """Tüm satırları temizle"""
+        self.set_items([])
+    
+    def append_item(self, item):
+        """Sona tek satır ekle"""
+        row = len(self.items)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.items.append(tuple(item))
+        self.endInsertRows()
+    
+    def remove_row(self, row):
+        """Tek satırı çıkar"""
+        if not 0 <= row < len(self.items):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.items[row]
+        self.endRemoveRows()
+    
+    def update_item(self, row, item):
+        """Tek satırın değerlerini güncelle"""
+        self.items[row] = tuple(item)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+    
+    def upsert_item(self, item):
+        """Satır modelde varsa güncelle (birleşen satır), yoksa sona ekle"""
+        row = self.row_of(item[0])
+        if row < 0:
+            self.append_item(item)
+        else:
+            self.update_item(row, item)
+    
+    def total(self):
+        """Satırların toplam tutarı"""
+        return sum((item[4] for item in self.items), Decimal('0'))
+    
+    def item_id(self, row):
+        """Satırdaki sipariş detayının ID'si"""
+        return self.items[row][0]
+    
+    def quantity(self, row):
+        """Satırdaki adet"""
+        return self.items[row][2]
+    
+    def item_ids(self, rows):
+        """Verilen satırlardaki sipariş detaylarının ID'leri"""
+        return [self.items[row][0] for row in sorted(set(rows)) if 0 <= row < len(self.items)]
+    
+    def remove_items(self, item_ids):
+        """Verilen ID'lere sahip satırları çıkar"""
+        # Sondan başa silinir ki önceki satır numaraları kaymasın
+        rows = sorted((self.row_of(item_id) for item_id in set(item_ids)), reverse=True)
+        for row in rows:
+            self.remove_row(row)
+    
+    def row_of(self, item_id):
+        """Sipariş detay ID'sinin satır numarası, yoksa -1"""
+        for row, item in enumerate(self.items):
+            if item[0] == item_id:
+                return row
+        return -1
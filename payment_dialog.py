@@ -2,25 +2,66 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QPushButton, QLabel, QLineEdit, QComboBox,
                              QTableWidget, QTableWidgetItem, QMessageBox,
                              QHeaderView, QGroupBox, QDoubleSpinBox,
-                             QTextEdit, QFrame, QWidget)
+                             QTextEdit, QFrame, QWidget, QTableView,
+                             QAbstractItemView)
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 from database import DatabaseManager
+from order_model import OrderItemsModel
+from print_spooler import render_bill_text
+from offline_journal import new_client_id
+from db_worker import get_executor
+from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Ekranda görünen ödeme tipi ve odemeler.odeme_tipi karşılığı
+PAYMENT_TYPES = [
+    ("Nakit", "nakit"),
+    ("Kredi Kartı", "kredi_karti"),
+    ("Banka Kartı", "banka_karti"),
+]
+
+def load_bill(db, order_id):
+    """Adisyon özeti ve satırlarını getir (arka planda çalışır)"""
+    order = db.get_order_summary(order_id)
+    if not order:
+        return None
+    return order, db.get_order_details(order_id)
+
+# Ödemenin nasıl bölüneceği: (görünen ad, kod)
+SPLIT_MODES = [
+    ("Kalanın Tamamı", "full"),
+    ("Tutara Göre", "amount"),
+    ("Ürüne Göre", "items"),
+]
+
 class PaymentDialog(QDialog):
-    payment_completed = pyqtSignal(int)  # Ödeme tamamlandığında sipariş ID'sini gönder
+    payment_completed = pyqtSignal(object)  # Ödeme tamamlandığında sipariş ID'sini gönder
+    payment_added = pyqtSignal(object, object)  # Kısmi ödemede sipariş ID'si ve kalan tutar
     
-    def __init__(self, order_id, order_total, parent=None):
+    def __init__(self, order_id, order_total, parent=None, db=None, order_model=None,
+                 journal=None, paid_total=0, executor=None):
         super().__init__(parent)
         self.order_id = order_id
-        self.order_total = order_total
-        self.db = DatabaseManager()
-        self.db.connect()
+        self.order_total = Decimal(str(order_total))
+        # Daha önce alınmış kısmi ödemelerin toplamı
+        self.paid_total = Decimal(str(paid_total))
+        self.db = db or DatabaseManager()
+        # Sunucuya ulaşılamazsa ödeme bu günlüğe yazılır
+        self.journal = journal
+        # Ana pencerenin modeli verilirse satırlar yeniden sorgulanmaz
+        self.order_model = order_model
+        # Ürüne göre bölmede ödenmiş satırlar (ilk kullanımda yüklenir)
+        self.paid_item_ids = None
+        # Bekleyen ödemenin anahtarı; çift tıklama ya da yeniden deneme ikinci kez ödeme yazmaz
+        self.client_id = new_client_id()
+        self.saving = False
+        self.executor = executor or get_executor()
         self.init_ui()
-        self.load_order_details()
+        if order_model is None:
+            self.load_order_details()
     
     def init_ui(self):
         """Ödeme arayüzünü oluştur"""
@@ -40,12 +81,16 @@ class PaymentDialog(QDialog):
         order_info_group = QGroupBox("Sipariş Bilgileri")
         order_layout = QVBoxLayout(order_info_group)
         
-        self.order_id_label = QLabel(f"Sipariş No: #{self.order_id}")
+        order_no = f"#{self.order_id}" if isinstance(self.order_id, int) else "(çevrimdışı)"
+        self.order_id_label = QLabel(f"Sipariş No: {order_no}")
         self.order_total_label = QLabel(f"Toplam Tutar: {self.order_total:.2f} TL")
         self.order_total_label.setStyleSheet("font-size: 14px; font-weight: bold; color: green;")
+        self.balance_label = QLabel()
+        self.balance_label.setStyleSheet("font-weight: bold; color: #d35400;")
         
         order_layout.addWidget(self.order_id_label)
         order_layout.addWidget(self.order_total_label)
+        order_layout.addWidget(self.balance_label)
         
         layout.addWidget(order_info_group)
         
@@ -53,13 +98,19 @@ class PaymentDialog(QDialog):
         details_group = QGroupBox("Sipariş Detayları")
         details_layout = QVBoxLayout(details_group)
         
-        self.order_table = QTableWidget()
-        self.order_table.setColumnCount(4)
-        self.order_table.setHorizontalHeaderLabels(["Ürün", "Adet", "Birim Fiyat", "Toplam"])
+        if self.order_model is None:
+            self.order_model = OrderItemsModel(self)
+        
+        self.order_table = QTableView()
+        self.order_table.setModel(self.order_model)
+        self.order_table.setColumnHidden(OrderItemsModel.NOTES_COLUMN, True)
+        self.order_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.order_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         header = self.order_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
-        self.order_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.order_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.order_table.selectionModel().selectionChanged.connect(self.update_due)
         
         details_layout.addWidget(self.order_table)
         layout.addWidget(details_group)
@@ -68,33 +119,51 @@ class PaymentDialog(QDialog):
         payment_group = QGroupBox("Ödeme Bilgileri")
         payment_layout = QGridLayout(payment_group)
         
+        # Hesap bölme; yalnızca sunucudaki siparişte yapılabilir
+        payment_layout.addWidget(QLabel("Bölme:"), 0, 0)
+        self.split_mode_combo = QComboBox()
+        for label, mode in SPLIT_MODES:
+            self.split_mode_combo.addItem(label, mode)
+        self.split_mode_combo.setEnabled(self.can_split())
+        self.split_mode_combo.currentIndexChanged.connect(self.on_split_mode_changed)
+        payment_layout.addWidget(self.split_mode_combo, 0, 1)
+        
         # Ödeme tipi
-        payment_layout.addWidget(QLabel("Ödeme Tipi:"), 0, 0)
+        payment_layout.addWidget(QLabel("Ödeme Tipi:"), 1, 0)
         self.payment_type_combo = QComboBox()
-        self.payment_type_combo.addItems(["Nakit", "Kredi Kartı", "Banka Kartı"])
-        payment_layout.addWidget(self.payment_type_combo, 0, 1)
+        for label, payment_type in PAYMENT_TYPES:
+            self.payment_type_combo.addItem(label, payment_type)
+        payment_layout.addWidget(self.payment_type_combo, 1, 1)
+        
+        # Bu ödemede alınacak tutar (yalnızca tutara göre bölmede elle girilir)
+        payment_layout.addWidget(QLabel("Alınacak Tutar:"), 2, 0)
+        self.due_input = QDoubleSpinBox()
+        self.due_input.setDecimals(2)
+        self.due_input.setSuffix(" TL")
+        self.due_input.setReadOnly(True)
+        self.due_input.valueChanged.connect(self.on_due_changed)
+        payment_layout.addWidget(self.due_input, 2, 1)
         
         # Ödenen tutar
-        payment_layout.addWidget(QLabel("Ödenen Tutar:"), 1, 0)
+        payment_layout.addWidget(QLabel("Ödenen Tutar:"), 3, 0)
         self.paid_amount_input = QDoubleSpinBox()
         self.paid_amount_input.setRange(0, 9999.99)
         self.paid_amount_input.setDecimals(2)
         self.paid_amount_input.setSuffix(" TL")
-        self.paid_amount_input.setValue(self.order_total)
         self.paid_amount_input.valueChanged.connect(self.calculate_change)
-        payment_layout.addWidget(self.paid_amount_input, 1, 1)
+        payment_layout.addWidget(self.paid_amount_input, 3, 1)
         
         # Para üstü
-        payment_layout.addWidget(QLabel("Para Üstü:"), 2, 0)
+        payment_layout.addWidget(QLabel("Para Üstü:"), 4, 0)
         self.change_label = QLabel("0.00 TL")
         self.change_label.setStyleSheet("font-weight: bold; color: blue;")
-        payment_layout.addWidget(self.change_label, 2, 1)
+        payment_layout.addWidget(self.change_label, 4, 1)
         
         # Notlar
-        payment_layout.addWidget(QLabel("Notlar:"), 3, 0)
+        payment_layout.addWidget(QLabel("Notlar:"), 5, 0)
         self.notes_input = QTextEdit()
         self.notes_input.setMaximumHeight(60)
-        payment_layout.addWidget(self.notes_input, 3, 1)
+        payment_layout.addWidget(self.notes_input, 5, 1)
         
         layout.addWidget(payment_group)
         
@@ -114,26 +183,79 @@ class PaymentDialog(QDialog):
         layout.addWidget(button_widget)
         
         # İlk hesaplama
-        self.calculate_change()
+        self.update_balance()
     
     def load_order_details(self):
-        """Sipariş detaylarını yükle"""
-        items = self.db.get_order_details(self.order_id)
-        self.order_table.setRowCount(len(items))
-        
-        for row, item in enumerate(items):
-            item_id, product_name, quantity, unit_price, total_price, notes = item
-            
-            self.order_table.setItem(row, 0, QTableWidgetItem(product_name))
-            self.order_table.setItem(row, 1, QTableWidgetItem(str(quantity)))
-            self.order_table.setItem(row, 2, QTableWidgetItem(f"{unit_price:.2f}"))
-            self.order_table.setItem(row, 3, QTableWidgetItem(f"{total_price:.2f}"))
+        """Sipariş detaylarını arka planda yükle"""
+        self.executor.submit(self.db.get_order_details, self.order_id, key='payment_items',
+                             on_done=self.order_model.set_items)
+    
+    def can_split(self):
+        """Bölünmüş ödeme sunucudaki siparişte ve bağlantı varken yapılabilir"""
+        return isinstance(self.order_id, int) and self.db.online
+    
+    def remaining(self):
+        return self.order_total - self.paid_total
+    
+    def split_mode(self):
+        return self.split_mode_combo.currentData()
+    
+    def update_balance(self):
+        """Ödenen/kalan tutarı göster ve alınacak tutarı yeniden hesapla"""
+        remaining = self.remaining()
+        self.balance_label.setText(f"Ödenen: {self.paid_total:.2f} TL    Kalan: {remaining:.2f} TL")
+        self.balance_label.setVisible(self.paid_total > 0)
+        self.due_input.setRange(0, float(remaining))
+        self.update_due()
+    
+    def on_split_mode_changed(self):
+        """Bölme türü değişince alınacak tutarın nasıl belirleneceğini ayarla"""
+        mode = self.split_mode()
+        if mode == 'items' and self.paid_item_ids is None:
+            self.executor.submit(self.db.get_paid_item_ids, self.order_id,
+                                 key=('paid_items', self.order_id),
+                                 on_done=self.on_paid_items_loaded)
+        self.due_input.setReadOnly(mode != 'amount')
+        self.update_due()
+    
+    def on_paid_items_loaded(self, item_ids):
+        """Ödenmiş satırlar gelince seçimden düş ve alınacak tutarı yeniden hesapla"""
+        self.paid_item_ids = item_ids
+        self.update_due()
+    
+    def selected_item_ids(self):
+        """Tabloda seçili ve henüz ödenmemiş satırların ID'leri"""
+        rows = [index.row() for index in self.order_table.selectionModel().selectedRows()]
+        return [item_id for item_id in self.order_model.item_ids(rows)
+                if item_id not in (self.paid_item_ids or ())]
+    
+    def update_due(self):
+        """Alınacak tutarı bölme türüne göre güncelle"""
+        mode = self.split_mode()
+        if mode == 'amount':
+            due = self.due_input.value()
+        elif mode == 'items':
+            selected = set(self.selected_item_ids())
+            due = sum((item[4] for item in self.order_model.items if item[0] in selected),
+                      Decimal('0'))
+            due = float(min(due, self.remaining()))
+        else:
+            due = float(self.remaining())
+        self.due_input.setValue(due)
+        self.on_due_changed()
+    
+    def on_due_changed(self):
+        """Ödenen tutarı alınacak tutarla başlat"""
+        due = Decimal(str(self.due_input.value()))
+        self.complete_payment_btn.setText("Ödemeyi Tamamla" if due >= self.remaining()
+                                          else "Ödemeyi Al")
+        self.paid_amount_input.setValue(float(due))
+        self.calculate_change()
     
     def calculate_change(self):
         """Para üstünü hesapla"""
         paid_amount = self.paid_amount_input.value()
-        order_total = float(self.order_total)
-        change = paid_amount - order_total
+        change = paid_amount - self.due_input.value()
         
         if change >= 0:
             self.change_label.setText(f"{change:.2f} TL")
@@ -143,58 +265,93 @@ class PaymentDialog(QDialog):
             self.change_label.setStyleSheet("font-weight: bold; color: red;")
     
     def complete_payment(self):
-        """Ödemeyi tamamla"""
+        """Ödemeyi al; kalan kapanırsa siparişi tamamla"""
+        due = Decimal(str(self.due_input.value()))
         paid_amount = self.paid_amount_input.value()
         
-        if paid_amount < self.order_total:
-            QMessageBox.warning(self, "Uyarı", "Ödenen tutar toplam tutardan az olamaz!")
+        if due <= 0:
+            QMessageBox.warning(self, "Uyarı", "Alınacak tutar seçin!")
+            return
+        if paid_amount < self.due_input.value():
+            QMessageBox.warning(self, "Uyarı", "Ödenen tutar alınacak tutardan az olamaz!")
             return
         
-        payment_type = self.payment_type_combo.currentText()
-        notes = self.notes_input.toPlainText().strip()
-        
-        # Ödeme kaydını ekle
-        payment_query = """
-            INSERT INTO odemeler (siparis_id, odeme_tipi, tutar)
-            VALUES (%s, %s, %s)
-        """
-        
-        if self.db.execute_query(payment_query, (self.order_id, payment_type.lower(), paid_amount)):
-            # Sipariş durumunu güncelle
-            update_query = """
-                UPDATE siparisler 
-                SET durum = 'kapatildi', odeme_durumu = 'odendi'
-                WHERE id = %s
-            """
-            
-            if self.db.execute_query(update_query, (self.order_id,)):
-                # Masa durumunu güncelle
-                table_query = """
-                    UPDATE masalar 
-                    SET durum = 'bos' 
-                    WHERE id = (SELECT masa_id FROM siparisler WHERE id = %s)
-                """
-                self.db.execute_query(table_query, (self.order_id,))
-                
-                self.payment_completed.emit(self.order_id)
-                QMessageBox.information(self, "Başarılı", "Ödeme tamamlandı!")
-                self.accept()
-            else:
-                QMessageBox.critical(self, "Hata", "Sipariş durumu güncellenemedi!")
-        else:
+        payment_type = self.payment_type_combo.currentData()
+        item_ids = self.selected_item_ids() if self.split_mode() == 'items' else None
+        
+        offline_order = not isinstance(self.order_id, int)
+        if offline_order or not self.db.online:
+            self.on_payment_saved(self.journal_payment(payment_type, due), item_ids)
+            return
+        
+        # Ödeme, sipariş/masa durumu ve günlük özetler tek işlemde güncellenir; kilit
+        # çakışmasında yeniden deneme beklemesi arayüzü dondurmasın diye arka planda yazılır
+        self.set_saving(True)
+        self.executor.submit(
+            self.db.add_payment, self.order_id, payment_type, due, self.client_id, item_ids,
+            on_done=lambda result: self.on_server_payment(result, payment_type, due, item_ids),
+            on_error=lambda error: self.on_server_payment(None, payment_type, due, item_ids))
+    
+    def on_server_payment(self, result, payment_type, amount, item_ids):
+        """Sunucuya yazılamayan ödemeyi bağlantı koptuysa çevrimdışı günlüğe al"""
+        self.set_saving(False)
+        if result is None and not self.db.online:
+            result = self.journal_payment(payment_type, amount)
+        self.on_payment_saved(result, item_ids)
+    
+    def on_payment_saved(self, result, item_ids):
+        """Ödeme yazıldığında: kalan kapandıysa pencereyi kapat, yoksa kalanı göster"""
+        if result is None:
             QMessageBox.critical(self, "Hata", "Ödeme kaydedilemedi!")
+            return
+        
+        amount, paid_total, remaining = result
+        if remaining <= 0:
+            self.payment_completed.emit(self.order_id)
+            QMessageBox.information(self, "Başarılı", "Ödeme tamamlandı!")
+            self.accept()
+            return
+        
+        # Kısmi ödeme: pencere kalan tutar için açık kalır, sonraki ödeme yeni anahtar alır
+        self.client_id = new_client_id()
+        self.paid_total = Decimal(paid_total)
+        if item_ids and self.paid_item_ids is not None:
+            self.paid_item_ids.update(item_ids)
+        self.order_table.clearSelection()
+        self.update_balance()
+        self.payment_added.emit(self.order_id, Decimal(remaining))
+        QMessageBox.information(self, "Başarılı",
+                                f"{amount:.2f} TL alındı. Kalan: {remaining:.2f} TL")
+    
+    def journal_payment(self, payment_type, amount):
+        """Ödemeyi çevrimdışı günlüğe yaz; çevrimdışıyken yalnızca kalanın tamamı alınır"""
+        if self.journal is None or amount < self.remaining():
+            return None
+        # Aynı kimlikle yazıldığı için sunucuya ulaşmış ödeme tekrar kaydedilmez
+        self.journal.record_payment(self.order_id, payment_type, amount, self.client_id)
+        return amount, self.order_total, Decimal('0')
+    
+    def set_saving(self, saving):
+        """Ödeme yazılırken ikinci ödemeyi ve pencereyi kapatmayı engelle"""
+        self.saving = saving
+        for widget in (self.complete_payment_btn, self.cancel_btn, self.split_mode_combo,
+                       self.payment_type_combo):
+            widget.setEnabled(not saving)
+        if not saving:
+            self.split_mode_combo.setEnabled(self.can_split())
     
-    def closeEvent(self, event):
-        """Pencere kapatılırken"""
-        self.db.disconnect()
-        event.accept()
+    def reject(self):
+        # Sonuç gelmeden kapanırsa ödemenin alınıp alınmadığı görünmez
+        if not self.saving:
+            super().reject()
 
 class BillPrintDialog(QDialog):
-    def __init__(self, order_id, parent=None):
+    def __init__(self, order_id, parent=None, db=None, spooler=None, executor=None):
         super().__init__(parent)
         self.order_id = order_id
-        self.db = DatabaseManager()
-        self.db.connect()
+        self.db = db or DatabaseManager()
+        self.spooler = spooler
+        self.executor = executor or get_executor()
         self.init_ui()
         self.load_bill_data()
     
@@ -225,65 +382,45 @@ class BillPrintDialog(QDialog):
         self.print_btn = QPushButton("Yazdır")
         self.print_btn.clicked.connect(self.print_bill)
         
+        self.print_dialog_btn = QPushButton("Yazıcı Seç...")
+        self.print_dialog_btn.clicked.connect(self.print_with_dialog)
+        
         self.close_btn = QPushButton("Kapat")
         self.close_btn.clicked.connect(self.close)
         
         button_layout.addWidget(self.print_btn)
+        button_layout.addWidget(self.print_dialog_btn)
         button_layout.addWidget(self.close_btn)
         
         layout.addWidget(button_widget)
     
     def load_bill_data(self):
-        """Adisyon verilerini yükle"""
-        # Sipariş bilgilerini al
-        order_query = """
-            SELECT s.id, s.toplam_tutar, s.created_at, m.masa_no
-            FROM siparisler s
-            JOIN masalar m ON s.masa_id = m.id
-            WHERE s.id = %s
-        """
-        order_result = self.db.execute_query(order_query, (self.order_id,))
-        
-        if not order_result:
+        """Adisyon verilerini arka planda yükle"""
+        # Metin gelmeden yazıcı seçilirse boş sayfa basılırdı
+        self.print_dialog_btn.setEnabled(False)
+        self.executor.submit(load_bill, self.db, self.order_id, key='bill',
+                             on_done=self.show_bill)
+    
+    def show_bill(self, bill):
+        """Adisyon metnini göster"""
+        if not bill:
             return
         
-        order_id, total, created_at, table_no = order_result[0]
-        
-        # Sipariş detaylarını al
-        items = self.db.get_order_details(self.order_id)
-        
-        # Adisyon metnini oluştur
-        bill_text = f"""
-{'='*50}
-                ADİSYON
-{'='*50}
-Sipariş No: #{order_id}
-Masa No: {table_no}
-Tarih: {created_at.strftime('%d.%m.%Y %H:%M')}
-{'='*50}
-
-"""
-        
-        total_amount = 0
-        for item in items:
-            item_id, product_name, quantity, unit_price, total_price, notes = item
-            bill_text += f"{product_name:<25} {quantity:>3}x {unit_price:>6.2f} = {total_price:>8.2f}\n"
-            if notes:
-                bill_text += f"    Not: {notes}\n"
-            total_amount += total_price
-        
-        bill_text += f"""
-{'='*50}
-TOPLAM: {total_amount:>42.2f} TL
-{'='*50}
-
-Teşekkür ederiz!
-"""
-        
-        self.bill_text.setPlainText(bill_text)
+        order, items = bill
+        self.bill_text.setPlainText(render_bill_text(order, items))
+        self.print_dialog_btn.setEnabled(True)
     
     def print_bill(self):
-        """Adisyonu yazdır"""
+        """Adisyonu yazdırma kuyruğuna ekle; yazdırma arka planda sürer"""
+        if self.spooler is None:
+            self.print_with_dialog()
+            return
+        
+        self.spooler.enqueue(self.order_id)
+        self.accept()
+    
+    def print_with_dialog(self):
+        """Yazıcı seçerek hemen yazdır"""
         try:
             from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
             
@@ -297,8 +434,3 @@ Teşekkür ederiz!
             QMessageBox.warning(self, "Uyarı", "Yazdırma modülü bulunamadı!")
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Yazdırma hatası: {str(e)}")
-    
-    def closeEvent(self, event):
-        """Pencere kapatılırken"""
-        self.db.disconnect()
-        event.accept()
@@ -0,0 +1,184 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QTextDocument
+from config import APP_CONFIG
+import escpos
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+BILL_WIDTH = 50
+
+def render_bill_text(order, items):
+    """get_order_summary satırı ve sipariş detaylarından adisyon metnini oluştur"""
+    order_id, total, created_at, table_no = order[:4]
+    line = '=' * BILL_WIDTH
+    
+    lines = [
+        "",
+        line,
+        " " * 16 + "ADİSYON",
+        line,
+        f"Sipariş No: #{order_id}",
+        f"Masa No: {table_no}",
+        f"Tarih: {created_at.strftime('%d.%m.%Y %H:%M')}",
+        line,
+        "",
+    ]
+    
+    total_amount = 0
+    for item_id, product_name, quantity, unit_price, total_price, notes in items or []:
+        lines.append(f"{product_name:<25} {quantity:>3}x {unit_price:>6.2f} = {total_price:>8.2f}")
+        if notes:
+            lines.append(f"    Not: {notes}")
+        total_amount += total_price
+    
+    lines += [
+        "",
+        line,
+        f"TOPLAM: {total_amount:>42.2f} TL",
+        line,
+        "",
+        "Teşekkür ederiz!",
+        "",
+    ]
+    return "\n".join(lines)
+
+class PrinterSink:
+    """Metni adı verilen (boşsa varsayılan) yazıcıya diyalogsuz gönderir"""
+    
+    def __init__(self, printer_name=''):
+        self.printer_name = printer_name
+    
+    def send(self, job_id, text):
+        from PyQt5.QtPrintSupport import QPrinter
+        
+        printer = QPrinter()
+        if self.printer_name:
+            printer.setPrinterName(self.printer_name)
+        if not printer.isValid():
+            raise RuntimeError(f"Yazıcı bulunamadı: {self.printer_name or 'varsayılan'}")
+        
+        document = QTextDocument()
+        document.setDefaultFont(QFont("Courier", 10))
+        document.setPlainText(text)
+        document.print_(printer)
+
+class FileSink:
+    """Test için işleri dizine metin dosyası olarak yazar"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def send(self, job_id, text):
+        path = os.path.join(self.directory, f"fis_{job_id}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+class PdfSink:
+    """Test için işleri dizine PDF olarak yazar"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def send(self, job_id, text):
+        from PyQt5.QtPrintSupport import QPrinter
+        
+        printer = QPrinter()
+        printer.setOutputFormat(QPrinter.PdfFormat)
+        printer.setOutputFileName(os.path.join(self.directory, f"fis_{job_id}.pdf"))
+        
+        document = QTextDocument()
+        document.setDefaultFont(QFont("Courier", 10))
+        document.setPlainText(text)
+        document.print_(printer)
+
+def create_sink(spec):
+    """PRINT_SINK ayarından yazıcı çıkışı oluştur"""
+    # 'printer[:ad]', 'file:dizin', 'pdf:dizin', 'escpos:aygıt', 'escpos-tcp:host[:port]', 'escpos-file:dizin'
+    kind, _, target = spec.partition(':')
+    if kind == 'escpos':
+        return escpos.DeviceSink(target or '/dev/usb/lp0')
+    if kind == 'escpos-tcp':
+        host, _, port = target.partition(':')
+        return escpos.TcpSink(host, int(port or 9100))
+    if kind == 'escpos-file':
+        return escpos.RawFileSink(target or 'fisler')
+    if kind == 'file':
+        return FileSink(target or 'fisler')
+    if kind == 'pdf':
+        return PdfSink(target or 'fisler')
+    return PrinterSink(target)
+
+class PrintSpooler(QObject):
+    """yazdirma_kuyrugu tablosundaki işleri arka planda yazdırır"""
+    job_printed = pyqtSignal(int)
+    job_failed = pyqtSignal(int, str)
+    
+    def __init__(self, db, executor, target=None, sink=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.executor = executor
+        self.target = target or APP_CONFIG['print_target']
+        self.sink = sink or create_sink(APP_CONFIG['print_sink'])
+        self.max_attempts = APP_CONFIG['print_max_attempts']
+        self._in_flight = False
+        self._again = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(APP_CONFIG['print_poll_interval'] * 1000)
+        self.timer.timeout.connect(self.poll)
+    
+    def start(self):
+        """Yarım kalmış işleri geri al ve kuyruğu yoklamaya başla"""
+        self.executor.submit(self.db.reset_stale_print_jobs, self.target)
+        self.timer.start()
+        self.poll()
+    
+    def stop(self):
+        self.timer.stop()
+    
+    def enqueue(self, order_id, kind='adisyon'):
+        """İşi kuyruğa ekle ve hemen yazdırmayı dene (GUI'yi bekletmez)"""
+        self.executor.submit(self.db.enqueue_print_job, order_id, self.target, kind,
+                             on_done=lambda job_id: self.poll())
+    
+    def poll(self):
+        """Bekleyen işleri arka planda işle"""
+        if self._in_flight:
+            # Çalışan tur bitince bir tur daha yapılır
+            self._again = True
+            return
+        self._in_flight = True
+        self._again = False
+        future = self.executor.submit(self.process_pending)
+        future.settled.connect(self._on_settled)
+    
+    def _on_settled(self):
+        self._in_flight = False
+        if self._again:
+            self.poll()
+    
+    def render(self, order, items):
+        """Çıkış türüne göre ESC/POS baytları veya düz metin oluştur"""
+        if getattr(self.sink, 'raw', False):
+            return escpos.render_bill(order, items)
+        return render_bill_text(order, items)
+    
+    def process_pending(self):
+        """Hedef yazıcının işlerini al, oluştur ve gönder (arka planda çalışır)"""
+        for job_id, order_id, kind, attempts in self.db.claim_print_jobs(self.target):
+            try:
+                order = self.db.get_order_summary(order_id)
+                if order is None:
+                    raise RuntimeError(f"Sipariş #{order_id} bulunamadı")
+                items = self.db.get_order_details(order_id)
+                self.sink.send(job_id, self.render(order, items))
+            except Exception as e:
+                logger.error(f"Yazdırma işi #{job_id} başarısız (deneme {attempts + 1}): {e}")
+                self.db.fail_print_job(job_id, e, self.max_attempts)
+                self.job_failed.emit(job_id, str(e))
+            else:
+                self.db.complete_print_job(job_id)
+                self.job_printed.emit(job_id)
@@ -2,24 +2,45 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QPushButton, QLabel, QLineEdit, QComboBox,
                              QTableWidget, QTableWidgetItem, QMessageBox,
                              QHeaderView, QGroupBox, QCheckBox, QDoubleSpinBox,
-                             QTextEdit, QSplitter, QWidget)
-from PyQt5.QtCore import Qt, pyqtSignal
+                             QTextEdit, QSplitter, QWidget, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
-from database import DatabaseManager
+from database import DatabaseManager, STATIONS
+from catalog_cache import CatalogCache
+from menu_import import read_menu, plan_import
+from db_worker import get_executor
 import logging
 
 logger = logging.getLogger(__name__)
 
+def write_and_reload(catalog, write, *args):
+    """Yazma işini yap, başarılıysa paylaşılan kataloğu yenile (arka planda çalışır)"""
+    result = write(*args)
+    if result and catalog is not None:
+        catalog.load()
+    return result
+
+def plan_menu(db, path):
+    """Menü dosyasını oku ve aktarım planlarını hazırla (arka planda çalışır)"""
+    items = read_menu(path)
+    # Dosyada olmayan ürünlerin pasif yapıldığı plan da önizlemede gösterilir
+    return plan_import(db, items), plan_import(db, items, deactivate_missing=True)
+
 class ProductManagementDialog(QDialog):
     product_updated = pyqtSignal()  # Ürün güncellendiğinde ana pencereye sinyal gönder
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db=None, catalog=None):
         super().__init__(parent)
-        self.db = DatabaseManager()
-        self.db.connect()
+        self.db = db or DatabaseManager()
+        self.db_executor = get_executor()
+        # Ana pencereyle paylaşılan katalog önbelleği; verilmediyse arka planda yüklenir
+        self.catalog = catalog if catalog is not None else CatalogCache(self.db)
         self.init_ui()
-        self.load_products()
-        self.load_categories()
+        if catalog is None:
+            self.db_executor.submit(self.catalog.load, key='product_catalog',
+                                    on_done=lambda loaded: self.show_catalog())
+        else:
+            self.show_catalog()
     
     def init_ui(self):
         """Ürün yönetimi arayüzünü oluştur"""
@@ -50,8 +71,8 @@ class ProductManagementDialog(QDialog):
         layout.addWidget(splitter)
         
         # Alt butonlar
-        button_widget = QWidget()
-        button_layout = QHBoxLayout(button_widget)
+        self.button_widget = QWidget()
+        button_layout = QHBoxLayout(self.button_widget)
         
         self.new_product_btn = QPushButton("Yeni Ürün")
         self.new_product_btn.clicked.connect(self.new_product)
@@ -64,16 +85,20 @@ class ProductManagementDialog(QDialog):
         self.delete_btn.clicked.connect(self.delete_product)
         self.delete_btn.setEnabled(False)
         
+        self.import_btn = QPushButton("Toplu Aktar")
+        self.import_btn.clicked.connect(self.import_menu)
+        
         self.close_btn = QPushButton("Kapat")
         self.close_btn.clicked.connect(self.close)
         
         button_layout.addWidget(self.new_product_btn)
         button_layout.addWidget(self.save_btn)
         button_layout.addWidget(self.delete_btn)
+        button_layout.addWidget(self.import_btn)
         button_layout.addStretch()
         button_layout.addWidget(self.close_btn)
         
-        layout.addWidget(button_widget)
+        layout.addWidget(self.button_widget)
     
     def create_product_list_panel(self):
         """Ürün listesi paneli oluştur"""
@@ -154,9 +179,14 @@ class ProductManagementDialog(QDialog):
         
         return panel
     
+    def show_catalog(self):
+        """Önbellekteki ürünleri ve kategorileri göster"""
+        self.load_products()
+        self.load_categories()
+    
     def load_categories(self):
         """Kategorileri yükle"""
-        categories = self.db.get_categories()
+        categories = self.catalog.get_categories()
         self.category_combo.clear()
         if categories:
             for cat_id, cat_name in categories:
@@ -164,7 +194,7 @@ class ProductManagementDialog(QDialog):
     
     def load_products(self):
         """Ürünleri yükle"""
-        products = self.db.get_products()
+        products = self.catalog.get_products()
         self.product_table.setRowCount(len(products))
         
         for row, product in enumerate(products):
@@ -251,29 +281,9 @@ class ProductManagementDialog(QDialog):
         description = self.description_input.toPlainText().strip()
         active = self.active_checkbox.isChecked()
         
-        if self.current_product_id:
-            # Güncelleme
-            query = """
-                UPDATE urunler 
-                SET ad = %s, kategori_id = %s, fiyat = %s, aciklama = %s, aktif = %s
-                WHERE id = %s
-            """
-            params = (name, category_id, price, description, active, self.current_product_id)
-        else:
-            # Yeni ürün ekleme
-            query = """
-                INSERT INTO urunler (ad, kategori_id, fiyat, aciklama, aktif)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            params = (name, category_id, price, description, active)
-        
-        if self.db.execute_query(query, params):
-            self.load_products()
-            self.clear_form()
-            self.product_updated.emit()  # Ana pencereye sinyal gönder
-            QMessageBox.information(self, "Başarılı", "Ürün kaydedildi!")
-        else:
-            QMessageBox.critical(self, "Hata", "Ürün kaydedilemedi!")
+        # Güncelleme veya yeni ürün ekleme; katalog sürümü aynı işlemde artar
+        self.submit_write("Ürün kaydedildi!", "Ürün kaydedilemedi!", self.db.save_product,
+                          self.current_product_id, name, category_id, price, description, active)
     
     def delete_product(self):
         """Ürünü sil"""
@@ -286,27 +296,128 @@ class ProductManagementDialog(QDialog):
         
         if reply == QMessageBox.Yes:
             # Önce ürünü pasif yap (soft delete)
-            query = "UPDATE urunler SET aktif = FALSE WHERE id = %s"
-            if self.db.execute_query(query, (self.current_product_id,)):
-                self.load_products()
-                self.clear_form()
-                self.product_updated.emit()
-                QMessageBox.information(self, "Başarılı", "Ürün silindi!")
-            else:
-                QMessageBox.critical(self, "Hata", "Ürün silinemedi!")
-    
-    def closeEvent(self, event):
-        """Pencere kapatılırken"""
-        self.db.disconnect()
-        event.accept()
+            self.submit_write("Ürün silindi!", "Ürün silinemedi!", self.db.delete_product,
+                              self.current_product_id)
+
+    def import_menu(self):
+        """CSV/JSON dosyasından toplu ürün ve fiyat aktar"""
+        path, _ = QFileDialog.getOpenFileName(self, "Menü Dosyası Seç", "",
+                                              "Menü dosyaları (*.csv *.json)")
+        if not path:
+            return
+        
+        self.set_saving(True)
+        self.db_executor.submit(plan_menu, self.db, path, key='product_write',
+                                on_done=self.on_menu_planned, on_error=self.on_menu_plan_failed)
+    
+    def on_menu_planned(self, plans):
+        """Aktarım planları hazırlandığında"""
+        if plans[1].is_empty():
+            self.set_saving(False)
+            QMessageBox.information(self, "Bilgi", "Dosyadaki menü mevcut katalogla aynı.")
+            return
+        # Önizleme penceresi iş sonucu sinyalinin içinde açılmaz; iş önce kapanır
+        QTimer.singleShot(0, lambda: self.confirm_import(plans))
+    
+    def on_menu_plan_failed(self, error):
+        """Menü dosyası okunamadığında"""
+        self.set_saving(False)
+        QMessageBox.critical(self, "Hata", f"Menü dosyası okunamadı:\n{error}")
+    
+    def confirm_import(self, plans):
+        """Planı onaya sun, onaylanırsa arka planda yaz"""
+        dialog = MenuImportDialog(plans, self)
+        if dialog.exec_() != QDialog.Accepted:
+            self.set_saving(False)
+            return
+        
+        plan = dialog.selected_plan()
+        self.submit_write(f"Menü güncellendi: {plan.summary()}",
+                          "Menü aktarılamadı, hiçbir değişiklik yazılmadı!", plan.apply, self.db)
+    
+    def submit_write(self, message, error_message, write, *args):
+        """Yazma işini arka planda yap, ardından kataloğu ve formu yenile"""
+        self.set_saving(True)
+        self.db_executor.submit(
+            write_and_reload, self.catalog, write, *args, key='product_write',
+            on_done=lambda ok: self.on_product_written(ok, message, error_message),
+            on_error=lambda error: self.on_product_written(False, message, error_message))
+    
+    def on_product_written(self, ok, message, error_message):
+        """Ürün yazma işi bittiğinde"""
+        self.set_saving(False)
+        if ok:
+            self.show_catalog()
+            self.clear_form()
+            self.product_updated.emit()  # Ana pencereye sinyal gönder
+            QMessageBox.information(self, "Başarılı", message)
+        else:
+            QMessageBox.critical(self, "Hata", error_message)
+    
+    def set_saving(self, saving):
+        """Yazma sürerken ikinci yazmayı engelle"""
+        # Düğmelerin kendi durumu korunur, yalnızca kapsayıcı kapatılır
+        self.button_widget.setEnabled(not saving)
+
+class MenuImportDialog(QDialog):
+    """Toplu aktarımda yazılacak değişiklikleri onaya sunar"""
+    
+    def __init__(self, plans, parent=None):
+        super().__init__(parent)
+        # (yalnızca dosyadakiler, dosyada olmayanlar pasif)
+        self.plans = plans
+        self.init_ui()
+        self.show_plan()
+    
+    def init_ui(self):
+        """Değişiklik listesi arayüzünü oluştur"""
+        self.setWindowTitle("Toplu Menü Aktarımı")
+        self.setModal(True)
+        self.setMinimumSize(600, 500)
+        
+        layout = QVBoxLayout(self)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setFont(QFont("Arial", 11, QFont.Bold))
+        layout.addWidget(self.summary_label)
+        
+        self.diff_text = QTextEdit()
+        self.diff_text.setReadOnly(True)
+        self.diff_text.setFont(QFont("Courier", 10))
+        layout.addWidget(self.diff_text)
+        
+        self.deactivate_checkbox = QCheckBox("Dosyada olmayan ürünleri pasif yap")
+        self.deactivate_checkbox.toggled.connect(self.show_plan)
+        layout.addWidget(self.deactivate_checkbox)
+        
+        button_layout = QHBoxLayout()
+        self.apply_btn = QPushButton("Uygula")
+        self.apply_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton("İptal")
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addStretch()
+        button_layout.addWidget(self.apply_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+    
+    def selected_plan(self):
+        return self.plans[self.deactivate_checkbox.isChecked()]
+    
+    def show_plan(self):
+        """Seçili planın özetini ve değişiklik satırlarını göster"""
+        plan = self.selected_plan()
+        self.summary_label.setText(plan.summary())
+        self.diff_text.setPlainText("\n".join(plan.diff) or "Değişiklik yok.")
+        self.apply_btn.setEnabled(not plan.is_empty())
 
 class CategoryManagementDialog(QDialog):
     category_updated = pyqtSignal()
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db=None, catalog=None):
         super().__init__(parent)
-        self.db = DatabaseManager()
-        self.db.connect()
+        self.db = db or DatabaseManager()
+        self.db_executor = get_executor()
+        self.catalog = catalog
         self.init_ui()
         self.load_categories()
     
@@ -326,8 +437,8 @@ class CategoryManagementDialog(QDialog):
         
         # Kategori listesi
         self.category_table = QTableWidget()
-        self.category_table.setColumnCount(3)
-        self.category_table.setHorizontalHeaderLabels(["ID", "Kategori Adı", "Açıklama"])
+        self.category_table.setColumnCount(4)
+        self.category_table.setHorizontalHeaderLabels(["ID", "Kategori Adı", "Açıklama", "İstasyon"])
         
         header = self.category_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
@@ -348,11 +459,17 @@ class CategoryManagementDialog(QDialog):
         self.category_desc_input.setMaximumHeight(60)
         form_layout.addWidget(self.category_desc_input, 1, 1)
         
+        form_layout.addWidget(QLabel("İstasyon:"), 2, 0)
+        self.category_station_combo = QComboBox()
+        for code, name in STATIONS:
+            self.category_station_combo.addItem(name, code)
+        form_layout.addWidget(self.category_station_combo, 2, 1)
+        
         layout.addLayout(form_layout)
         
         # Butonlar
-        button_widget = QWidget()
-        button_layout = QHBoxLayout(button_widget)
+        self.button_widget = QWidget()
+        button_layout = QHBoxLayout(self.button_widget)
         
         self.new_category_btn = QPushButton("Yeni Kategori")
         self.new_category_btn.clicked.connect(self.new_category)
@@ -374,20 +491,28 @@ class CategoryManagementDialog(QDialog):
         button_layout.addStretch()
         button_layout.addWidget(self.close_btn)
         
-        layout.addWidget(button_widget)
+        layout.addWidget(self.button_widget)
     
     def load_categories(self):
-        """Kategorileri yükle"""
-        query = "SELECT id, ad, aciklama FROM kategoriler ORDER BY ad"
-        categories = self.db.execute_query(query)
+        """Kategorileri arka planda yükle"""
+        self.db_executor.submit(self.db.get_all_categories, key='categories',
+                                on_done=self.show_categories)
+    
+    def show_categories(self, categories):
+        """Kategori tablosunu doldur"""
+        categories = categories or []
+        station_names = dict(STATIONS)
         
         self.category_table.setRowCount(len(categories))
         
         for row, category in enumerate(categories):
-            cat_id, name, description = category
+            cat_id, name, description, station = category
             self.category_table.setItem(row, 0, QTableWidgetItem(str(cat_id)))
             self.category_table.setItem(row, 1, QTableWidgetItem(name))
             self.category_table.setItem(row, 2, QTableWidgetItem(description or ""))
+            station_item = QTableWidgetItem(station_names.get(station, station))
+            station_item.setData(Qt.UserRole, station)
+            self.category_table.setItem(row, 3, station_item)
     
     def on_category_selected(self):
         """Kategori seçildiğinde"""
@@ -396,9 +521,12 @@ class CategoryManagementDialog(QDialog):
             cat_id = int(self.category_table.item(current_row, 0).text())
             name = self.category_table.item(current_row, 1).text()
             description = self.category_table.item(current_row, 2).text()
+            station = self.category_table.item(current_row, 3).data(Qt.UserRole)
             
             self.category_name_input.setText(name)
             self.category_desc_input.setPlainText(description)
+            self.category_station_combo.setCurrentIndex(
+                max(self.category_station_combo.findData(station), 0))
             
             self.save_category_btn.setEnabled(True)
             self.delete_category_btn.setEnabled(True)
@@ -410,6 +538,7 @@ class CategoryManagementDialog(QDialog):
         """Formu temizle"""
         self.category_name_input.clear()
         self.category_desc_input.clear()
+        self.category_station_combo.setCurrentIndex(0)
         self.save_category_btn.setEnabled(False)
         self.delete_category_btn.setEnabled(False)
         self.current_category_id = None
@@ -429,23 +558,11 @@ class CategoryManagementDialog(QDialog):
             return
         
         description = self.category_desc_input.toPlainText().strip()
+        station = self.category_station_combo.currentData()
         
-        if self.current_category_id:
-            # Güncelleme
-            query = "UPDATE kategoriler SET ad = %s, aciklama = %s WHERE id = %s"
-            params = (name, description, self.current_category_id)
-        else:
-            # Yeni kategori ekleme
-            query = "INSERT INTO kategoriler (ad, aciklama) VALUES (%s, %s)"
-            params = (name, description)
-        
-        if self.db.execute_query(query, params):
-            self.load_categories()
-            self.clear_form()
-            self.category_updated.emit()
-            QMessageBox.information(self, "Başarılı", "Kategori kaydedildi!")
-        else:
-            QMessageBox.critical(self, "Hata", "Kategori kaydedilemedi!")
+        # Güncelleme veya yeni kategori ekleme; katalog sürümü aynı işlemde artar
+        self.submit_write("Kategori kaydedildi!", "Kategori kaydedilemedi!", self.db.save_category,
+                          self.current_category_id, name, description, station)
     
     def delete_category(self):
         """Kategoriyi sil"""
@@ -453,10 +570,19 @@ class CategoryManagementDialog(QDialog):
             return
         
         # Önce bu kategoride ürün var mı kontrol et
-        query = "SELECT COUNT(*) FROM urunler WHERE kategori_id = %s"
-        result = self.db.execute_query(query, (self.current_category_id,))
-        
-        if result and result[0][0] > 0:
+        category_id = self.current_category_id
+        self.set_saving(True)
+        self.db_executor.submit(
+            self.db.count_category_products, category_id, key='category_write',
+            # Onay penceresi iş sonucu sinyalinin içinde açılmaz; iş önce kapanır
+            on_done=lambda count: QTimer.singleShot(
+                0, lambda: self.confirm_delete_category(category_id, count)),
+            on_error=lambda error: self.on_category_written(False, "", "Kategori silinemedi!"))
+    
+    def confirm_delete_category(self, category_id, product_count):
+        """Ürün sayısı geldiğinde silmeyi onayla"""
+        if product_count:
+            self.set_saving(False)
             QMessageBox.warning(self, "Uyarı", 
                                "Bu kategoride ürünler bulunmaktadır. Önce ürünleri silin veya başka kategoriye taşıyın.")
             return
@@ -466,16 +592,31 @@ class CategoryManagementDialog(QDialog):
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            query = "DELETE FROM kategoriler WHERE id = %s"
-            if self.db.execute_query(query, (self.current_category_id,)):
-                self.load_categories()
-                self.clear_form()
-                self.category_updated.emit()
-                QMessageBox.information(self, "Başarılı", "Kategori silindi!")
-            else:
-                QMessageBox.critical(self, "Hata", "Kategori silinemedi!")
-    
-    def closeEvent(self, event):
-        """Pencere kapatılırken"""
-        self.db.disconnect()
-        event.accept()
+            self.submit_write("Kategori silindi!", "Kategori silinemedi!", self.db.delete_category,
+                              category_id)
+        else:
+            self.set_saving(False)
+    
+    def submit_write(self, message, error_message, write, *args):
+        """Yazma işini arka planda yap, ardından kataloğu ve tabloyu yenile"""
+        self.set_saving(True)
+        self.db_executor.submit(
+            write_and_reload, self.catalog, write, *args, key='category_write',
+            on_done=lambda ok: self.on_category_written(ok, message, error_message),
+            on_error=lambda error: self.on_category_written(False, message, error_message))
+    
+    def on_category_written(self, ok, message, error_message):
+        """Kategori yazma işi bittiğinde"""
+        self.set_saving(False)
+        if ok:
+            self.load_categories()
+            self.clear_form()
+            self.category_updated.emit()
+            QMessageBox.information(self, "Başarılı", message)
+        else:
+            QMessageBox.critical(self, "Hata", error_message)
+    
+    def set_saving(self, saving):
+        """Yazma sürerken ikinci yazmayı engelle"""
+        # Düğmelerin kendi durumu korunur, yalnızca kapsayıcı kapatılır
+        self.button_widget.setEnabled(not saving)
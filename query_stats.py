@@ -0,0 +1,201 @@
+from config import APP_CONFIG
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from logging.handlers import RotatingFileHandler
+import re
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Süre dağılımı kova üst sınırları (milisaniye); sonuncusundan uzunlar taşma kovasına
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Çağıranı ararken atlanan veritabanı katmanı modülleri
+INTERNAL_MODULES = frozenset(('database', 'db_backends', 'query_stats', 'db_worker',
+                              'contextlib', 'threading'))
+
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Değerleri ve boşlukları atılmış, aynı biçimdeki sorguları birleştiren SQL özeti"""
+    text = _COMMENT.sub(' ', query)
+    text = _STRING.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    # IN listeleri eleman sayısından bağımsız tek özet verir
+    text = _IN_LIST.sub('(?+)', text)
+    return _SPACE.sub(' ', text).strip()
+
+# Çağıran aranırken atlanan sarmalayıcı fonksiyonlar (bkz. transparent)
+_TRANSPARENT_CODES = set()
+
+def transparent(fn):
+    """Bağlantıyı saran fonksiyonu çağıran olarak gösterme"""
+    _TRANSPARENT_CODES.add(fn.__code__)
+    return fn
+
+_context = threading.local()
+
+@contextmanager
+def caller_context(caller):
+    """Arka plan işinin sorgularını işi kuyruğa koyan ekrana yaz"""
+    previous = getattr(_context, 'caller', None)
+    _context.caller = caller
+    try:
+        yield
+    finally:
+        _context.caller = previous
+
+def find_caller():
+    """Veritabanı katmanı dışındaki ilk çağıranı 'Sınıf.metot' biçiminde döndür"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__')
+        if module not in INTERNAL_MODULES and frame.f_code not in _TRANSPARENT_CODES:
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    # İş parçacığında doğrudan DatabaseManager metodu çalışıyorsa kuyruğa koyan ekran
+    return getattr(_context, 'caller', None) or '?'
+
+class FingerprintStats:
+    """Tek bir SQL özetinin toplanmış sayaçları ve süre dağılımı"""
+    
+    def __init__(self, sample):
+        self.sample = sample
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.callers = Counter()
+    
+    def add(self, ms, rows, caller, error):
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if error:
+            self.errors += 1
+        index = 0
+        while index < len(BUCKETS_MS) and ms > BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.callers[caller] += 1
+    
+    def percentile_ms(self, pct):
+        """Dağılımdan yaklaşık yüzdelik (kova üst sınırı)"""
+        threshold = self.calls * pct / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= threshold:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+class QueryStats:
+    """Çalıştırılan tüm ifadelerin SQL özetine göre süre/satır istatistikleri"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._slow_logger = None
+        self.enabled = APP_CONFIG['query_stats']
+        self.slow_ms = APP_CONFIG['slow_query_ms']
+    
+    def record(self, query, seconds, rows=0, error=False):
+        """Bir ifadenin süresini, satır sayısını ve çağıranını kaydet"""
+        if not self.enabled:
+            return
+        fp = fingerprint(query)
+        caller = find_caller()
+        ms = seconds * 1000
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is None:
+                entry = self._entries[fp] = FingerprintStats(query)
+            entry.add(ms, rows, caller, error)
+        
+        if self.slow_ms > 0 and ms >= self.slow_ms:
+            self.slow_log().warning(f"{ms:.1f} ms | {rows} satır | {caller} | {fp}")
+    
+    def slow_log(self):
+        """Yavaş sorguların yazıldığı dönen günlük dosyası (ilk kullanımda açılır)"""
+        if self._slow_logger is None:
+            slow_logger = logging.getLogger('yavas_sorgu')
+            slow_logger.propagate = False
+            try:
+                handler = RotatingFileHandler(APP_CONFIG['slow_query_log'],
+                                              maxBytes=SLOW_LOG_MAX_BYTES,
+                                              backupCount=SLOW_LOG_BACKUPS, encoding='utf-8')
+            except OSError as e:
+                logger.error(f"Yavaş sorgu günlüğü açılamadı: {e}")
+                handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_logger.addHandler(handler)
+            self._slow_logger = slow_logger
+        return self._slow_logger
+    
+    def top(self, limit=20):
+        """Toplam süreye göre en pahalı SQL özetleri"""
+        with self._lock:
+            rows = [{
+                'fingerprint': fp,
+                'sample': entry.sample,
+                'calls': entry.calls,
+                'errors': entry.errors,
+                'rows': entry.rows,
+                'total_ms': entry.total_ms,
+                'mean_ms': entry.total_ms / entry.calls,
+                'p95_ms': entry.percentile_ms(95),
+                'max_ms': entry.max_ms,
+                'buckets': list(entry.buckets),
+                'callers': entry.callers.most_common(3),
+            } for fp, entry in self._entries.items()]
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows[:limit] if limit else rows
+    
+    def totals(self):
+        """Tüm ifadelerin toplam çağrı sayısı ve süresi"""
+        with self._lock:
+            calls = sum(entry.calls for entry in self._entries.values())
+            total_ms = sum(entry.total_ms for entry in self._entries.values())
+        return calls, total_ms
+    
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+query_stats = QueryStats()
+
+def timed_statement(method):
+    """Bağlantının execute/executemany metodunu süre ve satır ölçümüyle sar"""
+    @wraps(method)
+    def wrapper(conn, query, params=None):
+        started = time.perf_counter()
+        try:
+            result = method(conn, query, params)
+        except Exception:
+            query_stats.record(query, time.perf_counter() - started, error=True)
+            raise
+        rows = len(result) if isinstance(result, list) else max(conn.rowcount, 0)
+        query_stats.record(query, time.perf_counter() - started, rows)
+        return result
+    return wrapper
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Günlük özet tablolarını (gunluk_ozet, gunluk_urun_ozet) geçmiş
+siparişlerden yeniden oluşturur
+"""
+
+from database import DatabaseManager
+import sys
+
+def rebuild_rollups():
+    """Özet tablolarını yeniden oluştur"""
+    db = DatabaseManager()
+    
+    if not db.connect():
+        print("ERROR: Veritabani baglantisi basarisiz!")
+        return False
+    
+    print("Ozet tablolari olusturuluyor...")
+    success = db.create_tables() and db.rebuild_rollups()
+    db.disconnect()
+    
+    if success:
+        print("SUCCESS: Gunluk ozetler yeniden olusturuldu!")
+    else:
+        print("ERROR: Gunluk ozetler olusturulamadi!")
+    return success
+
+if __name__ == "__main__":
+    if not rebuild_rollups():
+        sys.exit(1)
@@ -0,0 +1,115 @@
+from database import REPORT_QUERIES, LINE_EXPORT_QUERY
+from concurrent.futures import CancelledError
+from contextlib import closing
+import csv
+import os
+import logging
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX isteğe bağlıdır, CSV her zaman kullanılabilir
+    Workbook = None
+
+logger = logging.getLogger(__name__)
+
+# Dışa aktarılabilen raporlar: tür -> (başlık, kolon adları, sorgu)
+EXPORTS = {
+    'daily': ("Günlük Rapor",
+              ["Sipariş No", "Masa", "Toplam", "Ödeme Tipi", "Tarih", "Durum"],
+              REPORT_QUERIES['daily']),
+    'monthly': ("Aylık Rapor",
+                ["Gün", "Sipariş Sayısı", "Toplam Satış"],
+                REPORT_QUERIES['monthly']),
+    'product': ("Ürün Raporu",
+                ["Ürün", "Kategori", "Satılan Adet", "Toplam Tutar", "Ortalama Fiyat"],
+                REPORT_QUERIES['product']),
+    'table': ("Masa Raporu",
+              ["Masa No", "Sipariş Sayısı", "Toplam Satış", "Ortalama Sipariş"],
+              REPORT_QUERIES['table']),
+    'lines': ("Sipariş Satırları",
+              ["Detay No", "Sipariş No", "Tarih", "Masa", "Kategori", "Ürün",
+               "Adet", "Birim Fiyat", "Toplam", "Notlar"],
+              LINE_EXPORT_QUERY),
+}
+
+# Bir XLSX sayfasına sığan en fazla veri satırı (başlık hariç)
+XLSX_MAX_ROWS = 1048575
+
+class ExportCancelled(CancelledError):
+    """Dışa aktarım kullanıcı tarafından iptal edildi"""
+
+class CsvWriter:
+    """Satırları doğrudan CSV dosyasına yazar (Excel uyumlu, ; ayraçlı)"""
+    
+    def __init__(self, path, title, headers):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file, delimiter=';')
+        self.writer.writerow(headers)
+    
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+    
+    def close(self):
+        self.file.close()
+
+class XlsxWriter:
+    """openpyxl write-only modu ile satırları belleğe almadan XLSX'e yazar"""
+    
+    def __init__(self, path, title, headers):
+        if Workbook is None:
+            raise RuntimeError("XLSX için openpyxl paketi gerekli (pip install openpyxl)")
+        self.path = path
+        self.title = title
+        self.headers = headers
+        self.workbook = Workbook(write_only=True)
+        self.sheet_count = 0
+        self._new_sheet()
+    
+    def _new_sheet(self):
+        self.sheet_count += 1
+        name = self.title if self.sheet_count == 1 else f"{self.title} {self.sheet_count}"
+        self.sheet = self.workbook.create_sheet(name[:31])
+        self.sheet.append(self.headers)
+        self.sheet_rows = 0
+    
+    def write_rows(self, rows):
+        for row in rows:
+            # Sayfa satır sınırı dolunca yeni sayfaya geç
+            if self.sheet_rows >= XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.append(row)
+            self.sheet_rows += 1
+    
+    def close(self):
+        self.workbook.save(self.path)
+
+def writer_for(path, title, headers):
+    """Dosya uzantısına göre yazıcı seç"""
+    if path.lower().endswith('.xlsx'):
+        return XlsxWriter(path, title, headers)
+    return CsvWriter(path, title, headers)
+
+def export_report(db, kind, start, end, path, progress=None, cancelled=None, batch_size=1000):
+    """Raporu [başlangıç, bitiş) aralığı için dosyaya akıt, yazılan satır sayısını döndür"""
+    title, headers, query = EXPORTS[kind]
+    writer = writer_for(path, title, headers)
+    written = 0
+    completed = False
+    try:
+        with closing(db.stream_query(query, (start, end), batch_size)) as batches:
+            for rows in batches:
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled()
+                writer.write_rows(rows)
+                written += len(rows)
+                if progress is not None:
+                    progress(written)
+        completed = True
+    finally:
+        writer.close()
+        # İptal veya hata durumunda yarım dosya bırakma
+        if not completed and os.path.exists(path):
+            os.remove(path)
+    
+    logger.info(f"{title} dışa aktarıldı: {path} ({written} satır)")
+    return written
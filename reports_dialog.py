@@ -2,19 +2,44 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QPushButton, QLabel, QLineEdit, QComboBox,
                              QTableWidget, QTableWidgetItem, QMessageBox,
                              QHeaderView, QGroupBox, QDateEdit, QTabWidget,
-                             QTextEdit, QFrame, QCheckBox, QWidget)
-from PyQt5.QtCore import Qt, QDate
+                             QTextEdit, QFrame, QCheckBox, QWidget, QFileDialog,
+                             QInputDialog, QProgressDialog)
+from PyQt5.QtCore import Qt, QDate, QObject, pyqtSignal
 from PyQt5.QtGui import QFont
-from database import DatabaseManager
+from database import DatabaseManager, day_range, date_range, month_range
+from db_worker import get_executor
+from report_export import EXPORTS, export_report
+from payment_dialog import PAYMENT_TYPES
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ReportsDialog(QDialog):
+PAYMENT_LABELS = {payment_type: label for label, payment_type in PAYMENT_TYPES}
+
+def payment_types_label(payment_types):
+    """Virgülle ayrılmış ödeme tipi kodlarını ekrandaki adlarına çevir"""
+    if not payment_types:
+        return "Ödenmedi"
+    return ", ".join(PAYMENT_LABELS.get(code, code) for code in payment_types.split(","))
+
+class ExportJob(QObject):
+    """Arka planda süren dışa aktarımın ilerleme sinyali ve iptal bayrağı"""
+    progress = pyqtSignal(int)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.db = DatabaseManager()
-        self.db.connect()
+        self.cancel_event = threading.Event()
+    
+    def cancel(self):
+        self.cancel_event.set()
+
+class ReportsDialog(QDialog):
+    def __init__(self, parent=None, db=None):
+        super().__init__(parent)
+        self.db = db or DatabaseManager()
+        self.db_executor = get_executor()
+        self.export_job = None
         self.init_ui()
     
     def init_ui(self):
@@ -148,25 +173,25 @@ class ReportsDialog(QDialog):
         layout.addWidget(title)
         
         # Tab widget
-        tab_widget = QTabWidget()
+        self.tab_widget = QTabWidget()
         
         # Günlük rapor sekmesi
         daily_tab = self.create_daily_report_tab()
-        tab_widget.addTab(daily_tab, "📅 Günlük Rapor")
+        self.tab_widget.addTab(daily_tab, "📅 Günlük Rapor")
         
         # Aylık rapor sekmesi
         monthly_tab = self.create_monthly_report_tab()
-        tab_widget.addTab(monthly_tab, "📆 Aylık Rapor")
+        self.tab_widget.addTab(monthly_tab, "📆 Aylık Rapor")
         
         # Ürün raporu sekmesi
         product_tab = self.create_product_report_tab()
-        tab_widget.addTab(product_tab, "🍽️ Ürün Raporu")
+        self.tab_widget.addTab(product_tab, "🍽️ Ürün Raporu")
         
         # Masa raporu sekmesi
         table_tab = self.create_table_report_tab()
-        tab_widget.addTab(table_tab, "🪑 Masa Raporu")
+        self.tab_widget.addTab(table_tab, "🪑 Masa Raporu")
         
-        layout.addWidget(tab_widget)
+        layout.addWidget(self.tab_widget)
         
         # Alt butonlar
         button_frame = QFrame()
@@ -545,19 +570,13 @@ class ReportsDialog(QDialog):
     
     def generate_daily_report(self):
         """Günlük rapor oluştur"""
-        selected_date = self.daily_date.date().toString("yyyy-MM-dd")
-        
-        query = """
-            SELECT s.id, m.masa_no, s.toplam_tutar, o.odeme_tipi, s.created_at, s.durum
-            FROM siparisler s
-            JOIN masalar m ON s.masa_id = m.id
-            LEFT JOIN odemeler o ON s.id = o.siparis_id
-            WHERE DATE(s.created_at) = %s AND s.durum = 'kapatildi'
-            ORDER BY s.created_at
-        """
-        
-        results = self.db.execute_query(query, (selected_date,))
+        selected_date = self.daily_date.date().toPyDate()
         
+        self.db_executor.submit(self.db.get_daily_report, *day_range(selected_date),
+                                key='daily_report', on_done=self.show_daily_report)
+    
+    def show_daily_report(self, results):
+        """Günlük rapor sonuçlarını göster"""
         if not results:
             self.daily_table.setRowCount(0)
             self.daily_total_label.setText("Toplam Satış: 0.00 TL")
@@ -573,7 +592,7 @@ class ReportsDialog(QDialog):
             self.daily_table.setItem(row, 0, QTableWidgetItem(f"#{order_id}"))
             self.daily_table.setItem(row, 1, QTableWidgetItem(str(table_no)))
             self.daily_table.setItem(row, 2, QTableWidgetItem(f"{total:.2f} TL"))
-            self.daily_table.setItem(row, 3, QTableWidgetItem(payment_type or "Nakit"))
+            self.daily_table.setItem(row, 3, QTableWidgetItem(payment_types_label(payment_type)))
             self.daily_table.setItem(row, 4, QTableWidgetItem(created_at.strftime("%H:%M")))
             self.daily_table.setItem(row, 5, QTableWidgetItem(status))
             
@@ -587,16 +606,11 @@ class ReportsDialog(QDialog):
         month = self.month_combo.currentIndex() + 1
         year = int(self.year_spin.currentText())
         
-        query = """
-            SELECT DAY(s.created_at) as gun, COUNT(*) as siparis_sayisi, SUM(s.toplam_tutar) as toplam
-            FROM siparisler s
-            WHERE MONTH(s.created_at) = %s AND YEAR(s.created_at) = %s AND s.durum = 'kapatildi'
-            GROUP BY DAY(s.created_at)
-            ORDER BY gun
-        """
-        
-        results = self.db.execute_query(query, (month, year))
-        
+        self.db_executor.submit(self.db.get_monthly_report, *month_range(year, month),
+                                key='monthly_report', on_done=self.show_monthly_report)
+    
+    def show_monthly_report(self, results):
+        """Aylık rapor sonuçlarını göster"""
         if not results:
             self.monthly_table.setRowCount(0)
             self.monthly_total_label.setText("Aylık Toplam: 0.00 TL")
@@ -622,23 +636,14 @@ class ReportsDialog(QDialog):
     
     def generate_product_report(self):
         """Ürün raporu oluştur"""
-        start_date = self.start_date.date().toString("yyyy-MM-dd")
-        end_date = self.end_date.date().toString("yyyy-MM-dd")
-        
-        query = """
-            SELECT u.ad, k.ad as kategori, SUM(sd.adet) as toplam_adet, 
-                   SUM(sd.toplam_fiyat) as toplam_tutar, AVG(sd.birim_fiyat) as ortalama_fiyat
-            FROM siparis_detaylari sd
-            JOIN urunler u ON sd.urun_id = u.id
-            JOIN kategoriler k ON u.kategori_id = k.id
-            JOIN siparisler s ON sd.siparis_id = s.id
-            WHERE DATE(s.created_at) BETWEEN %s AND %s AND s.durum = 'kapatildi'
-            GROUP BY u.id, u.ad, k.ad
-            ORDER BY toplam_tutar DESC
-        """
-        
-        results = self.db.execute_query(query, (start_date, end_date))
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate()
         
+        self.db_executor.submit(self.db.get_product_report, *date_range(start_date, end_date),
+                                key='product_report', on_done=self.show_product_report)
+    
+    def show_product_report(self, results):
+        """Ürün raporu sonuçlarını göster"""
         if not results:
             self.product_table.setRowCount(0)
             return
@@ -656,19 +661,13 @@ class ReportsDialog(QDialog):
     
     def generate_table_report(self):
         """Masa raporu oluştur"""
-        selected_date = self.table_date.date().toString("yyyy-MM-dd")
-        
-        query = """
-            SELECT m.masa_no, COUNT(s.id) as siparis_sayisi, 
-                   SUM(s.toplam_tutar) as toplam_satis, AVG(s.toplam_tutar) as ortalama_siparis
-            FROM masalar m
-            LEFT JOIN siparisler s ON m.id = s.masa_id AND DATE(s.created_at) = %s AND s.durum = 'kapatildi'
-            GROUP BY m.id, m.masa_no
-            ORDER BY m.masa_no
-        """
-        
-        results = self.db.execute_query(query, (selected_date,))
+        selected_date = self.table_date.date().toPyDate()
         
+        self.db_executor.submit(self.db.get_table_report, *day_range(selected_date),
+                                key='table_report', on_done=self.show_table_report)
+    
+    def show_table_report(self, results):
+        """Masa raporu sonuçlarını göster"""
         if not results:
             self.table_report_table.setRowCount(0)
             return
@@ -683,15 +682,77 @@ class ReportsDialog(QDialog):
             self.table_report_table.setItem(row, 2, QTableWidgetItem(f"{total_sales or 0:.2f} TL"))
             self.table_report_table.setItem(row, 3, QTableWidgetItem(f"{avg_order or 0:.2f} TL"))
     
+    def current_report_range(self):
+        """Açık sekmenin rapor türü ve [başlangıç, bitiş) aralığı"""
+        index = self.tab_widget.currentIndex()
+        if index == 0:
+            return ('daily',) + day_range(self.daily_date.date().toPyDate())
+        if index == 1:
+            month = self.month_combo.currentIndex() + 1
+            year = int(self.year_spin.currentText())
+            return ('monthly',) + month_range(year, month)
+        if index == 2:
+            return ('product',) + date_range(self.start_date.date().toPyDate(),
+                                             self.end_date.date().toPyDate())
+        return ('table',) + day_range(self.table_date.date().toPyDate())
+    
     def export_to_excel(self):
-        """Excel'e aktar"""
-        QMessageBox.information(self, "Bilgi", "Excel aktarım özelliği henüz tamamlanmadı")
+        """Açık raporu veya aynı aralığın sipariş satırlarını dosyaya aktar"""
+        if self.export_job is not None:
+            QMessageBox.information(self, "Bilgi", "Devam eden bir aktarım var")
+            return
+        
+        kind, start, end = self.current_report_range()
+        choices = [EXPORTS[kind][0], EXPORTS['lines'][0]]
+        choice, ok = QInputDialog.getItem(self, "Dışa Aktar", "Aktarılacak veri:", choices, 0, False)
+        if not ok:
+            return
+        if choice == choices[1]:
+            kind = 'lines'
+        
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Dışa Aktar", f"{EXPORTS[kind][0]}.xlsx",
+            "Excel Dosyası (*.xlsx);;CSV Dosyası (*.csv)")
+        if not path:
+            return
+        if not path.lower().endswith(('.xlsx', '.csv')):
+            path += '.csv' if 'csv' in selected_filter.lower() else '.xlsx'
+        
+        # Satır sayısı önceden bilinmez; ilerleme yazılan satır olarak gösterilir
+        self.export_progress = QProgressDialog("Aktarılıyor...", "İptal", 0, 0, self)
+        self.export_progress.setWindowTitle("Dışa Aktar")
+        self.export_progress.setMinimumDuration(0)
+        
+        job = ExportJob(self)
+        job.progress.connect(lambda rows: self.export_progress.setLabelText(f"{rows} satır yazıldı"))
+        self.export_progress.canceled.connect(job.cancel)
+        self.export_job = job
+        
+        self.db_executor.submit(export_report, self.db, kind, start, end, path,
+                                progress=job.progress.emit, cancelled=job.cancel_event.is_set,
+                                on_done=lambda rows: self.on_export_finished(path, rows),
+                                on_error=self.on_export_failed)
+    
+    def on_export_finished(self, path, rows):
+        """Aktarım tamamlandığında"""
+        self.export_job = None
+        self.export_progress.reset()
+        QMessageBox.information(self, "Başarılı", f"{rows} satır aktarıldı:\n{path}")
+    
+    def on_export_failed(self, error):
+        """Aktarım iptal edildiğinde veya başarısız olduğunda"""
+        cancelled = self.export_job is not None and self.export_job.cancel_event.is_set()
+        self.export_job = None
+        self.export_progress.reset()
+        if not cancelled:
+            QMessageBox.critical(self, "Hata", f"Aktarım başarısız: {error}")
+    
+    def done(self, result):
+        """Pencere kapanırken devam eden aktarımı iptal et"""
+        if self.export_job is not None:
+            self.export_job.cancel()
+        super().done(result)
     
     def print_report(self):
         """Raporu yazdır"""
         QMessageBox.information(self, "Bilgi", "Yazdırma özelliği henüz tamamlanmadı")
-    
-    def closeEvent(self, event):
-        """Pencere kapatılırken"""
-        self.db.disconnect()
-        event.accept()
@@ -0,0 +1,173 @@
+"""
+Uygulama genelindeki stil sayfası
+
+Stil sayfası açılışta bir kez QApplication'a verilir ve Qt tarafından bir kez
+ayrıştırılır. Masa butonları ve masa durum etiketi görünümünü 'state' dinamik
+özelliğinden alır; durum değişince yalnızca o widget yeniden cilalanır.
+"""
+
+# masalar.durum değerlerinin buton durumlarına karşılığı
+TABLE_STATES = {
+    'bos': 'free',
+    'dolu': 'occupied',
+    'rezerve': 'reserved',
+}
+
+APP_STYLESHEET = """
+    QMainWindow {
+        background-color: #f5f5f5;
+    }
+    QWidget {
+        font-family: 'Segoe UI', Arial, sans-serif;
+    }
+    QPushButton {
+        background-color: #4CAF50;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 6px;
+        font-weight: bold;
+        font-size: 12px;
+    }
+    QPushButton:hover {
+        background-color: #45a049;
+    }
+    QPushButton:pressed {
+        background-color: #3d8b40;
+    }
+    QPushButton:disabled {
+        background-color: #cccccc;
+        color: #666666;
+    }
+    QGroupBox {
+        font-weight: bold;
+        border: 2px solid #cccccc;
+        border-radius: 8px;
+        margin-top: 10px;
+        padding-top: 10px;
+        background-color: white;
+    }
+    QGroupBox::title {
+        subcontrol-origin: margin;
+        left: 10px;
+        padding: 0 5px 0 5px;
+        color: #333333;
+    }
+    QTableWidget {
+        background-color: white;
+        border: 1px solid #ddd;
+        border-radius: 6px;
+        gridline-color: #e0e0e0;
+        selection-background-color: #e3f2fd;
+    }
+    QTableWidget::item {
+        padding: 8px;
+        border-bottom: 1px solid #f0f0f0;
+    }
+    QTableWidget::item:selected {
+        background-color: #e3f2fd;
+        color: #1976d2;
+    }
+    QComboBox {
+        border: 2px solid #ddd;
+        border-radius: 6px;
+        padding: 5px;
+        background-color: white;
+    }
+    QComboBox:focus {
+        border-color: #4CAF50;
+    }
+    QSpinBox, QDoubleSpinBox {
+        border: 2px solid #ddd;
+        border-radius: 6px;
+        padding: 5px;
+        background-color: white;
+    }
+    QTextEdit {
+        border: 2px solid #ddd;
+        border-radius: 6px;
+        background-color: white;
+    }
+    QLabel {
+        color: #333333;
+    }
+
+    /* Masa butonları: boş, dolu (başka terminalde açılmış olabilir), seçili, rezerve */
+    QPushButton#tableButton {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #3498db, stop:1 #2980b9);
+        color: white;
+        border: 2px solid #2980b9;
+        border-radius: 8px;
+        padding: 0;
+        font-weight: bold;
+        font-size: 11px;
+    }
+    QPushButton#tableButton:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #5dade2, stop:1 #3498db);
+        border-color: #5dade2;
+    }
+    QPushButton#tableButton:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #2980b9, stop:1 #1f618d);
+    }
+    QPushButton#tableButton:disabled {
+        background: #bdc3c7;
+        border-color: #95a5a6;
+        color: #7f8c8d;
+    }
+    QPushButton#tableButton[state="occupied"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #f39c12, stop:1 #d35400);
+        border-color: #d35400;
+    }
+    QPushButton#tableButton[state="occupied"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #f5b041, stop:1 #e67e22);
+        border-color: #f5b041;
+    }
+    QPushButton#tableButton[state="reserved"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #9b59b6, stop:1 #8e44ad);
+        border-color: #8e44ad;
+    }
+    QPushButton#tableButton[state="reserved"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #af7ac5, stop:1 #9b59b6);
+        border-color: #af7ac5;
+    }
+    QPushButton#tableButton[state="selected"],
+    QPushButton#tableButton[state="selected"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+            stop:0 #e74c3c, stop:1 #c0392b);
+        border-color: #c0392b;
+    }
+
+    /* Masa durum etiketi: masa seçilmedi / seçildi */
+    QLabel#tableStatus {
+        font-weight: bold;
+        font-size: 13px;
+        padding: 8px;
+        border-radius: 6px;
+        color: #e74c3c;
+        background-color: #fadbd8;
+        border: 1px solid #f1948a;
+    }
+    QLabel#tableStatus[state="selected"] {
+        color: #27ae60;
+        background-color: #d5f4e6;
+        border: 1px solid #a9dfbf;
+    }
+"""
+
+def set_state(widget, state):
+    """Widget'ın 'state' özelliğini değiştir; değer aynıysa yeniden cilalama yapma"""
+    if widget.property('state') == state:
+        return False
+    widget.setProperty('state', state)
+    # Dinamik özellik seçicileri ancak yeniden cilalanınca değerlendirilir
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    return True
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TableIndex:
+    """masa_no -> (id, durum) indeksi ve masaların kat/bölüm gruplaması"""
+    
+    def __init__(self):
+        self.tables = {}    # masa_no -> (id, durum)
+        self.numbers = {}   # masa_id -> masa_no
+        self.locations = {} # masa_no -> (kat, bölüm)
+        self.floors = OrderedDict()  # kat -> OrderedDict(bölüm -> [masa_no, ...])
+    
+    def load(self, rows):
+        """get_tables satırlarından (id, masa_no, durum, kat, bölüm) indeksi kur"""
+        self.tables = {}
+        self.numbers = {}
+        self.locations = {}
+        self.floors = OrderedDict()
+        for row in rows or []:
+            self.add(row)
+        logger.info(f"Masa indeksi yüklendi ({len(self.tables)} masa, {len(self.floors)} kat)")
+    
+    def add(self, row):
+        """Tek masayı indekse ekle veya güncelle"""
+        table_id, table_no, status, floor, section = row
+        if table_no not in self.tables:
+            self.floors.setdefault(floor, OrderedDict()).setdefault(section, []).append(table_no)
+        self.tables[table_no] = (table_id, status)
+        self.numbers[table_id] = table_no
+        self.locations[table_no] = (floor, section)
+    
+    def get(self, table_no):
+        """Masa numarasının (id, durum) bilgisi, yoksa None"""
+        return self.tables.get(table_no)
+    
+    def table_id(self, table_no):
+        table = self.tables.get(table_no)
+        return table[0] if table else None
+    
+    def table_no(self, table_id):
+        return self.numbers.get(table_id)
+    
+    def status(self, table_no):
+        table = self.tables.get(table_no)
+        return table[1] if table else None
+    
+    def floor_of(self, table_no):
+        location = self.locations.get(table_no)
+        return location[0] if location else None
+    
+    def set_status(self, table_no, status):
+        """Masanın durumunu güncelle"""
+        table = self.tables.get(table_no)
+        if table is not None:
+            self.tables[table_no] = (table[0], status)
+    
+    def floor_names(self):
+        return list(self.floors)
+    
+    def sections(self, floor):
+        """Kattaki bölümleri (bölüm, [masa_no, ...]) olarak döndür"""
+        return [(section, sorted(numbers)) for section, numbers in self.floors.get(floor, {}).items()]
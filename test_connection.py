@@ -5,10 +5,31 @@
 Veritabanı bağlantı testi
 """
 
-from database import DatabaseManager
+from database import DatabaseManager, REPORT_QUERIES, day_range
+from datetime import date
 import sys
 
-def test_connection():
+def check_report_indexes(db):
+    """Rapor sorgularının ana tablolarda indeks kullandığını EXPLAIN ile doğrula"""
+    print("Rapor sorgulari icin indeks kullanimi kontrol ediliyor...")
+    start, end = day_range(date.today())
+    success = True
+    
+    for name, query in REPORT_QUERIES.items():
+        plan = db.explain(query, (start, end))
+        # s: siparisler, g: günlük özet tabloları
+        facts = [row for row in plan if row['table'] in ('s', 'g')]
+        if facts and all(row['key'] for row in facts):
+            print(f"SUCCESS: {name} raporu indeks kullaniyor ({facts[0]['key']})")
+        else:
+            print(f"ERROR: {name} raporu tam tablo taramasi yapiyor!")
+            for row in plan:
+                print(f"    {row['table']}: type={row['type']} key={row['key']} rows={row['rows']}")
+            success = False
+    
+    return success
+
+def check_connection():
     """Veritabanı bağlantısını test et"""
     print("Veritabanı bağlantısı test ediliyor...")
     
@@ -20,13 +41,18 @@ def test_connection():
         
         # Tabloları oluştur
         print("Tablolar olusturuluyor...")
-        if db.create_tables():
+        success = db.create_tables()
+        if success:
             print("SUCCESS: Tablolar basariyla olusturuldu!")
         else:
             print("ERROR: Tablo olusturma hatasi!")
         
+        # Rapor sorgularının planlarını kontrol et (EXPLAIN çıktısı MySQL'e özgü)
+        if success and db.backend.name == 'mysql':
+            success = check_report_indexes(db)
+        
         db.disconnect()
-        return True
+        return success
     else:
         print("ERROR: Veritabani baglantisi basarisiz!")
         print("\nLutfen asagidakileri kontrol edin:")
@@ -37,7 +63,7 @@ def test_connection():
         return False
 
 if __name__ == "__main__":
-    if test_connection():
+    if check_connection():
         print("\nSUCCESS: Sistem kullanima hazir!")
         print("Uygulamayi baslatmak icin: python main.py")
     else:
@@ -0,0 +1,31 @@
+"""
+Testler için SQLite ile kurulan veritabanı
+
+Her test, varsayılan menü ve masalarla oluşturulmuş kendi geçici veritabanını
+alır; MySQL sunucusu gerekmez. Havuz birden çok bağlantı açtığından veritabanı
+bellekte değil, testin geçici dizinindeki dosyadadır.
+"""
+
+from config import DB_CONFIG
+from database import DatabaseManager, ConnectionPool
+from db_backends import create_backend
+import pytest
+
+@pytest.fixture
+def db(tmp_path):
+    config = dict(DB_CONFIG, backend='sqlite', sqlite_path=str(tmp_path / 'adisyon.db'))
+    manager = DatabaseManager(ConnectionPool(create_backend(config), config))
+    assert manager.connect() and manager.create_tables()
+    yield manager
+    manager.disconnect()
+
+@pytest.fixture
+def products(db):
+    """Varsayılan menüdeki aktif ürünler: (id, ad, fiyat)"""
+    return [(row[0], row[1], row[3]) for row in db.get_products()]
+
+@pytest.fixture
+def order(db):
+    """1 numaralı masada açılmış boş sipariş"""
+    table = db.get_table(1)
+    return db.create_order(table[0])
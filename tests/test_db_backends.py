@@ -0,0 +1,37 @@
+"""SQLite arka ucunun para tutarlarını MySQL gibi Decimal döndürdüğünü doğrular"""
+
+from decimal import Decimal
+import db_backends
+
+def test_money_columns_read_as_two_place_decimal(db, order, products):
+    product_id, name, price = products[0]
+    line, total = db.add_order_line(order, product_id, 3)
+    assert line[3] == price
+    assert line[3].as_tuple().exponent == -2
+    assert total == price * 3
+    assert total.as_tuple().exponent == -2
+
+def test_aggregates_of_inexact_amounts_are_exact(db, order, products):
+    # 0.10 ikilik kayan noktada tam gösterilemez; üç kez toplanınca 0.30000000000000004 olur
+    product_id = products[0][0]
+    assert db.execute_query("UPDATE urunler SET fiyat = %s WHERE id = %s",
+                            (Decimal('0.10'), product_id))
+    for _ in range(3):
+        line, total = db.add_order_line(order, product_id, 1, merge=False)
+    assert total == Decimal('0.30')
+    
+    (line_sum, average), = db.execute_query("""
+        SELECT SUM(toplam_fiyat), AVG(birim_fiyat) FROM siparis_detaylari WHERE siparis_id = %s
+    """, (order,))
+    assert isinstance(line_sum, Decimal) and line_sum == Decimal('0.3')
+    assert isinstance(average, Decimal) and average == Decimal('0.1')
+    assert db.get_order_balance(order) == (Decimal('0.30'), Decimal('0.00'))
+
+def test_sqlite_statement_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(db_backends, 'SQLITE_STATEMENT_CACHE_SIZE', 2)
+    monkeypatch.setattr(db_backends, '_sqlite_statements', db_backends.OrderedDict())
+    db_backends._sqlite_sql("SELECT %s")
+    db_backends._sqlite_sql("SELECT %s, 1")
+    db_backends._sqlite_sql("SELECT %s")  # en son kullanılan olur
+    assert db_backends._sqlite_sql("SELECT %s, 2") == "SELECT ?, 2"
+    assert list(db_backends._sqlite_statements) == ["SELECT %s", "SELECT %s, 2"]
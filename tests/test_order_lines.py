@@ -0,0 +1,153 @@
+"""Sipariş satırı ekleme, adet değiştirme ve çıkarma"""
+
+from database import CHANGE_LINE_REMOVED
+from query_stats import query_stats
+from decimal import Decimal
+
+def close_order(db, order):
+    """Kalanın tamamını nakit alıp siparişi kapat"""
+    amount, paid, remaining = db.add_payment(order, 'nakit')
+    assert remaining == 0
+
+def product_rollups(db):
+    return db.execute_query("SELECT * FROM gunluk_urun_ozet ORDER BY 1, 2")
+
+def test_closed_order_rejects_new_lines(db, order, products):
+    product_id, name, price = products[0]
+    db.add_order_line(order, product_id, 1)
+    close_order(db, order)
+    rollups = product_rollups(db)
+    
+    # Aynı ürün mevcut satıra birleşirdi, farklı ürün yeni satır açardı
+    assert db.add_order_line(order, product_id, 1) is None
+    assert db.add_order_line(order, products[1][0], 1) is None
+    
+    assert db.get_order_balance(order) == (price, price)
+    assert [(row[2], row[4]) for row in db.get_order_details(order)] == [(1, price)]
+    assert db.rebuild_rollups()
+    assert product_rollups(db) == rollups
+
+def test_replayed_line_on_closed_order_returns_existing_line(db, order, products):
+    product_id, name, price = products[0]
+    line, total = db.add_order_line(order, product_id, 2, client_id='satir-1')
+    close_order(db, order)
+    assert db.add_order_line(order, product_id, 2, client_id='satir-1') == (line, total)
+    assert db.get_order_balance(order) == (total, total)
+
+def test_closed_order_rejects_quantity_change(db, order, products):
+    product_id, name, price = products[0]
+    line, total = db.add_order_line(order, product_id, 2)
+    close_order(db, order)
+    assert db.change_order_item_quantity(order, line[0], 1) is None
+    assert db.change_order_item_quantity(order, line[0], -1) is None
+    assert db.get_order_balance(order) == (total, total)
+    assert db.get_order_details(order)[0][2] == 2
+
+def test_repeated_product_merges_into_one_line(db, order, products):
+    product_id, name, price = products[0]
+    first, total = db.add_order_line(order, product_id, 1)
+    merged, total = db.add_order_line(order, product_id, 2)
+    assert merged[0] == first[0]
+    assert (merged[2], merged[4]) == (3, price * 3)
+    assert total == price * 3
+    assert len(db.get_order_details(order)) == 1
+
+def test_lines_with_different_notes_or_merge_off_stay_separate(db, order, products):
+    product_id, name, price = products[0]
+    db.add_order_line(order, product_id, 1)
+    db.add_order_line(order, product_id, 1, 'az şekerli')
+    db.add_order_line(order, product_id, 1, merge=False)
+    assert [row[2] for row in db.get_order_details(order)] == [1, 1, 1]
+    assert db.get_order_total(order) == price * 3
+
+def test_price_change_opens_new_line(db, order, products):
+    product_id, name, price = products[0]
+    new_price = price + Decimal('2.50')
+    old_line, total = db.add_order_line(order, product_id, 2)
+    assert db.execute_query("UPDATE urunler SET fiyat = %s WHERE id = %s", (new_price, product_id))
+    
+    new_line, total = db.add_order_line(order, product_id, 1)
+    assert new_line[0] != old_line[0]
+    # Sonraki ekleme yeni fiyatlı satıra birleşir
+    merged, total = db.add_order_line(order, product_id, 1)
+    assert merged[0] == new_line[0]
+    
+    rows = db.get_order_details(order)
+    assert [(row[2], row[3]) for row in rows] == [(2, price), (2, new_price)]
+    assert all(row[2] * row[3] == row[4] for row in rows)
+    assert total == price * 2 + new_price * 2
+
+def test_replayed_merge_is_not_applied_twice(db, order, products):
+    product_id, name, price = products[0]
+    db.add_order_line(order, product_id, 1, client_id='satir-1')
+    line, total = db.add_order_line(order, product_id, 2, client_id='satir-2')
+    assert db.add_order_line(order, product_id, 2, client_id='satir-2') == (line, total)
+    assert db.get_order_details(order)[0][2] == 3
+
+def test_change_quantity_updates_line_and_total(db, order, products):
+    product_id, name, price = products[0]
+    other, total = db.add_order_line(order, products[1][0], 1)
+    line, total = db.add_order_line(order, product_id, 2)
+    
+    line, total = db.change_order_item_quantity(order, line[0], 1)
+    assert (line[2], line[4]) == (3, price * 3)
+    assert total == other[4] + price * 3
+    
+    line, total = db.change_order_item_quantity(order, line[0], -2)
+    assert (line[2], line[4]) == (1, price)
+    assert total == other[4] + price
+    
+    # Adet 1'in altına inmez; satır çıkarmak remove_order_items ile yapılır
+    assert db.change_order_item_quantity(order, line[0], -1) is None
+    assert db.get_order_total(order) == total
+
+def add_lines(db, order, products, count):
+    return [db.add_order_line(order, product_id, 1)[0] for product_id, name, price in products[:count]]
+
+def test_remove_items_deletes_in_one_statement(db, order, products):
+    lines = add_lines(db, order, products, 4)
+    removed = [lines[0][0], lines[2][0]]
+    query_stats.reset()
+    
+    total = db.remove_order_items(order, removed)
+    deletes = [row for row in query_stats.top(0) if row['fingerprint'].startswith('DELETE')]
+    assert [row['calls'] for row in deletes] == [1]
+    
+    assert total == lines[1][4] + lines[3][4]
+    assert db.get_order_total(order) == total
+    assert [row[0] for row in db.get_order_details(order)] == [lines[1][0], lines[3][0]]
+    logged = [row[4] for row in db.get_changes_since(0) if row[1] == CHANGE_LINE_REMOVED]
+    assert logged == removed
+
+def test_remove_items_ignores_lines_of_other_orders(db, order, products):
+    line, total = db.add_order_line(order, products[0][0], 1)
+    other_order = db.create_order(db.get_table(2)[0])
+    other, other_total = db.add_order_line(other_order, products[1][0], 1)
+    
+    assert db.remove_order_items(order, [line[0], other[0]]) == 0
+    assert db.get_order_total(other_order) == other_total
+    assert len(db.get_order_details(other_order)) == 1
+
+def test_paid_lines_cannot_be_removed(db, order, products):
+    paid, unpaid = add_lines(db, order, products, 2)
+    db.add_payment(order, 'nakit', item_ids=[paid[0]])
+    
+    # Seçimde ödenmiş satır varsa hiçbiri çıkarılmaz
+    assert db.remove_order_items(order, [paid[0]]) is None
+    assert db.remove_order_items(order, [paid[0], unpaid[0]]) is None
+    assert len(db.get_order_details(order)) == 2
+    assert db.get_order_balance(order) == (paid[4] + unpaid[4], paid[4])
+    
+    assert db.remove_order_items(order, [unpaid[0]]) == paid[4]
+
+def test_clear_order_items(db, order, products):
+    add_lines(db, order, products, 3)
+    assert db.clear_order_items(order)
+    assert db.get_order_details(order) == []
+    assert db.get_order_total(order) == 0
+
+def test_partially_paid_order_cannot_be_cleared(db, order, products):
+    add_lines(db, order, products, 2)
+    db.add_payment(order, 'nakit', Decimal('1.00'))
+    assert not db.clear_order_items(order)
+    assert len(db.get_order_details(order)) == 2
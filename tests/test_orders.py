@@ -0,0 +1,35 @@
+"""Masada sipariş açma"""
+
+def active_orders(db, table_id):
+    return db.execute_query(
+        "SELECT id FROM siparisler WHERE masa_id = %s AND durum = 'aktif'", (table_id,))
+
+def test_second_open_returns_active_order(db):
+    table_id = db.get_table(1)[0]
+    order = db.create_order(table_id, client_id='kasa-1')
+    # İkinci kasa aynı boş masayı eski görüntüyle açar
+    assert db.create_order(table_id, client_id='kasa-2') == order
+    assert active_orders(db, table_id) == [(order,)]
+
+def test_repeated_client_id_returns_same_order(db):
+    table_id = db.get_table(1)[0]
+    order = db.create_order(table_id, client_id='kasa-1')
+    assert db.create_order(table_id, client_id='kasa-1') == order
+    assert active_orders(db, table_id) == [(order,)]
+
+def test_replayed_order_stays_separate(db):
+    table_id = db.get_table(1)[0]
+    order = db.create_order(table_id, client_id='kasa-1')
+    replayed = db.create_order(table_id, client_id='cevrimdisi-1', join_active=False)
+    assert replayed not in (None, order)
+    assert len(active_orders(db, table_id)) == 2
+
+def test_new_order_after_close(db, products):
+    table_id = db.get_table(1)[0]
+    order = db.create_order(table_id)
+    db.add_order_line(order, products[0][0], 1)
+    amount, paid, remaining = db.add_payment(order, 'nakit')
+    assert remaining == 0
+    new_order = db.create_order(table_id)
+    assert new_order not in (None, order)
+    assert active_orders(db, table_id) == [(new_order,)]
@@ -0,0 +1,197 @@
+"""Bölünmüş ve kısmi ödemeler, ödeme defteri ve günlük özetler"""
+
+from config import DB_CONFIG
+from database import day_range
+from db_backends import DatabaseError, MySQLBackend, transaction_retry_stats
+from datetime import date
+from decimal import Decimal
+import sqlite3
+import pytest
+import database
+
+def order_with_lines(db, order, products, count=3):
+    lines = [db.add_order_line(order, product_id, 1)[0] for product_id, name, price in products[:count]]
+    return lines, db.get_order_total(order)
+
+def payments(db, order):
+    return db.execute_query("""
+        SELECT odeme_tipi, tutar FROM odemeler WHERE siparis_id = %s ORDER BY id
+    """, (order,))
+
+def rollups(db):
+    return db.execute_query("""
+        SELECT odeme_tipi, siparis_sayisi, toplam_tutar FROM gunluk_ozet ORDER BY odeme_tipi
+    """)
+
+def table_state(db, table_no=1):
+    return db.get_table(table_no)[2]
+
+def test_pay_by_amount_then_close(db, order, products):
+    lines, total = order_with_lines(db, order, products)
+    
+    assert db.add_payment(order, 'nakit', Decimal('5.00')) == (
+        Decimal('5.00'), Decimal('5.00'), total - 5)
+    assert db.get_order_balance(order) == (total, Decimal('5.00'))
+    assert db.get_active_order(db.get_table(1)[0]) is not None
+    assert table_state(db) == 'dolu'
+    
+    amount, paid, remaining = db.add_payment(order, 'kredi_karti')
+    assert (amount, paid, remaining) == (total - 5, total, 0)
+    assert db.get_active_order(db.get_table(1)[0]) is None
+    assert table_state(db) == 'bos'
+    assert payments(db, order) == [('nakit', Decimal('5.00')), ('kredi_karti', total - 5)]
+    # Kapanmış siparişe yeni ödeme alınmaz
+    assert db.add_payment(order, 'nakit', Decimal('1.00')) is None
+
+def test_amount_is_capped_at_remaining(db, order, products):
+    lines, total = order_with_lines(db, order, products)
+    assert db.add_payment(order, 'nakit', total + 50) == (total, total, 0)
+    assert payments(db, order) == [('nakit', total)]
+
+def test_pay_by_items(db, order, products):
+    (first, second, third), total = order_with_lines(db, order, products)
+    
+    amount, paid, remaining = db.add_payment(order, 'nakit', item_ids=[first[0], third[0]])
+    assert amount == first[4] + third[4]
+    assert remaining == second[4]
+    assert db.get_paid_item_ids(order) == {first[0], third[0]}
+    
+    # Ödenmiş satır çıkarılamaz, adedi değişmez, tekrar ürüne göre ödenemez
+    assert db.remove_order_items(order, [first[0]]) is None
+    assert db.change_order_item_quantity(order, first[0], 1) is None
+    assert db.add_payment(order, 'nakit', item_ids=[first[0]]) is None
+    assert db.get_order_balance(order) == (total, amount)
+    
+    assert db.add_payment(order, 'kredi_karti', item_ids=[second[0]]) == (second[4], total, 0)
+    assert db.get_active_order(db.get_table(1)[0]) is None
+
+def test_same_client_id_is_applied_once(db, order, products):
+    lines, total = order_with_lines(db, order, products)
+    first = db.add_payment(order, 'nakit', Decimal('5.00'), client_id='odeme-1')
+    assert db.add_payment(order, 'nakit', Decimal('5.00'), client_id='odeme-1') == first
+    assert db.get_order_balance(order) == (total, Decimal('5.00'))
+    assert len(payments(db, order)) == 1
+    
+    # Kapatan ödemenin tekrarı da ikinci kez yazılmaz
+    closing = db.add_payment(order, 'nakit', client_id='odeme-2')
+    assert db.add_payment(order, 'nakit', client_id='odeme-2') == closing
+    assert len(payments(db, order)) == 2
+    assert rollups(db) == [('nakit', 1, total)]
+
+def test_remaining_reaches_exactly_zero(db, order, products):
+    # 0.10 ikilik kayan noktada tam gösterilemez; üç ödeme kalanı tam sıfırlamalı
+    product_id = products[0][0]
+    assert db.execute_query("UPDATE urunler SET fiyat = %s WHERE id = %s",
+                            (Decimal('0.10'), product_id))
+    db.add_order_line(order, product_id, 3)
+    
+    assert db.add_payment(order, 'nakit', Decimal('0.10'))[2] == Decimal('0.20')
+    assert db.add_payment(order, 'kredi_karti', Decimal('0.10'))[2] == Decimal('0.10')
+    amount, paid, remaining = db.add_payment(order, 'nakit', Decimal('0.10'))
+    assert (paid, remaining) == (Decimal('0.30'), 0)
+    assert db.get_active_order(db.get_table(1)[0]) is None
+
+def test_split_order_is_one_report_row(db, order, products):
+    lines, total = order_with_lines(db, order, products)
+    db.add_payment(order, 'nakit', Decimal('2.00'))
+    db.add_payment(order, 'kredi_karti', Decimal('3.00'))
+    db.add_payment(order, 'banka_karti')
+    
+    report = db.get_daily_report(*day_range(date.today()))
+    assert len(report) == 1
+    order_id, table_no, order_total, payment_types, created_at, state = report[0]
+    assert (order_id, order_total, state) == (order, total, 'kapatildi')
+    assert sorted(payment_types.split(',')) == ['banka_karti', 'kredi_karti', 'nakit']
+    
+    # Tutarlar ödeme tipine bölünür, sipariş kapatan ödemenin tipinde bir kez sayılır
+    expected = [('banka_karti', 1, total - 5), ('kredi_karti', 0, Decimal('3.00')),
+                ('nakit', 0, Decimal('2.00'))]
+    assert rollups(db) == expected
+    assert db.rebuild_rollups()
+    assert rollups(db) == expected
+
+class ServerError(DatabaseError):
+    """mysql-connector'ın errno taşıyan hatası yerine"""
+    
+    def __init__(self, errno):
+        super().__init__(f"MySQL hatası {errno}")
+        self.errno = errno
+
+CONFLICTS = [
+    (ServerError(1213), 'deadlock'),
+    (ServerError(1205), 'lock_timeout'),
+    (sqlite3.OperationalError("database is locked"), 'busy'),
+]
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Yeniden deneme beklemelerini kaydet, gerçekten bekleme"""
+    delays = []
+    monkeypatch.setattr(database.time, 'sleep', delays.append)
+    return delays
+
+@pytest.fixture
+def mysql_errors(db, monkeypatch):
+    """SQLite veritabanında MySQL hata kodlarını MySQL arka ucu gibi sınıflandır"""
+    # Sınıflandırma sürücüye ihtiyaç duymaz; __init__ sürücü kurulu değilse hata verir
+    mysql = MySQLBackend.__new__(MySQLBackend)
+    sqlite_kind = db.backend.conflict_kind
+    monkeypatch.setattr(db.backend, 'conflict_kind',
+                        lambda error: mysql.conflict_kind(error) or sqlite_kind(error))
+
+def fail_after_writing(db, monkeypatch, error, failures):
+    """Ödeme yazıldıktan sonra, işlem bitmeden verilen hatayla ilk denemeleri düşür"""
+    original = db._add_payment
+    attempts = []
+    
+    def attempt(conn, *args):
+        result = original(conn, *args)
+        attempts.append(result)
+        if len(attempts) <= failures:
+            raise error
+        return result
+    monkeypatch.setattr(db, '_add_payment', attempt)
+    return attempts
+
+@pytest.mark.parametrize('error, kind', CONFLICTS)
+def test_conflict_is_retried_and_applied_once(db, order, products, monkeypatch, sleeps,
+                                              mysql_errors, error, kind):
+    lines, total = order_with_lines(db, order, products)
+    attempts = fail_after_writing(db, monkeypatch, error, failures=2)
+    before = transaction_retry_stats.snapshot()
+    
+    assert db.add_payment(order, 'nakit', Decimal('5.00'), client_id='odeme-1') == (
+        Decimal('5.00'), Decimal('5.00'), total - 5)
+    
+    after = transaction_retry_stats.snapshot()
+    assert len(attempts) == 3
+    assert len(sleeps) == 2
+    assert after['retries'] - before['retries'] == 2
+    assert after['by_kind'][kind] - before['by_kind'].get(kind, 0) == 2
+    # Düşen denemelerin yazdıkları geri alındı; ödeme bir kez yazıldı
+    assert payments(db, order) == [('nakit', Decimal('5.00'))]
+    assert db.get_order_balance(order) == (total, Decimal('5.00'))
+
+def test_retries_give_up_without_writing(db, order, products, monkeypatch, sleeps, mysql_errors):
+    lines, total = order_with_lines(db, order, products)
+    retries = DB_CONFIG.get('transaction_retries', 3)
+    attempts = fail_after_writing(db, monkeypatch, ServerError(1213), failures=retries + 1)
+    before = transaction_retry_stats.snapshot()
+    
+    assert db.add_payment(order, 'nakit') is None
+    
+    after = transaction_retry_stats.snapshot()
+    assert len(attempts) == retries + 1
+    assert len(sleeps) == retries
+    assert after['exhausted'] - before['exhausted'] == 1
+    assert payments(db, order) == []
+    assert db.get_order_balance(order) == (total, 0)
+    assert db.get_active_order(db.get_table(1)[0]) is not None
+
+def test_other_errors_are_not_retried(db, order, products, monkeypatch, sleeps, mysql_errors):
+    lines, total = order_with_lines(db, order, products)
+    attempts = fail_after_writing(db, monkeypatch, ServerError(1062), failures=1)
+    assert db.add_payment(order, 'nakit') is None
+    assert len(attempts) == 1
+    assert sleeps == []
+    assert payments(db, order) == []